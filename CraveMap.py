@@ -1,12 +1,11 @@
 import streamlit as st
-import requests
 import os
 from dotenv import load_dotenv
 
 # Load environment variables FIRST, before any other imports
 load_dotenv()
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 import streamlit.components.v1 as components
 import stripe
 import json
@@ -14,6 +13,7 @@ import hashlib
 from datetime import datetime, timedelta
 import time
 import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from legal import PRIVACY_POLICY, TERMS_OF_SERVICE
 import smtplib
 from email.mime.text import MIMEText
@@ -45,10 +45,41 @@ except Exception as postgres_error:
         db = None
         postgres_db = None
 from spam_protection import SpamProtection
+from places_cache import get_geocode_cache, get_place_details_cache
+from google_maps_client import get_maps_client
+from search_cache import get_search_cache, make_search_key
+from search_pipeline import CandidateSet, KeywordStream, build_candidate, get_background_executor, get_card_executor, keyword_rank_score
+from geo_distance import batch_distances_km, haversine_km
+from summary_cache import get_review_summary_cache
+from summary_batch import BATCH_SYSTEM_PROMPT, build_batch_prompt, parse_batch_response, parse_partial_batch
+from summary_stream import SummaryStream
+from review_prompt import compact_reviews, estimate_tokens
+from extractive_summary import extractive_summary
+from llm_gateway import get_llm_gateway
+from llm_hedge import ModelsExhausted, get_hedged_caller
+from model_router import classify_error, get_model_router
+from llm_telemetry import get_llm_telemetry
+from analytics import get_search_popularity
+from warmup import get_warmup_job, parse_hours
+import numpy as np
 
 # Initialize backup manager and spam protection
 backup_manager = BackupManager()
 spam_protection = SpamProtection()
+geocode_cache = get_geocode_cache()
+# Place details are served from cache for PLACE_DETAILS_FRESH_HOURS, then refreshed in the background
+place_details_cache = get_place_details_cache(
+    fresh_seconds=int(float(os.getenv('PLACE_DETAILS_FRESH_HOURS', '6')) * 3600)
+)
+# Candidate supersets for identical (craving, location) searches are reused across sessions
+# for SEARCH_CACHE_TTL_MINUTES; filter changes never re-hit Google within that window
+search_cache = get_search_cache(
+    ttl_seconds=int(float(os.getenv('SEARCH_CACHE_TTL_MINUTES', '15')) * 60)
+)
+# AI summaries are reused until a place's reviews change
+review_summary_cache = get_review_summary_cache()
+# Searches per (location, craving) pick what the off-peak warm-up searches
+search_popularity = get_search_popularity()
 
 def check_and_backup():
     """Check if backup is needed and create one (silent operation for production)"""
@@ -383,8 +414,31 @@ def get_user_id():
         rate_key = get_rate_limit_key()
         return f"anon_{rate_key}"
 
-# Function to load usage data for specific user
+# Per-rerun user record cache: Streamlit re-executes this script on every rerun, so
+# this starts empty each run and load_user_data hits the database once per user per
+# rerun. save_user_data writes through to it.
+user_record_cache = {}
+
+def user_cache_key(user_id):
+    # Records are looked up by email in PostgreSQL, so the login state is part of the key
+    return (user_id, st.session_state.get('user_email', ''))
+
+def cache_user_record(user_id, data):
+    """Store a freshly saved user record in this rerun's cache"""
+    user_record_cache[user_cache_key(user_id)] = dict(data)
+
 def load_user_data(user_id):
+    """Load user data, reading the database at most once per rerun
+    
+    Returns a copy, so callers' changes only stick once they save_user_data.
+    """
+    key = user_cache_key(user_id)
+    if key not in user_record_cache:
+        user_record_cache[key] = fetch_user_data(user_id)
+    return dict(user_record_cache[key])
+
+# Function to load usage data for specific user
+def fetch_user_data(user_id):
     """Load user data from PostgreSQL database with SQLite fallback"""
     # Get user email for database lookup
     user_email = st.session_state.get('user_email', '')
@@ -401,13 +455,14 @@ def load_user_data(user_id):
                     'is_premium': user_data['is_premium'],
                     'payment_completed': user_data['is_premium'],  # Assume payment completed if premium
                     'stripe_customer_id': None,  # Will need to add this to PostgreSQL schema later
-                    'monthly_searches': 0,  # Will add tracking later
-                    'last_search_reset': datetime.now().isoformat(),
+                    'monthly_searches': user_data['monthly_searches'],
+                    'last_search_reset': (user_data['last_search_reset'] or datetime.now()).isoformat(),
                     'premium_since': user_data['premium_expiry'].isoformat() if user_data['premium_expiry'] else None,
                     'promo_activation': None,
                     'first_name': user_data['first_name'],
                     'last_name': user_data['last_name'],
-                    'phone': user_data['phone']
+                    'phone': user_data['phone'],
+                    'storage': 'postgres'  # Search counts are kept in PostgreSQL too
                 }
         
         # Fallback to SQLite database
@@ -476,6 +531,7 @@ def save_user_data(user_id, data):
                 phone=data.get('phone', ''),
                 is_premium=data.get('is_premium', False)
             )
+            cache_user_record(user_id, data)
             return
         
         # Fallback to SQLite database
@@ -491,6 +547,7 @@ def save_user_data(user_id, data):
                 premium_since=data.get('premium_since'),
                 promo_activation=data.get('promo_activation')
             )
+            cache_user_record(user_id, data)
             return
         else:
             raise Exception("Both PostgreSQL and SQLite databases unavailable")
@@ -503,11 +560,14 @@ def save_user_data(user_id, data):
                 filename = f".user_data_{user_id}.json"
                 with open(filename, 'w') as f:
                     json.dump(data, f, indent=2)
+                cache_user_record(user_id, data)
             except Exception as file_error:
                 st.error(f"File save failed: {str(file_error)}")
         else:
             # Production - database is required
             st.error(f"❌ CRITICAL: Database save failed in production: {str(e)}")
+            # The stored record is unknown now - read it again on next load
+            user_record_cache.pop(user_cache_key(user_id), None)
             raise e
 
 def send_support_email(support_data):
@@ -988,6 +1048,35 @@ def check_payment_status():
 # Check payment status when app loads
 check_payment_status()
 
+def increment_search_count(user_id, user_data, limit):
+    """Count one search for a logged-in user if it stays within limit
+    
+    Returns the new monthly count, or None if the limit is reached (the
+    search isn't counted). The check and the increment are one statement in
+    the database that holds the user, so several tabs can't overshoot it.
+    """
+    if user_data.get('storage') == 'postgres':
+        new_count = postgres_db.update_search_count(user_data['email'], 1, limit)
+    else:
+        try:
+            if db is None:
+                raise Exception("SQLite database unavailable")
+            new_count = db.update_search_count(user_id, 1, limit)
+        except Exception as e:
+            print(f"⚠️ Search count update failed: {e}")
+            # Fallback: manually update the count
+            if user_data['monthly_searches'] + 1 > limit:
+                return None
+            user_data['monthly_searches'] += 1
+            save_user_data(user_id, user_data)
+            return user_data['monthly_searches']
+    
+    if new_count is not None:
+        # Keep this rerun's cached record in step with the atomic increment
+        user_data['monthly_searches'] = new_count
+        cache_user_record(user_id, user_data)
+    return new_count
+
 def check_search_limits():
     """Check search limits with robust rate limiting for anonymous users"""
     email = get_user_email()
@@ -1032,26 +1121,11 @@ def check_search_limits():
                 st.info(f"🎯 Trial Mode: {new_daily_count}/{TRIAL_DAILY_LIMIT} searches today | {days_left} days remaining")
                 return True
         
-        # Check if user has reached monthly limit
-        if user_data['monthly_searches'] >= 5:
+        # The limit is checked inside the increment: two tabs at 4/5 can't both get through
+        new_count = increment_search_count(user_id, user_data, limit=5)
+        if new_count is None:
             st.warning("🔒 You've reached your 5 free searches for this month!")
             return False
-        
-        # Increment search count using database method with fallback
-        try:
-            if db is not None:
-                new_count = db.update_search_count(user_id, 1)
-            else:
-                # Fallback: manually update the count
-                user_data['monthly_searches'] += 1
-                save_user_data(user_id, user_data)
-                new_count = user_data['monthly_searches']
-        except Exception as e:
-            # Fallback: manually update the count
-            user_data['monthly_searches'] += 1
-            save_user_data(user_id, user_data)
-            new_count = user_data['monthly_searches']
-        
         st.session_state.monthly_searches = new_count
         
         remaining = 5 - new_count
@@ -1083,31 +1157,241 @@ def check_search_limits():
         
         return True
 
-# OpenRouter client
-client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=OPENROUTER_API_KEY,
-    default_headers={
+# OpenRouter client settings (shared by the sync and async clients)
+openrouter_client_kwargs = {
+    "base_url": "https://openrouter.ai/api/v1",
+    "api_key": OPENROUTER_API_KEY,
+    "default_headers": {
         "HTTP-Referer": "https://cravemap.streamlit.app",
         "X-Title": "CraveMap"
     }
+}
+
+# OpenRouter client
+client = OpenAI(**openrouter_client_kwargs)
+
+# Async OpenRouter path: one AsyncOpenAI client for the whole process, capped at
+# LLM_MAX_CONCURRENCY calls in flight and OPENROUTER_RPM requests/minute (the
+# free tier allows 20). Saturated calls fail fast to cached/extractive summaries.
+# LLM_ASYNC=0 goes back to the blocking client.
+USE_ASYNC_LLM = os.getenv('LLM_ASYNC', '1') != '0'
+llm_gateway = get_llm_gateway(
+    lambda: AsyncOpenAI(**openrouter_client_kwargs),
+    max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', '8')),
+    requests_per_minute=int(os.getenv('OPENROUTER_RPM', '20')),
+    burst=int(os.getenv('OPENROUTER_BURST', '5'))
 )
 
-def get_place_details(place_id):
-    url = "https://maps.googleapis.com/maps/api/place/details/json"
+# Shared pooled Google Maps client (timeouts + retry budget) for all Places calls
+maps_client = get_maps_client(GOOGLE_API_KEY)
+
+# Per-model health scoreboard with circuit breakers (shared process-wide, persisted)
+model_router = get_model_router()
+
+# Hourly per-model latency/token/cost telemetry for the dbstats panel
+llm_telemetry = get_llm_telemetry()
+
+def record_llm_attempt(model, started, messages, text="", usage=None, outcome="success"):
+    """Record one completion attempt in the telemetry table
+    
+    Token counts come from the provider's usage report when there is one and
+    are estimated from the text otherwise. A failure that produced no text
+    is recorded with zero tokens - nothing was billed.
+    """
+    usage = usage or {}
+    if outcome != "success" and not text and not usage:
+        prompt_tokens = completion_tokens = 0
+    else:
+        prompt_tokens = usage.get("prompt_tokens") or sum(estimate_tokens(m["content"]) for m in messages)
+        completion_tokens = usage.get("completion_tokens") or estimate_tokens(text)
+    llm_telemetry.record(model, time.time() - started, outcome, prompt_tokens, completion_tokens)
+
+# LLM calls race the next model once the current one is past its p95 latency
+# (LLM_HEDGE_AFTER_SECONDS until enough samples exist), with at most
+# LLM_MAX_HEDGES hedges in flight across the whole process
+hedged_caller = get_hedged_caller(
+    default_hedge_after=float(os.getenv('LLM_HEDGE_AFTER_SECONDS', '4')),
+    max_hedges=int(os.getenv('LLM_MAX_HEDGES', '4')),
+    tracker=model_router
+)
+
+# Per-search latency budget for AI summaries; past it the offline quick take is shown
+LLM_SUMMARY_BUDGET_SECONDS = float(os.getenv('LLM_SUMMARY_BUDGET_SECONDS', '20'))
+
+def new_summary_deadline():
+    """Deadline for every summary call and card of one search"""
+    return time.time() + LLM_SUMMARY_BUDGET_SECONDS
+
+def summary_time_left(deadline):
+    """Seconds left before a search's summary deadline"""
+    return max(0.0, deadline - time.time())
+
+def complete_with_models(messages, max_tokens, is_valid=bool, deadline=None):
+    """Run a chat completion across the configured models with hedging
+
+    Models are tried in the router's order - open circuit breakers skipped,
+    fastest expected first. Returns (model, text) for the first valid answer,
+    or raises ModelsExhausted - also once the search's deadline has passed.
+    """
+    if deadline is None:
+        deadline = new_summary_deadline()
+    if summary_time_left(deadline) <= 0:
+        raise ModelsExhausted(TimeoutError("Summary latency budget used up"))
+    
+    def call(model, cancel):
+        started = time.time()
+        usage = {}
+        # The hedged caller cancels calls still running at the deadline; the
+        # extra second only bounds a request that ignores cancellation
+        timeout = summary_time_left(deadline) + 1
+        try:
+            if USE_ASYNC_LLM:
+                text = llm_gateway.complete(model, messages, max_tokens=max_tokens,
+                                            timeout=timeout, usage=usage, cancel=cancel)
+            else:
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=max_tokens,
+                    timeout=timeout
+                )
+                text = ""
+                if hasattr(response, "choices") and response.choices:
+                    text = (response.choices[0].message.content or "").strip()
+                if getattr(response, "usage", None):
+                    usage = {"prompt_tokens": response.usage.prompt_tokens,
+                             "completion_tokens": response.usage.completion_tokens}
+        except Exception as e:
+            outcome = "cancelled" if cancel.cancelled else classify_error(e)
+            record_llm_attempt(model, started, messages, usage=usage, outcome=outcome)
+            raise
+        record_llm_attempt(model, started, messages, text, usage, "success" if is_valid(text) else "invalid")
+        return text
+    
+    return hedged_caller.call(model_router.order(models), call, is_valid=is_valid,
+                              timeout=summary_time_left(deadline))
+
+# Stream summaries into the result cards as tokens arrive (LLM_STREAM_SUMMARIES=0
+# falls back to hedged, non-streaming completions)
+STREAM_SUMMARIES = os.getenv('LLM_STREAM_SUMMARIES', '1') != '0'
+
+def stream_with_models(messages, max_tokens, on_text, is_valid=bool, deadline=None):
+    """Stream a chat completion, restarting on the next model if a stream breaks
+
+    on_text(text) receives the accumulated text as tokens arrive, and an empty
+    string when a failed model's partial output is discarded. Streams are not
+    hedged - models are tried one after another in the router's order, all
+    within the search's deadline. Returns (model, text) or raises ModelsExhausted.
+    """
+    if deadline is None:
+        deadline = new_summary_deadline()
+    route = model_router.order(models)
+    last_error = RuntimeError("No model available - every circuit breaker is open") if not route else None
+    for i, model in enumerate(route, 1):
+        timeout = summary_time_left(deadline)
+        if timeout <= 0:
+            last_error = TimeoutError("Summary latency budget used up")
+            break
+        print(f"Streaming with model {i}/{len(route)}: {model}")
+        started = time.time()
+        received = {"text": ""}
+        usage = {}
+        outcome = None
+        
+        def on_partial(partial):
+            received["text"] = partial
+            on_text(partial)
+        
+        try:
+            if USE_ASYNC_LLM:
+                text = llm_gateway.stream(model, messages, on_partial, max_tokens=max_tokens,
+                                          timeout=timeout, usage=usage)
+            else:
+                text = ""
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    timeout=timeout
+                )
+                for chunk in response:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        text += delta
+                        on_partial(text)
+            if not is_valid(text.strip()):
+                outcome = "invalid"
+                raise ValueError("stream ended without a valid answer")
+        except Exception as e:
+            print(f"❌ Stream from {model} failed: {str(e)}")
+            # Running out of the search's budget isn't the model's fault
+            if not (classify_error(e) == "timeout" and summary_time_left(deadline) <= 0):
+                model_router.record_failure(model, e)
+            record_llm_attempt(model, started, messages, received["text"], usage, outcome or classify_error(e))
+            last_error = e
+            if received["text"]:
+                on_text("")  # Restart cleanly on the next model
+            continue
+        
+        model_router.record(model, time.time() - started)
+        record_llm_attempt(model, started, messages, text, usage)
+        print(f"✅ Streamed with model: {model}")
+        return model, text.strip()
+    
+    raise ModelsExhausted(last_error)
+
+def fetch_place_details(place_id):
+    """Fetch reviews and photos for a place straight from the Places details endpoint"""
     params = {
         "place_id": place_id,
-        "fields": "name,reviews,photos",
-        "key": GOOGLE_API_KEY
+        "fields": "name,reviews,photos"
     }
-    response = requests.get(url, params=params)
-    return response.json()
+    return maps_client.get("details", params)
 
-def summarize_reviews_and_dishes(reviews):
-    """Summarize reviews and extract dishes with robust model fallback"""
-    review_texts = [r['text'] for r in reviews if 'text' in r]
+def get_place_details(place_id):
+    """Get place details, served from cache (stale-while-revalidate) when possible"""
+    return place_details_cache.get_or_fetch(place_id, fetch_place_details)
+
+# Canned summaries (shown when every model fails) start with this marker and are never cached
+FALLBACK_SUMMARY_PREFIX = "⚡"
+
+def is_generated_summary(summary):
+    """True for a real model summary, False for canned fallback text"""
+    return bool(summary) and not summary.startswith(FALLBACK_SUMMARY_PREFIX)
+
+def quick_summary(reviews):
+    """Offline extractive summary (representative sentences + top dishes), '' if nothing to say"""
+    try:
+        text = extractive_summary([r['text'] for r in reviews if 'text' in r])
+    except Exception as e:
+        print(f"❌ Extractive summary failed: {e}")
+        return ""
+    return f"{FALLBACK_SUMMARY_PREFIX} Quick take from reviews: {text}" if text else ""
+
+# Estimated prompt tokens of review text allowed per place
+REVIEW_TOKEN_BUDGET = int(os.getenv('REVIEW_TOKEN_BUDGET', '400'))
+
+def compact_place_reviews(reviews_list):
+    """Compact each place's review texts for one prompt and log the tokens this call saved"""
+    compacted = []
+    original_tokens = saved_tokens = 0
+    for reviews in reviews_list:
+        texts, stats = compact_reviews([r['text'] for r in reviews if 'text' in r], REVIEW_TOKEN_BUDGET)
+        compacted.append(texts)
+        original_tokens += stats["original_tokens"]
+        saved_tokens += stats["saved_tokens"]
+    if original_tokens:
+        print(f"✂️ Prompt compaction saved ~{saved_tokens}/{original_tokens} review tokens ({saved_tokens * 100 // original_tokens}%)")
+    return compacted
+
+def review_summary_messages(reviews):
+    """Chat messages asking for one place's summary, or None if there is no review text"""
+    review_texts = compact_place_reviews([reviews])[0]
     if not review_texts:
-        return "No reviews available."
+        return None
         
     joined = "\n".join(review_texts)
     prompt = f"""
@@ -1115,49 +1399,70 @@ def summarize_reviews_and_dishes(reviews):
 
     {joined}
     """
+    return [
+        {"role": "system", "content": "You are an expert at summarizing restaurant reviews and identifying popular dishes. Be concise but informative."},
+        {"role": "user", "content": prompt}
+    ]
 
-    # Try each model in order until one succeeds
-    for i, model in enumerate(models, 1):
-        try:
-            # Show progress for debugging (won't be visible to users due to spinner)
-            print(f"Trying model {i}/{len(models)}: {model}")
-            
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "You are an expert at summarizing restaurant reviews and identifying popular dishes. Be concise but informative."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=200
-            )
-            
-            if hasattr(response, "choices") and response.choices:
-                print(f"✅ Success with model: {model}")
-                return response.choices[0].message.content.strip()
-                
-        except Exception as e:
-            error_msg = str(e).lower()
-            
-            # Log which model failed (for debugging)
-            print(f"❌ Model {model} failed: {str(e)}")
-            
-            # If this is the last model, provide fallback
-            if model == models[-1]:
-                if "rate limit" in error_msg or "429" in error_msg:
-                    return "⚡ AI summary temporarily unavailable due to high demand. This restaurant has received positive feedback from customers for its food quality and service. Popular dishes mentioned by reviewers include their signature items and house specialties."
-                elif "insufficient credits" in error_msg or "payment" in error_msg:
-                    return "⚡ AI summary temporarily unavailable. Customer reviews highlight the restaurant's welcoming atmosphere and quality menu offerings. Diners frequently recommend trying their featured dishes and daily specials."
-                elif "authentication" in error_msg or "api key" in error_msg:
-                    return "⚡ AI summary temporarily unavailable. Based on available reviews, this establishment offers a good dining experience with varied menu options. Customers enjoy both the food quality and overall service."
-                else:
-                    return "⚡ AI summary currently being processed. Please check back later for detailed summaries of customer feedback and popular dishes."
-            
-            # Continue to next model
-            continue
+def summarize_reviews_and_dishes(reviews, deadline=None):
+    """Summarize reviews and extract dishes with robust model fallback"""
+    messages = review_summary_messages(reviews)
+    if not messages:
+        return "No reviews available."
+
+    # Race the models (hedging on slow ones) until one succeeds
+    try:
+        model, summary = complete_with_models(messages, max_tokens=200, deadline=deadline)
+        return summary
+    except ModelsExhausted as e:
+        return fallback_summary(reviews, e)
+
+def fallback_summary(reviews, error):
+    """Summary for when every model failed (or the latency budget ran out)"""
+    # Summarize offline
+    quick = quick_summary(reviews)
+    if quick:
+        return quick
+    
+    # Nothing extractable - provide fallback
+    error_msg = str(error).lower()
+    if "rate limit" in error_msg or "429" in error_msg:
+        return "⚡ AI summary temporarily unavailable due to high demand. This restaurant has received positive feedback from customers for its food quality and service. Popular dishes mentioned by reviewers include their signature items and house specialties."
+    elif "insufficient credits" in error_msg or "payment" in error_msg:
+        return "⚡ AI summary temporarily unavailable. Customer reviews highlight the restaurant's welcoming atmosphere and quality menu offerings. Diners frequently recommend trying their featured dishes and daily specials."
+    elif "authentication" in error_msg or "api key" in error_msg:
+        return "⚡ AI summary temporarily unavailable. Based on available reviews, this establishment offers a good dining experience with varied menu options. Customers enjoy both the food quality and overall service."
+    else:
+        return "⚡ AI summary currently being processed. Please check back later for detailed summaries of customer feedback and popular dishes."
+
+def summarize_places_batch(entries, deadline=None):
+    """Summarize several places in one LLM call
+
+    entries is [(place_name, reviews), ...]. Returns a list of summaries aligned
+    with entries - None for any place the model left out, so callers can fall
+    back to per-place calls. Raises ModelsExhausted if every model fails.
+    """
+    names = [name for name, _ in entries]
+    prompt = build_batch_prompt(list(zip(names, compact_place_reviews([reviews for _, reviews in entries]))))
+
+    print(f"Summarizing a batch of {len(entries)} places")
+    try:
+        model, text = complete_with_models(
+            [
+                {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=200 * len(entries),
+            is_valid=lambda text: any(parse_batch_response(text, len(entries))),
+            deadline=deadline
+        )
+    except ModelsExhausted as e:
+        print(f"❌ Batch summary failed on every model: {e}")
+        raise
     
-    # This should never be reached, but just in case
-    return "⚡ Restaurant reviews are currently being processed. Please check back later for detailed summaries."
+    summaries = parse_batch_response(text, len(entries))
+    print(f"✅ Batch summarized {sum(1 for s in summaries if s)}/{len(entries)} places with {model}")
+    return summaries
 
 def get_place_photos(photo_metadata):
     photo_urls = []
@@ -1168,112 +1473,547 @@ def get_place_photos(photo_metadata):
             photo_urls.append(url)
     return photo_urls
 
+def fetch_card_details(place):
+    """Fetch the details result for one card (None if the fetch fails)"""
+    try:
+        return get_place_details(place['place_id']).get("result", {})
+    except Exception as e:
+        print(f"❌ Details fetch failed for {place.get('name')}: {e}")
+        return None
+
+def card_fetch_succeeded(card):
+    """Only cards whose details arrived are shared with other sessions; failed ones are refetched"""
+    return not card["details_failed"]
+
+def finish_card_summaries(pending, cards, summaries, deadline, exhausted=None, on_done=None):
+    """Store the summaries of pending cards, filling in places the batch answer left out
+
+    Missing places get their own summarize_reviews_and_dishes calls, run
+    concurrently. If the batch failed on every model (exhausted is its
+    ModelsExhausted), they get the offline fallback instead of more calls
+    into the same models. on_done(card) is called as each card is finished.
+    """
+    missing = [place for place, summary in zip(pending, summaries) if summary is None]
+    with ThreadPoolExecutor(max_workers=max(1, len(missing))) as executor:
+        futures = {}
+        if exhausted is None:
+            futures = {
+                place['place_id']: executor.submit(summarize_reviews_and_dishes, cards[place['place_id']]["result"]["reviews"], deadline)
+                for place in missing
+            }
+        for place, summary in zip(pending, summaries):
+            card = cards[place['place_id']]
+            reviews = card["result"]["reviews"]
+            try:
+                if summary is None:
+                    if place['place_id'] in futures:
+                        summary = futures[place['place_id']].result()
+                    else:
+                        summary = fallback_summary(reviews, exhausted)
+                if is_generated_summary(summary):
+                    review_summary_cache.store(place['place_id'], reviews, summary)
+                card["summary"] = summary
+            except Exception as e:
+                print(f"❌ Summary failed for {place.get('name')}: {e}")
+                card["summary_failed"] = True
+            if on_done:
+                on_done(card)
+
+def stream_card_summaries(pending, cards, deadline):
+    """Stream summaries for pending places into their cards' SummaryStreams (runs in a worker thread)
+
+    Several places share one streamed batch call whose partial JSON is parsed
+    as it arrives; a single place streams plain text. Places missing from the
+    final answer are filled in by finish_card_summaries.
+    """
+    streams = [cards[place['place_id']]["stream"] for place in pending]
+    reviews_list = [cards[place['place_id']]["result"]["reviews"] for place in pending]
+    
+    if len(pending) == 1:
+        messages = review_summary_messages(reviews_list[0])
+        max_tokens = 200
+        is_valid = bool
+        parse_final = lambda text: [text]
+        
+        def on_text(text):
+            streams[0].update(text)
+    else:
+        messages = [
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": build_batch_prompt(list(zip(
+                [place['name'] for place in pending], compact_place_reviews(reviews_list)
+            )))}
+        ]
+        max_tokens = 200 * len(pending)
+        is_valid = lambda text: any(parse_batch_response(text, len(pending)))
+        parse_final = lambda text: parse_batch_response(text, len(pending))
+        
+        def on_text(text):
+            for stream, partial in zip(streams, parse_partial_batch(text, len(pending))):
+                stream.update(partial or "")
+    
+    summaries = [None] * len(pending)
+    exhausted = None
+    if messages:
+        try:
+            model, text = stream_with_models(messages, max_tokens, on_text, is_valid=is_valid, deadline=deadline)
+            summaries = parse_final(text)
+        except ModelsExhausted as e:
+            print(f"❌ Streaming summary failed on every model: {e}")
+            exhausted = e
+    
+    finish_card_summaries(pending, cards, summaries, deadline, exhausted,
+                          on_done=lambda card: card["stream"].finish(card["summary"]))
+
+def fetch_place_cards(places, stream=STREAM_SUMMARIES, deadline=None):
+    """Fetch details and AI summaries for a batch of result cards (runs in a worker thread)
+
+    Details are fetched concurrently, then every place without a cached summary
+    is summarized in one batched LLM call. Places missing from the batch answer
+    are filled in by finish_card_summaries.
+    When streaming, cards are returned as soon as details are in, each with a
+    SummaryStream that fills in while the summary call runs in the background.
+    Every summary call shares deadline (a fresh budget if None).
+    Returns {place_id: card}.
+    """
+    if deadline is None:
+        deadline = new_summary_deadline()
+    with ThreadPoolExecutor(max_workers=max(1, len(places))) as executor:
+        results = list(executor.map(fetch_card_details, places))
+    
+    cards = {}
+    pending = []
+    for place, result in zip(places, results):
+        card = {"result": result or {}, "summary": None, "summary_failed": False, "details_failed": result is None}
+        cards[place['place_id']] = card
+        reviews = card["result"].get("reviews")
+        if not reviews:
+            continue
+        card["summary"] = review_summary_cache.lookup(place['place_id'], reviews)
+        if card["summary"] is None:
+            pending.append(place)
+    
+    if stream and pending:
+        for place in pending:
+            card = cards[place['place_id']]
+            card["stream"] = SummaryStream()
+            # Shown instantly while the AI summary streams in
+            card["quick_summary"] = quick_summary(card["result"]["reviews"])
+        get_background_executor().submit(stream_card_summaries, pending, cards, deadline)
+        return cards
+    
+    # One round trip for the whole shortlist; a single place goes straight to the per-place call
+    batched = [None] * len(pending)
+    exhausted = None
+    if len(pending) > 1:
+        try:
+            batched = summarize_places_batch([(place['name'], cards[place['place_id']]["result"]["reviews"]) for place in pending], deadline)
+        except ModelsExhausted as e:
+            exhausted = e
+    
+    finish_card_summaries(pending, cards, batched, deadline, exhausted)
+    return cards
+
 def calculate_distance(lat1, lon1, lat2, lon2):
     """Calculate distance between two points in kilometers using the Haversine formula"""
-    from math import radians, sin, cos, sqrt, atan2
+    return haversine_km(lat1, lon1, lat2, lon2)
+
+def fetch_location_coords(location):
+    """Resolve a location string to (lat, lng) via the Places findplacefromtext endpoint"""
+    # Use Places API instead of Geocoding API
+    # This avoids the need for separate Geocoding API authorization
+    geocode_params = {
+        "input": location,
+        "inputtype": "textquery",
+        "fields": "geometry"
+    }
+    geocode_data = maps_client.get("findplacefromtext", geocode_params)
     
-    R = 6371  # Earth's radius in kilometers
+    if geocode_data.get("candidates") and len(geocode_data["candidates"]) > 0:
+        location_coords = geocode_data["candidates"][0]["geometry"]["location"]
+        return (location_coords['lat'], location_coords['lng'])
     
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
+    if geocode_data.get("status") not in (None, "OK", "ZERO_RESULTS"):
+        # Quota/auth errors are transient - raise so they don't get negatively cached
+        raise Exception(f"Geocode failed: {geocode_data.get('status')}")
+    return None
+
+def geocode_location(location):
+    """Get coordinates for a location, using the geocode cache when possible"""
+    if not location or not location.strip():
+        return None
+    try:
+        return geocode_cache.get_or_fetch(location, fetch_location_coords)
+    except Exception as e:
+        print(f"❌ Geocoding {location} failed: {e}")
+        return None
+
+# Candidates further than this from the searched location are never shown
+# (matches the 50 km maximum radius of the Places API)
+MAX_CANDIDATE_DISTANCE_KM = 50
+
+# Keyword textsearches run concurrently, up to this many at once per search
+MAX_KEYWORD_FANOUT = 4
+
+def craving_keywords(craving):
+    """Comma-separated cravings ("ramen, tonkotsu") are searched together and merged"""
+    return [k.strip() for k in craving.split(",") if k.strip()][:MAX_KEYWORD_FANOUT] or [craving.strip()]
+
+# Deep search (premium): follow next_page_token up to this many pages per keyword
+# (Google stops at 3) and show up to this many extra places as they arrive
+DEEP_SEARCH_MAX_PAGES = 3
+DEEP_SEARCH_EXTRA_RESULTS = 6
+
+# A next_page_token is only accepted a couple of seconds after it is issued
+PAGE_TOKEN_DELAY_SECONDS = 2
+
+def fetch_keyword_page(keyword, location, origin_coords, page_token=None, offset=0):
+    """Fetch one textsearch page for a keyword as scored candidates
+
+    Returns (candidates, next_page_token). Runs in worker threads.
+    """
+    base_query = f"{keyword} in {location}"
     
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-    distance = R * c
+    # Initialize basic params
+    params = {
+        "query": base_query
+    }
+
+    if page_token:
+        # Follow-up pages only take the token; all other params are ignored
+        params = {"pagetoken": page_token}
+    elif origin_coords:
+        params["location"] = f"{origin_coords[0]},{origin_coords[1]}"
+        # Rank by proximity; distance filters are applied afterwards on the superset
+        params["rankby"] = "distance"
+    else:
+        # Failed to find location, continue without distance ranking
+        pass
+        
+    data = {}
+    for attempt in range(3):
+        try:
+            data = maps_client.get("textsearch", params)
+        except Exception as e:
+            print(f"❌ Text search for {base_query} failed: {e}")
+            return [], None
+        # INVALID_REQUEST on a page token means it isn't active yet - give it another moment
+        if not page_token or data.get("status") != "INVALID_REQUEST":
+            break
+        time.sleep(1)
     
-    return distance
+    candidates = build_keyword_candidates(data.get("results", [])[:15], origin_coords, offset)
+    return candidates, data.get("next_page_token")
+
+def build_keyword_candidates(raw_places, origin_coords, offset=0):
+    """Turn one page of raw results into scored candidates with distances
+
+    Distances for the whole page come from one vectorized pass; places beyond
+    MAX_CANDIDATE_DISTANCE_KM are dropped by the bounding box before any trig.
+    """
+    scores = [keyword_rank_score(offset + position) for position in range(len(raw_places))]
+    if not origin_coords:
+        return [build_candidate(place, score=score) for place, score in zip(raw_places, scores)]
+    
+    geometries = [place.get("geometry", {}).get("location", {}) for place in raw_places]
+    distances = batch_distances_km(
+        origin_coords,
+        [g.get("lat") for g in geometries],
+        [g.get("lng") for g in geometries],
+        max_km=MAX_CANDIDATE_DISTANCE_KM
+    )
+    
+    candidates = []
+    for place, distance, score in zip(raw_places, distances, scores):
+        if np.isinf(distance):
+            continue
+        candidates.append(build_candidate(place, None if np.isnan(distance) else float(distance), score))
+    return candidates
+
+def open_keyword_streams(location, keywords, origin_coords):
+    """Create one lazy candidate stream per keyword and fetch every first page concurrently
+
+    The ranking needs each keyword's best candidates before it can settle the
+    top-N, so first pages are fanned out in parallel; later pages are only
+    fetched by deep search, in the background.
+    """
+    streams = [
+        KeywordStream(
+            lambda token, offset, keyword=keyword: fetch_keyword_page(keyword, location, origin_coords, token, offset),
+            page_token_delay=PAGE_TOKEN_DELAY_SECONDS
+        )
+        for keyword in keywords
+    ]
+    with ThreadPoolExecutor(max_workers=max(1, min(len(streams), MAX_KEYWORD_FANOUT))) as executor:
+        list(executor.map(lambda stream: stream.fetch_next_page(), streams))
+    return streams
+
+def get_candidate_set(location, keywords):
+    """Get the cached candidate streams for (craving, location), opening them at most once
+
+    Concurrent identical searches from other sessions wait on the same fetch
+    instead of repeating it. Filters are not part of the key - they run in memory.
+    """
+    key = make_search_key(keywords, location)
+    
+    def run_fetch():
+        # Resolve the location once for all keywords (cached across searches)
+        origin_coords = geocode_location(location)
+        streams = open_keyword_streams(location, keywords, origin_coords)
+        return CandidateSet(streams, get_card_executor(), get_background_executor(), origin=origin_coords)
+    
+    # Don't cache empty results - they're often a transient upstream failure - or
+    # sets built without the origin, whose candidates have no distance to filter on
+    return search_cache.get_or_compute(
+        key, run_fetch, cache_if=lambda result: bool(result.candidates) and result.origin is not None
+    )
+
+def find_places(location, keywords, min_rating=0, premium_filters=None):
+    """Return (candidate_set, top places) for a search under the given filters
+
+    Only pages that are already loaded are considered - a follow-up page costs
+    at least PAGE_TOKEN_DELAY_SECONDS, so it is left to deep search.
+    """
+    filters = premium_filters or {}
+    candidate_set = get_candidate_set(location, keywords)
+    places = candidate_set.top_places(
+        min_rating=min_rating,
+        max_distance=filters.get("distance"),
+        max_price_level=filters.get("max_price_level"),
+        fetch_more=False
+    )
+    return candidate_set, places
 
 def search_food_places(location, keywords, min_rating=0, premium_filters=None):
-    url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-    places = []
-    origin_coords = None
+    """Return the top places for a search, filtering the cached candidate superset"""
+    return find_places(location, keywords, min_rating, premium_filters)[1]
+
+def get_search_results(location, keywords, min_rating=0, premium_filters=None):
+    """Return the filtered places plus their (shared, memoized) card fetch futures
+
+    Changing rating/distance filters re-runs only the in-memory filter pass; cards
+    for places already shown under other filters are reused, not refetched. New
+    places share one batched details + summary job. Every AI summary of the
+    search (deep-search cards included) shares one deadline.
+    """
+    deadline = new_summary_deadline()
+    candidate_set, places = find_places(location, keywords, min_rating, premium_filters)
+    cards = candidate_set.card_futures(places, lambda batch: fetch_place_cards(batch, deadline=deadline),
+                                       cache_if=card_fetch_succeeded)
+    return {"places": places, "cards": cards, "candidate_set": candidate_set, "deadline": deadline}
+
+def warm_search(location, craving):
+    """Run a popular search unfiltered and cache its details and AI summaries (warm-up thread)"""
+    places = search_food_places(location, craving_keywords(craving))
+    # Wait for the summaries here - there's no card to stream them into
+    fetch_place_cards(places, stream=False)
+    return len(places)
+
+# Off-peak warm-up: once a day in WARMUP_HOURS (server time, end exclusive) the
+# WARMUP_TOP_CRAVINGS most searched cravings of the WARMUP_TOP_LOCATIONS busiest
+# locations are searched in the background, so details and summaries are cached
+# before the rush. WARMUP_ENABLED=0 turns it off.
+if os.getenv('WARMUP_ENABLED', '1') != '0':
+    warmup_job = get_warmup_job(
+        warm_search,
+        lambda: search_popularity.popular(
+            top_locations=int(os.getenv('WARMUP_TOP_LOCATIONS', '5')),
+            top_cravings=int(os.getenv('WARMUP_TOP_CRAVINGS', '3'))
+        ),
+        hours=parse_hours(os.getenv('WARMUP_HOURS', '3-6'))
+    )
+
+# Longest a card waits for its details (plus, without streaming, its summary)
+# before it is shown without them
+CARD_WAIT_SECONDS = float(os.getenv('CARD_WAIT_SECONDS', '30'))
+
+# How often the result cards check their details and summary streams for updates
+CARD_POLL_SECONDS = 0.1
+
+def draw_card_skeleton(idx, place):
+    """Draw a card's name, rating, address and link, with slots for its summary and details"""
+    st.markdown(f"## {place['name']}")
     
-    for keyword in keywords:
-        base_query = f"{keyword} in {location}"
-        
-        # Initialize basic params
-        params = {
-            "query": base_query,
-            "key": GOOGLE_API_KEY
-        }
+    # Basic info for all users
+    rating_display = f"⭐ {place.get('rating', 'N/A')}"
+    
+    # Premium users get detailed analytics including distance
+    if has_premium_access():
+        price_level = place.get('price_level', 0)
+        price_display = "$" * max(1, price_level) if price_level > 0 else "$ (Budget-friendly)"
+        st.markdown(f"""
+        **Premium Analytics:**
+        - **Rating:** {rating_display} 
+        - **Price Level:** {price_display}
+        - **Distance:** {place.get('distance', 'N/A')}
+        - **Address:** {place['address']}
+        - **Popularity Rank:** #{idx + 1} in search results
+        """)
+    else:
+        st.markdown(f"{rating_display}\n\n📍 {place['address']}")
+    
+    st.markdown(f"[🔗 View on Google Maps]({place['url']})")
+    
+    view = {"place": place, "summary_slot": st.empty(), "body": st.container()}
+    view["summary_slot"].caption("🤖 Generating AI summary from reviews...")
+    
+    # Add some spacing between results
+    st.write("")
+    return view
 
-        # First get the location coordinates using Places API instead of Geocoding API
-        # This avoids the need for separate Geocoding API authorization
-        geocode_url = "https://maps.googleapis.com/maps/api/place/findplacefromtext/json"
-        geocode_params = {
-            "input": location,
-            "inputtype": "textquery",
-            "fields": "geometry",
-            "key": GOOGLE_API_KEY
-        }
-        geocode_res = requests.get(geocode_url, params=geocode_params)
-        geocode_data = geocode_res.json()
-        
-        if geocode_data.get("candidates") and len(geocode_data["candidates"]) > 0:
-            location_coords = geocode_data["candidates"][0]["geometry"]["location"]
-            origin_coords = (location_coords['lat'], location_coords['lng'])
-            params["location"] = f"{location_coords['lat']},{location_coords['lng']}"
-            
-            # Handle distance filtering properly for Google Places API
-            if premium_filters and premium_filters.get("distance"):
-                # Use radius instead of rankby when distance filter is active
-                radius_meters = int(premium_filters["distance"] * 1000)  # Convert km to meters
-                params["radius"] = min(radius_meters, 50000)  # Google Places max radius is 50km
-            else:
-                # Use rankby=distance for general proximity when no specific distance filter
-                params["rankby"] = "distance"
+def show_card_summary(view, text, streaming=False):
+    """Draw text into a card's summary slot (a cursor while it streams; '' clears the slot)"""
+    if text:
+        view["summary_slot"].markdown(f"""**What people say:**  
+            {text}{'▌' if streaming else ''}""")
+    else:
+        view["summary_slot"].empty()
+
+def fill_card(view, card, summary):
+    """Draw a card's final summary, review analytics and photos into its slots"""
+    result = card["result"]
+    view["summary_slot"].empty()
+    
+    if "reviews" in result:
+        reviews = result["reviews"]
+        if not card["summary_failed"]:
+            show_card_summary(view, summary)
         else:
-            # Failed to find location, continue without distance filtering
-            pass
-            
-        res = requests.get(url, params=params)
-        data = res.json()
-
-        if "results" in data:
-            for place in data["results"][:15]:
-                rating = place.get("rating")
-                price_level = place.get("price_level", 0)
-                geometry = place.get("geometry", {}).get("location", {})
-                
-                # Calculate distance if we have origin coordinates
-                distance = None
-                if origin_coords and geometry.get("lat") and geometry.get("lng"):
-                    distance = calculate_distance(
-                        origin_coords[0], origin_coords[1],
-                        geometry["lat"], geometry["lng"]
-                    )
-                
-                # Apply distance filter for premium users
-                if premium_filters and premium_filters.get("distance") and distance is not None:
-                    max_distance = premium_filters["distance"]
-                    if distance > max_distance:
-                        # Skip places that are too far
-                        continue
-                
-                # Apply rating filter
-                if rating is not None and rating < min_rating:
-                    continue
-                elif rating is None and min_rating > 0:
-                    continue
-                
-                place_info = {
-                    "name": place.get("name"),
-                    "place_id": place.get("place_id"),
-                    "rating": rating,
-                    "price_level": price_level,
-                    "address": place.get("formatted_address"),
-                    "url": f"https://www.google.com/maps/search/?api=1&query={place.get('name').replace(' ', '+')}"
-                }
-                
-                # Add distance information if available
-                if distance is not None:
-                    place_info["distance"] = f"{distance:.1f} km"
-                
-                places.append(place_info)
+            # If summarization fails, show a simple fallback
+            show_card_summary(view, f"This restaurant has {len(reviews)} customer reviews. Check individual reviews below for detailed feedback about food quality, service, and atmosphere.")
+        
+        # Premium users get detailed review analytics
+        if has_premium_access() and reviews:
+            with view["body"]:
+                with st.expander("📊 Premium Review Analytics"):
+                    total_reviews = len(reviews)
+                    avg_rating = sum(r.get('rating', 0) for r in reviews) / len(reviews) if reviews else 0
+                    recent_reviews = [r for r in reviews if 'time' in r]
+                    
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Total Reviews", total_reviews)
+                    with col2:
+                        st.metric("Avg Rating", f"{avg_rating:.1f}⭐")
+                    with col3:
+                        st.metric("Recent Activity", f"{len(recent_reviews)} recent")
+                    
+                    # Sentiment analysis
+                    positive_words = sum(1 for r in reviews if any(word in r.get('text', '').lower() 
+                                       for word in ['great', 'excellent', 'amazing', 'love', 'perfect', 'delicious']))
+                    sentiment_score = positive_words / len(reviews) * 100 if reviews else 0
+                    st.progress(sentiment_score / 100)
+                    st.write(f"Positive Sentiment: {sentiment_score:.0f}%")
+
+    if "photos" in result:
+        with view["body"]:
+            st.markdown("**Reviewer-uploaded photos (not dish-specific):**")
+            photo_urls = get_place_photos(result["photos"])
+            cols = st.columns(3)
+            for idx_photo, url in enumerate(photo_urls):
+                with cols[idx_photo % 3]:
+                    st.image(url, use_container_width=True)
+
+def render_place_cards(places, card_futures, deadline, first_idx=0):
+    """Render result cards: every skeleton at once, then each card's data as it arrives
+
+    All cards are polled in one loop, so the batched summary stream shows up in
+    every card at the same time instead of one card after another. Details
+    are waited on for up to CARD_WAIT_SECONDS; streamed AI text stops at the
+    search's summary deadline, leaving the quick take.
+    """
+    views = [draw_card_skeleton(first_idx + i, place) for i, place in enumerate(places)]
+    card_deadline = time.time() + CARD_WAIT_SECONDS
+    waiting = list(zip(views, card_futures))
+    streaming = []  # [view, card, last version drawn]
+    
+    while waiting or streaming:
+        still_waiting = []
+        for view, card_future in waiting:
+            if not card_future.done():
+                still_waiting.append((view, card_future))
+                continue
+            try:
+                card = card_future.result()
+            except Exception as e:
+                print(f"❌ Card data unavailable for {view['place'].get('name')}: {e!r}")
+                view["summary_slot"].caption("⏳ Reviews and photos are taking too long to load - search again in a moment.")
+                continue
+            if card.get("stream"):
+                # Show the offline quick take at once, then redraw as AI tokens arrive
+                show_card_summary(view, card.get("quick_summary"))
+                streaming.append([view, card, 0])
+            else:
+                fill_card(view, card, card["summary"])
+        waiting = still_waiting
+        
+        still_streaming = []
+        for entry in streaming:
+            view, card, seen = entry
+            version, text, done = card["stream"].snapshot()
+            if done:
+                fill_card(view, card, card["summary"])
+                continue
+            if version != seen:
+                entry[2] = version
+                # A model restart ("") falls back to the quick take
+                show_card_summary(view, text or card.get("quick_summary"), streaming=bool(text))
+            still_streaming.append(entry)
+        streaming = still_streaming
+        
+        now = time.time()
+        if streaming and now >= deadline:
+            # Latency budget exhausted - the quick take stands in for this render
+            for view, card, _ in streaming:
+                fill_card(view, card, card.get("quick_summary"))
+            streaming = []
+        if waiting and now >= card_deadline:
+            for view, _ in waiting:
+                print(f"❌ Card data unavailable for {view['place'].get('name')}: timed out")
+                view["summary_slot"].caption("⏳ Reviews and photos are taking too long to load - search again in a moment.")
+            waiting = []
+        if waiting or streaming:
+            time.sleep(CARD_POLL_SECONDS)
+
+def render_deep_search_results(search_results, min_rating=0, premium_filters=None):
+    """Load further result pages in the background and render extra places as pages arrive
+
+    The first cards are already on screen; this polls the page fetches and
+    appends each newly qualifying place until the pages run out or
+    DEEP_SEARCH_EXTRA_RESULTS extra places are shown. Returns the number added.
+    """
+    filters = premium_filters or {}
+    candidate_set = search_results["candidate_set"]
+    deadline = search_results["deadline"]
+    shown = {place["place_id"] for place in search_results["places"]}
+    limit = len(shown) + DEEP_SEARCH_EXTRA_RESULTS
+    page_futures = candidate_set.fetch_more_pages(DEEP_SEARCH_MAX_PAGES)
+    
+    status = st.empty()
+    added = 0
+    while True:
+        pending = [future for future in page_futures if not future.done()]
+        places = candidate_set.top_places(
+            min_rating=min_rating,
+            max_distance=filters.get("distance"),
+            max_price_level=filters.get("max_price_level"),
+            limit=limit,
+            fetch_more=False
+        )
+        new_places = [place for place in places if place["place_id"] not in shown]
+        card_futures = candidate_set.card_futures(new_places, lambda batch: fetch_place_cards(batch, deadline=deadline),
+                                                  cache_if=card_fetch_succeeded)
+        render_place_cards(new_places, card_futures, deadline, first_idx=len(shown))
+        shown.update(place["place_id"] for place in new_places)
+        added += len(new_places)
+        
+        if not pending or len(shown) >= limit:
+            break
+        status.info("🔎 Deep search: checking more result pages...")
+        wait(pending, timeout=1, return_when=FIRST_COMPLETED)
     
-    # Limit to top 3 results after filtering
-    return places[:3]
+    status.empty()
+    return added
 
 # --- Streamlit UI ---
 
@@ -1417,6 +2157,7 @@ st.markdown("### Filter Options")
 premium_price_filter = None
 premium_distance_filter = None
 min_rating = 0  # Default for free users - no rating filter
+deep_search = False
 
 if has_premium_access():
     st.markdown("#### 🌟 Premium Filters")
@@ -1435,6 +2176,11 @@ if has_premium_access():
         value=5.0,
         step=0.5
     )
+    
+    deep_search = st.checkbox(
+        "🔎 Deep search (check more result pages)",
+        help="Keeps looking past the first page of results and adds extra matches as they load"
+    )
 else:
     st.info("🔒 **Premium Feature:** Unlock advanced filters including star rating, price range, and distance controls with Premium!")
 
@@ -1492,7 +2238,8 @@ if st.button("Find Food") and craving:
     if not check_search_limits():
         st.stop()
     
-    keywords = [craving.strip()]
+    keywords = craving_keywords(craving)
+    search_popularity.record(location, craving.strip())
     st.write(f"### Searching for: {craving.strip()}")
     
     # Show filter info
@@ -1502,84 +2249,19 @@ if st.button("Find Food") and craving:
     with st.spinner("Searching for places..."):
         # Pass premium filters to search function
         premium_filters = st.session_state.get('premium_filters', {}) if has_premium_access() else None
-        places = search_food_places(location, keywords, min_rating, premium_filters)
+        search_results = get_search_results(location, keywords, min_rating, premium_filters)
+        places = search_results["places"]
 
     if places:
         st.success(f"Found {len(places)} suggestion(s)!")
         
-        for idx, place in enumerate(places):
-            st.markdown(f"## {place['name']}")
-            
-            # Basic info for all users
-            rating_display = f"⭐ {place.get('rating', 'N/A')}"
-            
-            # Premium users get detailed analytics including distance
-            if has_premium_access():
-                price_level = place.get('price_level', 0)
-                price_display = "$" * max(1, price_level) if price_level > 0 else "$ (Budget-friendly)"
-                st.markdown(f"""
-                **Premium Analytics:**
-                - **Rating:** {rating_display} 
-                - **Price Level:** {price_display}
-                - **Distance:** {place.get('distance', 'N/A')}
-                - **Address:** {place['address']}
-                - **Popularity Rank:** #{idx + 1} in search results
-                """)
-            else:
-                st.markdown(f"{rating_display}\n\n📍 {place['address']}")
-            
-            st.markdown(f"[🔗 View on Google Maps]({place['url']})")
-
-            # Get place details
-            details = get_place_details(place['place_id'])
-            result = details.get("result", {})
+        # Details and summaries for every card are fetched concurrently; all cards fill in together
+        render_place_cards(places, search_results["cards"], search_results["deadline"])
+    
+    # Deep search keeps adding matches from later result pages as they load
+    extra_places = render_deep_search_results(search_results, min_rating, premium_filters) if deep_search else 0
 
-            if "reviews" in result:
-                reviews = result["reviews"]
-                try:
-                    with st.spinner("🤖 Generating AI summary from reviews..."):
-                        summary = summarize_reviews_and_dishes(reviews)
-                    if summary:
-                        st.markdown(f"""**What people say:**  
-                    {summary}""")
-                except Exception as e:
-                    # If summarization fails, show a simple fallback
-                    st.markdown(f"""**What people say:**  
-                    This restaurant has {len(reviews)} customer reviews. Check individual reviews below for detailed feedback about food quality, service, and atmosphere.""")
-                
-                # Premium users get detailed review analytics
-                if has_premium_access() and reviews:
-                    with st.expander("📊 Premium Review Analytics"):
-                        total_reviews = len(reviews)
-                        avg_rating = sum(r.get('rating', 0) for r in reviews) / len(reviews) if reviews else 0
-                        recent_reviews = [r for r in reviews if 'time' in r]
-                        
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.metric("Total Reviews", total_reviews)
-                        with col2:
-                            st.metric("Avg Rating", f"{avg_rating:.1f}⭐")
-                        with col3:
-                            st.metric("Recent Activity", f"{len(recent_reviews)} recent")
-                        
-                        # Sentiment analysis
-                        positive_words = sum(1 for r in reviews if any(word in r.get('text', '').lower() 
-                                           for word in ['great', 'excellent', 'amazing', 'love', 'perfect', 'delicious']))
-                        sentiment_score = positive_words / len(reviews) * 100 if reviews else 0
-                        st.progress(sentiment_score / 100)
-                        st.write(f"Positive Sentiment: {sentiment_score:.0f}%")
-
-            if "photos" in result:
-                st.markdown("**Reviewer-uploaded photos (not dish-specific):**")
-                photo_urls = get_place_photos(result["photos"])
-                cols = st.columns(3)
-                for idx_photo, url in enumerate(photo_urls):
-                    with cols[idx_photo % 3]:
-                        st.image(url, use_container_width=True)
-            
-            # Add some spacing between results
-            st.write("")
-    else:
+    if not places and not extra_places:
         if min_rating > 0:
             st.warning(f"No places found with {min_rating}+ star rating. Try lowering the rating filter, rephrasing your craving, or changing your location.")
         else:
@@ -1941,6 +2623,9 @@ if not st.session_state.user_premium:
                     'premium_since': usage_data.get('premium_since'),
                     'user_id': user_id
                 })
+                if postgres_db is not None and get_user_email():
+                    # save_user_data leaves the PostgreSQL count to update_search_count
+                    postgres_db.update_user(get_user_email(), monthly_searches=0)
                 st.success("🔄 Search counter reset to 0!")
                 st.rerun()
             elif promo_code == "viewlogs":
@@ -2145,6 +2830,31 @@ if not st.session_state.user_premium:
                     for activity in spam_stats['activity_breakdown']:
                         st.write(f"• **{activity['activity_type']}**: {activity['count']} times")
                 
+                # LLM model health (circuit breakers + latency)
+                st.markdown("### 🤖 LLM Model Health")
+                scoreboard = model_router.scoreboard()
+                if scoreboard:
+                    st.dataframe(scoreboard, use_container_width=True)
+                    st.caption(f"Routing order: {' → '.join(model_router.order(models, claim_probes=False)) or 'none (all circuits open)'}")
+                else:
+                    st.write("No LLM calls recorded yet.")
+                
+                # LLM telemetry: latency percentiles, tokens and cost per model per hour
+                st.markdown("### 📈 LLM Usage (last 24h)")
+                usage_report = llm_telemetry.hourly_report(hours=24)
+                if usage_report:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("LLM Calls", sum(row['calls'] for row in usage_report))
+                    with col2:
+                        st.metric("Tokens", sum(row['prompt_tokens'] + row['completion_tokens'] for row in usage_report))
+                    with col3:
+                        st.metric("Estimated Cost", f"${sum(row['cost_usd'] for row in usage_report):.4f}")
+                    st.dataframe(usage_report, use_container_width=True)
+                    st.caption("Latency percentiles are histogram bucket upper bounds over successful calls.")
+                else:
+                    st.write("No LLM usage recorded in the last 24 hours.")
+                
                 # Manual backup option
                 if st.button("🔄 Create Manual Backup"):
                     backup_file = simple_file_backup()
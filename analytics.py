@@ -1,7 +1,14 @@
 # Simple analytics tracking for CraveMap
+import sqlite3
 import json
+import time
+import threading
 from datetime import datetime
 import os
+from sqlite_connections import sqlite_connection
+
+# Location/craving pairs not searched for this long are dropped from the popularity counts
+POPULAR_SEARCH_MAX_AGE_DAYS = 30
 
 def log_search_event(location, cuisine_type, user_type="anonymous"):
     """Log search events for basic analytics"""
@@ -36,3 +43,105 @@ def get_analytics_summary():
             return json.load(f)
     except:
         return {"total_searches": 0, "searches_by_date": {}, "popular_cuisines": {}}
+
+def normalize_search_term(text):
+    """Lowercase and collapse whitespace so 'Orchard Road ' and 'orchard road' count together"""
+    return " ".join((text or "").lower().split())
+
+class SearchPopularity:
+    """Searches per (location, craving), for the off-peak cache warm-up
+
+    One small UPSERT per search in SQLite. Pairs not searched for
+    POPULAR_SEARCH_MAX_AGE_DAYS are pruned whenever the warm-up reads the
+    counts, so the table only holds what people have searched recently.
+    """
+
+    def __init__(self, db_path="cravemap.db", max_age_days=POPULAR_SEARCH_MAX_AGE_DAYS):
+        self.db_path = db_path
+        self.max_age_days = max_age_days
+        self.init_tables()
+
+    def init_tables(self):
+        """Initialize search popularity table"""
+        with sqlite_connection(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS search_popularity (
+                    location TEXT NOT NULL,
+                    craving TEXT NOT NULL,
+                    searches INTEGER DEFAULT 0,
+                    last_searched REAL,
+                    PRIMARY KEY (location, craving)
+                )
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_search_popularity_last_searched
+                ON search_popularity (last_searched)
+            ''')
+            conn.commit()
+
+    def record(self, location, craving, at=None):
+        """Count one search of craving in location"""
+        location_key = normalize_search_term(location)
+        craving_key = normalize_search_term(craving)
+        if not location_key or not craving_key:
+            return
+        try:
+            with sqlite_connection(self.db_path) as conn:
+                conn.execute('''
+                    INSERT INTO search_popularity (location, craving, searches, last_searched)
+                    VALUES (?, ?, 1, ?)
+                    ON CONFLICT(location, craving) DO UPDATE SET
+                        searches = searches + 1,
+                        last_searched = excluded.last_searched
+                ''', (location_key, craving_key, at or time.time()))
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Search popularity write failed: {e}")
+
+    def prune(self):
+        """Delete pairs not searched within max_age_days; returns how many were removed"""
+        cutoff = time.time() - self.max_age_days * 24 * 60 * 60
+        with sqlite_connection(self.db_path) as conn:
+            removed = conn.execute("DELETE FROM search_popularity WHERE last_searched < ?", (cutoff,)).rowcount
+            conn.commit()
+        return removed
+
+    def popular(self, top_locations=5, top_cravings=3, min_searches=2):
+        """Top cravings for the most searched locations, as [(location, craving)] most popular first
+
+        Only (location, craving) pairs searched at least min_searches times are returned.
+        """
+        try:
+            self.prune()
+            with sqlite_connection(self.db_path) as conn:
+                rows = conn.execute('''
+                    SELECT location, craving, searches FROM search_popularity
+                    WHERE location IN (
+                        SELECT location FROM search_popularity
+                        GROUP BY location ORDER BY SUM(searches) DESC LIMIT ?
+                    )
+                    ORDER BY location, searches DESC
+                ''', (top_locations,)).fetchall()
+        except sqlite3.Error as e:
+            print(f"⚠️ Search popularity read failed: {e}")
+            return []
+        
+        searches = []
+        per_location = {}
+        for location, craving, count in rows:
+            per_location[location] = per_location.get(location, 0) + 1
+            if per_location[location] <= top_cravings and count >= min_searches:
+                searches.append((location, craving, count))
+        return [(location, craving) for location, craving, _ in sorted(searches, key=lambda item: -item[2])]
+
+# Global instance
+search_popularity = None
+_instance_lock = threading.Lock()
+
+def get_search_popularity():
+    """Get the process-wide search popularity counts"""
+    global search_popularity
+    with _instance_lock:
+        if search_popularity is None:
+            search_popularity = SearchPopularity()
+    return search_popularity
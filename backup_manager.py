@@ -1,9 +1,9 @@
 import os
 import json
-import sqlite3
 from datetime import datetime
 import requests
 import streamlit as st
+from sqlite_connections import close_thread_connections, invalidate_connections, sqlite_connection
 
 class BackupManager:
     def __init__(self, db_path="cravemap.db"):
@@ -14,26 +14,23 @@ class BackupManager:
         if not os.path.exists(self.db_path):
             return None
             
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        
         backup_data = {
             "backup_timestamp": datetime.now().isoformat(),
             "tables": {}
         }
         
-        # Get all tables
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
-        
-        for table in tables:
-            table_name = table[0]
-            cursor.execute(f"SELECT * FROM {table_name}")
-            rows = cursor.fetchall()
-            backup_data["tables"][table_name] = [dict(row) for row in rows]
+        with sqlite_connection(self.db_path) as conn:
+            # Get all tables
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+            tables = cursor.fetchall()
+            
+            for table in tables:
+                table_name = table[0]
+                cursor.execute(f"SELECT * FROM {table_name}")
+                rows = cursor.fetchall()
+                backup_data["tables"][table_name] = [dict(row) for row in rows]
         
-        conn.close()
         return backup_data
     
     def save_backup_to_github_gist(self, backup_data, github_token=None):
@@ -68,41 +65,42 @@ class BackupManager:
         if not backup_data or "tables" not in backup_data:
             return False
             
-        # Remove existing database
-        if os.path.exists(self.db_path):
-            os.remove(self.db_path)
+        # Remove existing database (and its WAL files); other threads reconnect on next use
+        close_thread_connections(self.db_path)
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+        invalidate_connections(self.db_path)
         
         # Recreate database with backup data
-        conn = sqlite3.connect(self.db_path)
-        
-        # Create tables and insert data
-        for table_name, rows in backup_data["tables"].items():
-            if not rows:
-                continue
+        with sqlite_connection(self.db_path) as conn:
+            # Create tables and insert data
+            for table_name, rows in backup_data["tables"].items():
+                if not rows:
+                    continue
+                    
+                # Create table based on first row structure
+                first_row = rows[0]
+                columns = []
+                for key, value in first_row.items():
+                    if isinstance(value, int):
+                        columns.append(f"{key} INTEGER")
+                    elif isinstance(value, float):
+                        columns.append(f"{key} REAL")
+                    else:
+                        columns.append(f"{key} TEXT")
                 
-            # Create table based on first row structure
-            first_row = rows[0]
-            columns = []
-            for key, value in first_row.items():
-                if isinstance(value, int):
-                    columns.append(f"{key} INTEGER")
-                elif isinstance(value, float):
-                    columns.append(f"{key} REAL")
-                else:
-                    columns.append(f"{key} TEXT")
-            
-            create_sql = f"CREATE TABLE {table_name} ({', '.join(columns)})"
-            conn.execute(create_sql)
-            
-            # Insert data
-            placeholders = ', '.join(['?' for _ in first_row.keys()])
-            insert_sql = f"INSERT INTO {table_name} VALUES ({placeholders})"
+                create_sql = f"CREATE TABLE {table_name} ({', '.join(columns)})"
+                conn.execute(create_sql)
+                
+                # Insert data
+                placeholders = ', '.join(['?' for _ in first_row.keys()])
+                insert_sql = f"INSERT INTO {table_name} VALUES ({placeholders})"
+                
+                for row in rows:
+                    conn.execute(insert_sql, list(row.values()))
             
-            for row in rows:
-                conn.execute(insert_sql, list(row.values()))
-        
-        conn.commit()
-        conn.close()
+            conn.commit()
         return True
     
     def auto_backup_on_startup(self):
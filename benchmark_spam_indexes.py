@@ -0,0 +1,127 @@
+"""
+Benchmark for the spam protection indexes
+Builds a suspicious_activity table in the pre-epoch schema (ISO TEXT
+timestamps, no indexes), times the SpamProtection range queries, runs the
+epoch migration and times them again, printing both query plans.
+
+    python benchmark_spam_indexes.py [rows]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from spam_protection import SpamProtection, to_epoch
+from sqlite_connections import close_thread_connections, sqlite_connection
+
+ROWS = 1_000_000
+FINGERPRINTS = 20_000
+RUNS = 20
+
+ACTIVITY_TYPES = ["rate_limit_exceeded_1h", "rate_limit_exceeded_24h", "spam_pattern", "bot_behavior"]
+SEVERITIES = ["low", "medium", "high"]
+
+# (name, query on ISO text, query on epoch columns)
+QUERIES = [
+    ("bot detection (one fingerprint, last hour)",
+     "SELECT timestamp FROM suspicious_activity WHERE fingerprint = ? AND timestamp > ? "
+     "ORDER BY timestamp DESC LIMIT 5",
+     "SELECT timestamp FROM suspicious_activity WHERE fingerprint = ? AND ts_epoch > ? "
+     "ORDER BY ts_epoch DESC LIMIT 5"),
+    ("admin stats (high severity, last 24h)",
+     "SELECT COUNT(*) FROM suspicious_activity WHERE timestamp > ? AND severity = 'high'",
+     "SELECT COUNT(*) FROM suspicious_activity WHERE ts_epoch > ? AND severity = 'high'"),
+    ("admin stats (by type, last 24h)",
+     "SELECT activity_type, COUNT(*) FROM suspicious_activity WHERE timestamp > ? GROUP BY activity_type",
+     "SELECT activity_type, COUNT(*) FROM suspicious_activity WHERE ts_epoch > ? GROUP BY activity_type"),
+]
+
+def build_legacy_db(db_path, rows):
+    """Fill the old schema with `rows` activities spread over the last 30 days"""
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE suspicious_activity (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fingerprint TEXT,
+            activity_type TEXT,
+            details TEXT,
+            severity TEXT,
+            timestamp TEXT,
+            ip_address TEXT,
+            user_agent TEXT
+        )
+    ''')
+    now = datetime.now()
+    rng = random.Random(42)
+    batch = []
+    for _ in range(rows):
+        when = now - timedelta(seconds=rng.randrange(30 * 24 * 3600))
+        batch.append((f"fp{rng.randrange(FINGERPRINTS)}", rng.choice(ACTIVITY_TYPES), "benchmark",
+                      rng.choice(SEVERITIES), when.isoformat(), "127.0.0.1", "bench"))
+        if len(batch) == 50_000:
+            conn.executemany(
+                "INSERT INTO suspicious_activity (fingerprint, activity_type, details, severity, "
+                "timestamp, ip_address, user_agent) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        conn.executemany(
+            "INSERT INTO suspicious_activity (fingerprint, activity_type, details, severity, "
+            "timestamp, ip_address, user_agent) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    conn.close()
+
+def params_for(name, epoch):
+    now = datetime.now()
+    hour_ago, day_ago = now - timedelta(hours=1), now - timedelta(days=1)
+    convert = to_epoch if epoch else datetime.isoformat
+    if name.startswith("bot detection"):
+        return ("fp7", convert(hour_ago))
+    return (convert(day_ago),)
+
+def run_queries(conn, epoch):
+    results = {}
+    for name, text_sql, epoch_sql in QUERIES:
+        sql = epoch_sql if epoch else text_sql
+        params = params_for(name, epoch)
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        start = time.perf_counter()
+        for _ in range(RUNS):
+            conn.execute(sql, params).fetchall()
+        elapsed_ms = (time.perf_counter() - start) / RUNS * 1000
+        results[name] = (plan, elapsed_ms)
+    return results
+
+def main(rows=ROWS):
+    db_path = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    try:
+        print(f"🔄 Building {rows:,} suspicious_activity rows...")
+        build_legacy_db(db_path, rows)
+
+        with sqlite_connection(db_path) as conn:
+            before = run_queries(conn, epoch=False)
+
+        start = time.perf_counter()
+        SpamProtection(db_path)
+        print(f"✅ Migration (backfill + indexes) took {time.perf_counter() - start:.1f}s")
+
+        with sqlite_connection(db_path) as conn:
+            after = run_queries(conn, epoch=True)
+
+        for name, _, _ in QUERIES:
+            plan_before, ms_before = before[name]
+            plan_after, ms_after = after[name]
+            print(f"\n📊 {name}")
+            print(f"   before: {ms_before:9.2f} ms  | {' / '.join(plan_before)}")
+            print(f"   after:  {ms_after:9.2f} ms  | {' / '.join(plan_after)}")
+            print(f"   speedup: {ms_before / max(ms_after, 1e-6):.0f}x")
+    finally:
+        close_thread_connections(db_path)
+        for path in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(path):
+                os.unlink(path)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else ROWS)
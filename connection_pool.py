@@ -0,0 +1,174 @@
+"""
+Connection pooling for CraveMap
+A small thread-safe pool for DB-API connections (used for the hosted
+Postgres): connections are reused across calls and Streamlit sessions,
+checked before reuse, and closed again once they sit idle
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+class PoolTimeout(Exception):
+    """Raised when no connection frees up within checkout_timeout"""
+
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = self.last_used = time.time()
+
+class ConnectionPool:
+    """Thread-safe pool of connections made by connect()
+
+    - Up to max_size connections are open at once; callers beyond that wait
+      up to checkout_timeout for one to be returned.
+    - A connection idle for more than health_check_after seconds is pinged
+      with SELECT 1 on checkout and replaced if the ping fails.
+    - Connections idle for more than max_idle_seconds (beyond min_size) or
+      older than max_lifetime_seconds are closed instead of reused.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, max_idle_seconds=300,
+                 max_lifetime_seconds=1800, health_check_after=30, checkout_timeout=10):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self.max_lifetime_seconds = max_lifetime_seconds
+        self.health_check_after = health_check_after
+        self.checkout_timeout = checkout_timeout
+        self._idle = deque()  # Most recently returned on the right
+        self._size = 0  # Open connections, idle + checked out
+        self._cond = threading.Condition()
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def _close(self, entry):
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+
+    def _expired(self, entry, now):
+        return now - entry.created_at > self.max_lifetime_seconds
+
+    def _recycle_idle(self, now):
+        """Close idle connections past their idle/lifetime limits (call with the lock held)"""
+        kept = deque()
+        for entry in self._idle:
+            too_idle = now - entry.last_used > self.max_idle_seconds and self._size > self.min_size
+            if too_idle or self._expired(entry, now):
+                self._close(entry)
+                self._size -= 1
+                self.discarded += 1
+            else:
+                kept.append(entry)
+        self._idle = kept
+
+    def _is_healthy(self, entry, now):
+        if getattr(entry.conn, "closed", False):
+            return False
+        if now - entry.last_used < self.health_check_after:
+            return True
+        try:
+            cursor = entry.conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            entry.conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, entry):
+        self._close(entry)
+        with self._cond:
+            self._size -= 1
+            self.discarded += 1
+            self._cond.notify()
+
+    def checkout(self):
+        """Get a healthy connection, opening one if the pool has room"""
+        deadline = time.time() + self.checkout_timeout
+        while True:
+            with self._cond:
+                while True:
+                    now = time.time()
+                    self._recycle_idle(now)
+                    if self._idle:
+                        entry = self._idle.pop()  # Warmest connection first
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        entry = None
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise PoolTimeout(f"No database connection free after {self.checkout_timeout}s")
+                    self._cond.wait(remaining)
+
+            if entry is None:
+                try:
+                    entry = _PooledConnection(self._connect())
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                self.created += 1
+                return entry
+
+            if self._is_healthy(entry, time.time()):
+                self.reused += 1
+                return entry
+            self._discard(entry)
+
+    def checkin(self, entry, broken=False):
+        """Return a connection; broken or expired connections are closed instead"""
+        if not broken and not getattr(entry.conn, "closed", False):
+            try:
+                entry.conn.rollback()  # Never hand out a connection mid-transaction
+            except Exception:
+                broken = True
+        if broken or getattr(entry.conn, "closed", False) or self._expired(entry, time.time()):
+            self._discard(entry)
+            return
+        entry.last_used = time.time()
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and always returns it"""
+        entry = self.checkout()
+        try:
+            yield entry.conn
+        except Exception:
+            self.checkin(entry, broken=bool(getattr(entry.conn, "closed", False)))
+            raise
+        else:
+            self.checkin(entry)
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._cond:
+            for entry in self._idle:
+                self._close(entry)
+                self._size -= 1
+            self._idle.clear()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "open": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "created": self.created,
+                "reused": self.reused,
+                "discarded": self.discarded,
+            }
@@ -3,27 +3,20 @@ Database module for CraveMap - SQLite implementation
 Handles user data, premium subscriptions, and support tickets
 """
 
-import sqlite3
 import json
 import hashlib
 from datetime import datetime, timedelta
-from contextlib import contextmanager
 import os
+from sqlite_connections import sqlite_connection
 
 class CraveMapDB:
     def __init__(self, db_path="cravemap.db"):
         self.db_path = db_path
         self.init_database()
     
-    @contextmanager
     def get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Enable dict-like access
-        try:
-            yield conn
-        finally:
-            conn.close()
+        """Context manager for this thread's persistent connection (WAL, dict-like rows)"""
+        return sqlite_connection(self.db_path)
     
     def init_database(self):
         """Initialize database tables"""
@@ -96,6 +89,9 @@ class CraveMapDB:
                     conn.execute('ALTER TABLE users ADD COLUMN promo_activation TEXT')
                     print("✅ Added promo_activation column")
                 
+                # Stripe webhooks and email logins look users up by email
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_users_email ON users (email)')
+                
                 conn.commit()
         except Exception as e:
             print(f"Migration note: {e}")
@@ -214,33 +210,43 @@ class CraveMapDB:
                     'last_updated': datetime.now().isoformat()
                 }
     
-    def update_search_count(self, user_id, increment=1):
-        """Update user's search count"""
-        user = self.get_user(user_id)
-        
-        # Check if we need to reset monthly count
-        last_reset = datetime.fromisoformat(user['last_search_reset'])
-        now = datetime.now()
-        
-        if last_reset.month != now.month or last_reset.year != now.year:
-            # Reset monthly count
-            new_count = increment
-            reset_time = now.isoformat()
-        else:
-            new_count = user['monthly_searches'] + increment
-            reset_time = user['last_search_reset']
+    def update_search_count(self, user_id, increment=1, limit=None):
+        """Atomically add to the user's monthly search count and return the new count
+
+        One UPSERT statement: a missing user is created, and a count last reset
+        in an earlier month starts over from increment. Concurrent searches
+        from several tabs can't lose an update. With a limit, the search is
+        only counted if the new count stays within it; otherwise nothing
+        changes and None is returned.
+        """
+        now = datetime.now().isoformat()
         
-        self.save_user(
-            user_id=user_id,
-            email=user['email'],
-            is_premium=user['is_premium'],
-            payment_completed=user['payment_completed'],
-            stripe_customer_id=user['stripe_customer_id'],
-            monthly_searches=new_count,
-            last_search_reset=reset_time
-        )
+        with self.get_connection() as conn:
+            row = conn.execute('''
+                INSERT INTO users (user_id, email, monthly_searches, last_search_reset, created_at, last_updated)
+                VALUES (:user_id, '', :increment, :now, :now, :now)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    monthly_searches = CASE
+                        WHEN substr(users.last_search_reset, 1, 7) = substr(:now, 1, 7)
+                        THEN COALESCE(users.monthly_searches, 0) + :increment
+                        ELSE :increment
+                    END,
+                    last_search_reset = CASE
+                        WHEN substr(users.last_search_reset, 1, 7) = substr(:now, 1, 7)
+                        THEN users.last_search_reset
+                        ELSE :now
+                    END,
+                    last_updated = :now
+                WHERE :limit IS NULL OR CASE
+                    WHEN substr(users.last_search_reset, 1, 7) = substr(:now, 1, 7)
+                    THEN COALESCE(users.monthly_searches, 0) + :increment
+                    ELSE :increment
+                END <= :limit
+                RETURNING monthly_searches
+            ''', {"user_id": user_id, "increment": increment, "now": now, "limit": limit}).fetchone()
+            conn.commit()
         
-        return new_count
+        return row[0] if row else None
     
     def save_support_ticket(self, user_id, user_email, support_type, subject, message, created_at=None):
         """Save support ticket"""
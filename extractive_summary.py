@@ -0,0 +1,92 @@
+"""
+Offline extractive summaries for CraveMap
+Picks the most representative review sentences with a vectorized TF-IDF pass
+and counts dish mentions against the food lexicon - no network, no model,
+so it can answer instantly when the LLM chain is down or too slow
+"""
+
+import re
+from collections import Counter
+import numpy as np
+from food_lexicon import find_dishes, food_score
+from review_prompt import split_sentences
+
+_WORD = re.compile(r"[a-z']+")
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "if", "of", "to", "in", "on", "at", "for", "with", "is",
+    "was", "were", "are", "be", "been", "it", "its", "this", "that", "these", "those", "i", "we",
+    "you", "they", "he", "she", "my", "our", "your", "their", "me", "us", "them", "so", "very",
+    "really", "just", "also", "too", "here", "there", "had", "has", "have", "do", "did", "not",
+    "no", "as", "by", "from", "up", "out", "about", "than", "then", "which", "what", "when", "all",
+    "would", "will", "can", "could", "got", "get", "one", "place", "restaurant", "food",
+}
+
+def _tokens(text):
+    return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+def top_dishes(review_texts, limit=2):
+    """Most mentioned dishes, counted once per review that mentions them"""
+    counts = Counter()
+    for text in review_texts:
+        dishes = set(find_dishes(text))
+        # Drop a phrase contained in a longer one from the same review ("rice" in "chicken rice")
+        counts.update(d for d in dishes if not any(d != other and d in other for other in dishes))
+    return [dish for dish, _ in counts.most_common(limit)]
+
+def representative_sentences(review_texts, limit=2, min_words=5, max_words=40):
+    """The sentences closest to the reviews' TF-IDF centroid, boosted for food content
+
+    Returns up to `limit` sentences in their original order, skipping ones that
+    repeat an already chosen sentence.
+    """
+    sentences = []
+    for text in review_texts:
+        for sentence in split_sentences(text):
+            if min_words <= len(sentence.split()) <= max_words:
+                sentences.append(sentence)
+    if not sentences:
+        return []
+
+    docs = [_tokens(s) for s in sentences]
+    vocab = {word: i for i, word in enumerate(sorted({w for doc in docs for w in doc}))}
+    if not vocab:
+        return sentences[:limit]
+
+    # Term counts -> TF-IDF rows, all in one matrix
+    tf = np.zeros((len(docs), len(vocab)))
+    for row, doc in enumerate(docs):
+        for word in doc:
+            tf[row, vocab[word]] += 1
+    df = np.count_nonzero(tf, axis=0)
+    tfidf = tf * (np.log((1 + len(docs)) / (1 + df)) + 1)
+    norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    tfidf = np.divide(tfidf, norms, out=np.zeros_like(tfidf), where=norms > 0)
+
+    centroid = tfidf.mean(axis=0)
+    centrality = tfidf @ centroid
+    food = np.array([food_score(s) for s in sentences], dtype=float)
+    scores = centrality * (1 + 0.5 * np.minimum(food, 4))
+
+    chosen = []
+    for index in np.argsort(-scores):
+        # Skip near-repeats of a sentence we already picked
+        if any(tfidf[index] @ tfidf[other] > 0.6 for other in chosen):
+            continue
+        chosen.append(index)
+        if len(chosen) == limit:
+            break
+    return [sentences[i] for i in sorted(chosen)]
+
+def extractive_summary(review_texts, sentence_limit=2, dish_limit=2):
+    """Summary from the reviews themselves: representative sentences + top dishes ('' if none)"""
+    texts = [t for t in review_texts if t and t.strip()]
+    sentences = representative_sentences(texts, sentence_limit)
+    dishes = top_dishes(texts, dish_limit)
+
+    parts = []
+    if sentences:
+        parts.append(" ".join(f"“{s}”" for s in sentences))
+    if dishes:
+        parts.append("Most mentioned: " + ", ".join(dishes) + ".")
+    return " ".join(parts)
@@ -0,0 +1,50 @@
+"""
+Food lexicon for CraveMap
+Dish and ingredient terms used to spot dish-bearing review sentences
+"""
+
+import re
+
+# Multi-word dishes are matched as phrases; keep them lowercase
+DISH_PHRASES = {
+    "chicken rice", "hainanese chicken rice", "chilli crab", "chili crab", "black pepper crab",
+    "bak kut teh", "char kway teow", "nasi lemak", "laksa", "hokkien mee", "fish soup",
+    "wonton mee", "wanton mee", "fish ball noodles", "bak chor mee", "carrot cake", "chwee kueh",
+    "roti prata", "murtabak", "mee goreng", "nasi goreng", "satay", "kaya toast", "mee rebus",
+    "mee siam", "oyster omelette", "duck rice", "roast duck", "char siu", "roast pork",
+    "xiao long bao", "dim sum", "har gow", "siew mai", "fried rice", "egg tart", "pad thai",
+    "tom yum", "green curry", "fish head curry", "butter chicken", "biryani", "naan",
+    "tonkotsu", "ramen", "udon", "soba", "sushi", "sashimi", "tempura", "katsu", "donburi",
+    "bibimbap", "kimchi", "bulgogi", "fried chicken", "korean fried chicken", "pho", "banh mi",
+    "pizza", "pasta", "carbonara", "lasagna", "risotto", "burger", "cheeseburger", "steak",
+    "fish and chips", "tacos", "burrito", "nachos", "fries", "mac and cheese", "hot pot",
+    "mala", "dumplings", "bao", "noodles", "curry", "croissant", "cheesecake", "tiramisu",
+    "gelato", "ice cream", "bubble tea", "milk tea", "coffee", "latte", "brownie", "waffles",
+    "pancakes", "eggs benedict", "salad", "poke bowl", "brisket", "ribs", "wings",
+}
+
+# Single words that make a sentence food-related even without a known dish
+FOOD_WORDS = {
+    "rice", "noodle", "noodles", "soup", "broth", "chicken", "beef", "pork", "duck", "lamb",
+    "mutton", "fish", "prawn", "prawns", "shrimp", "crab", "lobster", "oyster", "oysters",
+    "squid", "salmon", "tuna", "tofu", "egg", "eggs", "dessert", "cake", "bread", "sauce",
+    "gravy", "chilli", "chili", "spicy", "sambal", "curry", "dish", "dishes", "menu", "portion",
+    "portions", "flavour", "flavor", "flavourful", "flavorful", "tender", "crispy", "juicy",
+    "savoury", "savory", "sweet", "fried", "grilled", "roasted", "steamed", "braised", "dumpling",
+    "dumplings", "bun", "buns", "cheese", "meat", "seafood", "vegetables", "veggies", "drink",
+    "drinks", "tea", "coffee", "taste", "tasty", "delicious", "signature", "specialty", "order",
+}
+
+_WORD = re.compile(r"[a-z']+")
+_PHRASE_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(p) for p in sorted(DISH_PHRASES, key=len, reverse=True)) + r")\b"
+)
+
+def find_dishes(text):
+    """Known dish phrases mentioned in text (longest match first, lowercase)"""
+    return _PHRASE_PATTERN.findall((text or "").lower())
+
+def food_score(text):
+    """How food-focused a piece of text is: dish mentions count double, food words once"""
+    lowered = (text or "").lower()
+    return 2 * len(find_dishes(lowered)) + sum(1 for word in _WORD.findall(lowered) if word in FOOD_WORDS)
@@ -0,0 +1,67 @@
+"""
+Distance engine for CraveMap
+Scalar and vectorized (NumPy) haversine distances, with a cheap lat/lng
+bounding-box prefilter so far-away candidates skip the trig entirely
+"""
+
+import math
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 110.574  # Smallest value (at the equator), so the box is never too tight
+KM_PER_DEGREE_LNG_EQUATOR = 111.320
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Calculate distance between two points in kilometers using the Haversine formula"""
+    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+def bounding_box_mask(origin, lats, lngs, max_km):
+    """Boolean mask of points inside a lat/lng box that contains the max_km circle"""
+    lat0, lng0 = origin
+    dlat = max_km / KM_PER_DEGREE_LAT
+
+    # Longitude degrees shrink towards the poles - size the box for its most poleward edge
+    edge_lat = min(abs(lat0) + dlat, 89.9)
+    dlng = max_km / (KM_PER_DEGREE_LNG_EQUATOR * math.cos(math.radians(edge_lat)))
+
+    lng_diff = np.abs((lngs - lng0 + 180.0) % 360.0 - 180.0)  # Handles the antimeridian
+    return (np.abs(lats - lat0) <= dlat) & (lng_diff <= dlng)
+
+def batch_distances_km(origin, lats, lngs, max_km=None):
+    """Distances in km from origin to every (lat, lng) in one vectorized pass
+
+    Returns a float array aligned with the inputs:
+    - NaN where a point has no coordinates (None/NaN)
+    - inf where a point is beyond max_km (box-prefiltered points never reach the trig)
+    """
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    distances = np.full(lats.shape, np.nan)
+
+    has_coords = ~(np.isnan(lats) | np.isnan(lngs))
+    candidates = has_coords
+    if max_km is not None:
+        in_box = np.zeros(lats.shape, dtype=bool)
+        in_box[has_coords] = bounding_box_mask(origin, lats[has_coords], lngs[has_coords], max_km)
+        distances[has_coords & ~in_box] = np.inf
+        candidates = has_coords & in_box
+
+    if candidates.any():
+        lat1 = math.radians(origin[0])
+        lat2 = np.radians(lats[candidates])
+        dlat = lat2 - lat1
+        dlng = np.radians(lngs[candidates] - origin[1])
+
+        a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+        result = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+        if max_km is not None:
+            result[result > max_km] = np.inf  # Box corners are outside the circle
+        distances[candidates] = result
+
+    return distances
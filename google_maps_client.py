@@ -0,0 +1,119 @@
+"""
+Google Maps HTTP client for CraveMap
+One pooled keep-alive session for all Places calls, with per-endpoint timeouts
+and jittered retries limited by a process-wide retry budget
+"""
+
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+PLACES_BASE_URL = "https://maps.googleapis.com/maps/api/place"
+
+# (connect, read) timeouts in seconds per Places endpoint
+ENDPOINT_TIMEOUTS = {
+    "findplacefromtext": (3.05, 5),
+    "textsearch": (3.05, 8),
+    "details": (3.05, 6),
+}
+DEFAULT_TIMEOUT = (3.05, 8)
+
+# HTTP statuses and Google API statuses worth retrying
+RETRYABLE_HTTP_STATUSES = {429, 500, 502, 503, 504}
+RETRYABLE_API_STATUSES = {"UNKNOWN_ERROR"}
+
+class GoogleMapsError(Exception):
+    """Raised when a Google Maps call fails after all allowed retries"""
+    pass
+
+class RetryBudget:
+    """Process-wide cap on retries, so an outage doesn't multiply our request volume
+
+    Every request deposits retry_ratio tokens (up to max_tokens); every retry
+    withdraws one. With the defaults, retries are limited to ~10% of traffic
+    plus a small reserve for quiet periods.
+    """
+
+    def __init__(self, retry_ratio=0.1, max_tokens=10, min_tokens=3):
+        self.retry_ratio = retry_ratio
+        self.max_tokens = max_tokens
+        self.tokens = float(min_tokens)
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.retry_ratio)
+
+    def try_spend(self):
+        """Take one retry token; False means the budget is exhausted"""
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+class GoogleMapsClient:
+    """Pooled keep-alive client for the Google Places web service"""
+
+    def __init__(self, api_key, max_retries=2, backoff_base=0.25, backoff_cap=2.0,
+                 pool_size=10, retry_budget=None):
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.retry_budget = retry_budget or RetryBudget()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip"})
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def get(self, endpoint, params):
+        """GET a Places endpoint (e.g. 'details') and return the decoded JSON"""
+        url = f"{PLACES_BASE_URL}/{endpoint}/json"
+        params = dict(params, key=self.api_key)
+        timeout = ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT)
+        self.retry_budget.record_request()
+
+        attempt = 0
+        while True:
+            error = None
+            try:
+                response = self.session.get(url, params=params, timeout=timeout)
+                if response.status_code in RETRYABLE_HTTP_STATUSES:
+                    error = f"HTTP {response.status_code}"
+                else:
+                    response.raise_for_status()
+                    data = response.json()
+                    if data.get("status") not in RETRYABLE_API_STATUSES:
+                        return data
+                    error = f"API status {data.get('status')}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+            except (requests.RequestException, ValueError) as e:
+                # 4xx or undecodable body - retrying won't help
+                raise GoogleMapsError(f"{endpoint} request failed: {e}")
+
+            if attempt >= self.max_retries or not self.retry_budget.try_spend():
+                raise GoogleMapsError(f"{endpoint} failed after {attempt + 1} attempt(s): {error}")
+            print(f"⚠️ Google {endpoint} attempt {attempt + 1} failed ({error}), retrying...")
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+# Global instance
+maps_client = None
+_instance_lock = threading.Lock()
+
+def get_maps_client(api_key):
+    """Get the process-wide Google Maps client"""
+    global maps_client
+    with _instance_lock:
+        if maps_client is None or maps_client.api_key != api_key:
+            maps_client = GoogleMapsClient(api_key)
+    return maps_client
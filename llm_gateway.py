@@ -0,0 +1,180 @@
+"""
+Async LLM gateway for CraveMap
+All OpenRouter calls in the process go through one AsyncOpenAI client on a
+background event loop, behind a process-wide concurrency semaphore and a
+token-bucket rate limiter. When either is saturated a call fails fast with
+LimiterSaturated so callers can serve cached or extractive summaries instead
+of queueing behind other sessions.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+class LimiterSaturated(Exception):
+    """Raised instead of waiting when the process-wide LLM limits are used up"""
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate_per_minute` refill, up to `burst` tokens saved"""
+
+    def __init__(self, rate_per_minute=20, burst=5):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_take(self, tokens=1):
+        """Take tokens if available; never waits"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    @property
+    def available(self):
+        with self._lock:
+            elapsed = time.monotonic() - self._updated
+            return min(self.capacity, self._tokens + elapsed * self.rate)
+
+class AsyncLLMGateway:
+    """Runs AsyncOpenAI chat completions on a private event loop thread
+
+    Sync callers (card and hedge worker threads) block only on their own
+    result; the network I/O of every session is multiplexed on one loop.
+    """
+
+    def __init__(self, client_factory, max_concurrency=8, requests_per_minute=20, burst=5,
+                 acquire_timeout=0.25):
+        self._client_factory = client_factory
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(requests_per_minute, burst)
+        self.acquire_timeout = acquire_timeout
+        self.in_flight = 0
+        self.rejected = 0
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                    self._client = self._client_factory()
+                    ready.set()
+                    loop.run_forever()
+
+                threading.Thread(target=run, name="cravemap-llm-loop", daemon=True).start()
+                ready.wait()
+                self._loop = loop
+        return self._loop
+
+    async def _acquire(self):
+        # Order matters: don't spend a rate token on a call that can't get a slot
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise LimiterSaturated(f"LLM limiter saturated: {self.max_concurrency} calls already in flight")
+        if not self.bucket.try_take():
+            self._semaphore.release()
+            self.rejected += 1
+            raise LimiterSaturated("LLM limiter saturated: request rate budget used up")
+        self.in_flight += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    @staticmethod
+    def _fill_usage(usage, reported):
+        if usage is not None and reported is not None:
+            usage["prompt_tokens"] = getattr(reported, "prompt_tokens", 0) or 0
+            usage["completion_tokens"] = getattr(reported, "completion_tokens", 0) or 0
+
+    async def _complete(self, model, messages, max_tokens, temperature, usage):
+        await self._acquire()
+        try:
+            response = await self._client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        finally:
+            self._release()
+        self._fill_usage(usage, getattr(response, "usage", None))
+        if getattr(response, "choices", None):
+            return (response.choices[0].message.content or "").strip()
+        return ""
+
+    async def _stream(self, model, messages, max_tokens, temperature, on_text, usage):
+        await self._acquire()
+        text = ""
+        try:
+            response = await self._client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            async for chunk in response:
+                # The usage totals arrive on a final chunk with no choices
+                self._fill_usage(usage, getattr(chunk, "usage", None))
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    text += delta
+                    on_text(text)
+        finally:
+            self._release()
+        return text
+
+    def _run(self, coroutine, timeout, cancel=None):
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop())
+        if cancel is not None:
+            # Cancelling the coroutine releases its concurrency slot at once
+            cancel.add_callback(future.cancel)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError("LLM call timed out")
+
+    def complete(self, model, messages, max_tokens=200, temperature=0.7, timeout=60, usage=None,
+                 cancel=None):
+        """Blocking chat completion; returns the answer text
+
+        If a usage dict is passed it receives the reported prompt_tokens and
+        completion_tokens. cancel (a llm_hedge.CancelToken) aborts the request
+        and raises CancelledError in the caller.
+        """
+        return self._run(self._complete(model, messages, max_tokens, temperature, usage), timeout, cancel)
+
+    def stream(self, model, messages, on_text, max_tokens=200, temperature=0.7, timeout=60, usage=None):
+        """Blocking streamed completion; on_text(text_so_far) is called from the loop thread"""
+        return self._run(self._stream(model, messages, max_tokens, temperature, on_text, usage), timeout)
+
+# Global instance
+llm_gateway = None
+_instance_lock = threading.Lock()
+
+def get_llm_gateway(client_factory, max_concurrency=8, requests_per_minute=20, burst=5):
+    """Get the process-wide LLM gateway (client_factory builds the AsyncOpenAI client once)"""
+    global llm_gateway
+    with _instance_lock:
+        if llm_gateway is None:
+            llm_gateway = AsyncLLMGateway(client_factory, max_concurrency, requests_per_minute, burst)
+    return llm_gateway
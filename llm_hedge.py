@@ -0,0 +1,226 @@
+"""
+Hedged LLM requests for CraveMap
+Races the configured models: if the current one hasn't answered within its p95
+latency, the next model is fired in parallel and the first valid answer wins
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+class LatencyTracker:
+    """Rolling per-model latency samples, used to pick each model's hedge delay"""
+
+    def __init__(self, window=50, min_samples=5):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def record(self, model, seconds):
+        with self._lock:
+            self._samples[model].append(seconds)
+
+    def record_failure(self, model, error):
+        """Failures don't produce a latency sample"""
+        pass
+
+    def percentile(self, model, pct):
+        """Latency percentile for model, or None until min_samples have been seen"""
+        with self._lock:
+            samples = sorted(self._samples[model])
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+class HedgeLimiter:
+    """Global cap on hedge requests in flight, so a slow provider can't multiply our load"""
+
+    def __init__(self, max_hedges=4):
+        self.max_hedges = max_hedges
+        self._semaphore = threading.BoundedSemaphore(max_hedges)
+        self.hedges_started = 0
+        self.hedges_denied = 0
+
+    def try_acquire(self):
+        if self._semaphore.acquire(blocking=False):
+            self.hedges_started += 1
+            return True
+        self.hedges_denied += 1
+        return False
+
+    def release(self):
+        self._semaphore.release()
+
+class CancelToken:
+    """Handed to each hedged call; cancel() aborts the call's in-flight request
+
+    A call registers how to abort its request with add_callback (the async
+    gateway cancels the coroutine, which frees its concurrency slot). Calls
+    that can't be interrupted simply ignore the token.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback):
+        """Run callback() on cancel - at once if already cancelled"""
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self):
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+class ModelsExhausted(Exception):
+    """Every model failed or returned an invalid answer; wraps the last error"""
+
+    def __init__(self, last_error):
+        super().__init__(str(last_error) if last_error else "No model returned a valid answer")
+        self.last_error = last_error
+
+class HedgedCaller:
+    """Call a list of models with hedging
+
+    The first model starts immediately. A model that fails hands over to the
+    next one at once; a model that is merely slow (past its hedge delay) gets
+    the next model raced alongside it, if the global hedge cap allows. The
+    first valid answer is returned and the losers are cancelled, whether
+    still queued or already running.
+    """
+
+    def __init__(self, executor, tracker=None, limiter=None, default_hedge_after=4.0,
+                 min_hedge_after=0.5, hedge_percentile=95):
+        self.executor = executor
+        self.tracker = tracker or LatencyTracker()
+        self.limiter = limiter or HedgeLimiter()
+        self.default_hedge_after = default_hedge_after
+        self.min_hedge_after = min_hedge_after
+        self.hedge_percentile = hedge_percentile
+
+    def hedge_after(self, model):
+        """Seconds to wait on model before racing the next one (its p95, once known)"""
+        observed = self.tracker.percentile(model, self.hedge_percentile)
+        if observed is None:
+            return self.default_hedge_after
+        return max(self.min_hedge_after, observed)
+
+    def _timed_call(self, call, model, cancel, is_valid):
+        started = time.time()
+        try:
+            result = call(model, cancel)
+        except Exception as e:
+            if not cancel.cancelled:  # A cancelled loser says nothing about the model
+                self.tracker.record_failure(model, e)
+            raise
+        if is_valid(result):
+            self.tracker.record(model, time.time() - started)
+        else:
+            self.tracker.record_failure(model, ValueError("invalid answer"))
+        return result
+
+    def call(self, models, call, is_valid=bool, timeout=60):
+        """Return (model, result) for the first valid call(model, cancel_token), or raise ModelsExhausted"""
+        remaining = list(models)
+        if not remaining:
+            raise ModelsExhausted(RuntimeError("No model available - every circuit breaker is open"))
+        running = {}  # future -> (model, started_at, is_hedge)
+        cancel_tokens = {}  # future -> CancelToken
+        last_error = None
+        deadline = time.time() + timeout
+
+        def launch(is_hedge):
+            model = remaining.pop(0)
+            cancel = CancelToken()
+            future = self.executor.submit(self._timed_call, call, model, cancel, is_valid)
+            if is_hedge:
+                future.add_done_callback(lambda _: self.limiter.release())
+            running[future] = (model, time.time(), is_hedge)
+            cancel_tokens[future] = cancel
+            return model
+
+        print(f"Trying model 1/{len(models)}: {remaining[0]}")
+        launch(False)
+        hedge_retry_at = None  # Set while the global hedge cap is full
+        try:
+            while running:
+                now = time.time()
+                if now >= deadline:
+                    break
+                # Wake up when the newest request is due a hedge (if there is a model left to race)
+                newest_model, newest_started, _ = max(running.values(), key=lambda item: item[1])
+                wait_for = deadline - now
+                if remaining:
+                    hedge_at = hedge_retry_at or newest_started + self.hedge_after(newest_model)
+                    wait_for = min(wait_for, max(0.0, hedge_at - now))
+                done, _ = wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                failed = False
+                for future in done:
+                    model, _, _ = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"❌ Model {model} failed: {str(e)}")
+                        last_error = e
+                        failed = True
+                        continue
+                    if is_valid(result):
+                        print(f"✅ Success with model: {model}")
+                        return model, result
+                    print(f"❌ Model {model} returned an invalid answer")
+                    failed = True
+
+                if not remaining:
+                    continue
+                if failed:
+                    # Plain failover - the next model replaces the one that failed
+                    print(f"Trying model {len(models) - len(remaining) + 1}/{len(models)}: {remaining[0]}")
+                    launch(False)
+                    hedge_retry_at = None
+                elif not done:
+                    if self.limiter.try_acquire():
+                        print(f"⏱️ {newest_model} is slow - hedging with {remaining[0]}")
+                        launch(True)
+                        hedge_retry_at = None
+                    else:
+                        hedge_retry_at = time.time() + 0.25
+        finally:
+            for future in running:
+                future.cancel()  # Queued losers never start
+                cancel_tokens[future].cancel()  # Running ones abort their request
+
+        raise ModelsExhausted(last_error or (TimeoutError("LLM call timed out") if running else None))
+
+# Global instances
+llm_executor = None
+hedged_caller = None
+_instance_lock = threading.Lock()
+
+def get_hedged_caller(default_hedge_after=4.0, max_hedges=4, max_workers=16, tracker=None):
+    """Get the process-wide hedged caller and its worker pool
+
+    tracker receives every call outcome and supplies the p95 hedge delays
+    (a LatencyTracker by default; the model router in the app).
+    """
+    global llm_executor, hedged_caller
+    with _instance_lock:
+        if hedged_caller is None:
+            llm_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cravemap-llm")
+            hedged_caller = HedgedCaller(
+                llm_executor, tracker=tracker, limiter=HedgeLimiter(max_hedges),
+                default_hedge_after=default_hedge_after
+            )
+    return hedged_caller
@@ -0,0 +1,208 @@
+"""
+LLM telemetry for CraveMap
+Records every completion attempt (model, latency, tokens, outcome, estimated
+cost) into hourly buckets with a fixed latency histogram, so the admin panel
+can show per-model percentiles per hour from a table that stays tiny
+"""
+
+import atexit
+import sqlite3
+import json
+import time
+import threading
+from datetime import datetime
+from sqlite_connections import sqlite_connection
+
+# Latency histogram bucket upper bounds in seconds (the last bucket is open-ended)
+LATENCY_BOUNDS = [0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64, float("inf")]
+
+# USD per million (prompt, completion) tokens; ":free" models cost nothing
+MODEL_PRICING_PER_MILLION = {
+    "mistralai/mixtral-8x7b-instruct": (0.24, 0.24),
+    "openai/gpt-4o-mini": (0.15, 0.60),
+}
+
+BUCKET_SECONDS = 3600
+
+def estimate_cost(model, prompt_tokens, completion_tokens, pricing=None):
+    """Estimated USD cost of one call (0 for free or unknown models)"""
+    if model.endswith(":free"):
+        return 0.0
+    prompt_price, completion_price = (pricing or MODEL_PRICING_PER_MILLION).get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+def latency_bucket(seconds):
+    """Index of the histogram bucket for a latency"""
+    for index, bound in enumerate(LATENCY_BOUNDS):
+        if seconds <= bound:
+            return index
+    return len(LATENCY_BOUNDS) - 1
+
+def histogram_percentile(histogram, pct):
+    """Upper bound of the bucket holding the pct-th percentile (None if empty)"""
+    total = sum(histogram)
+    if not total:
+        return None
+    target = pct / 100.0 * total
+    cumulative = 0
+    for index, count in enumerate(histogram):
+        cumulative += count
+        if count and cumulative >= target:
+            bound = LATENCY_BOUNDS[index]
+            # The open-ended bucket has no upper bound - report its lower one
+            return bound if bound != float("inf") else LATENCY_BOUNDS[index - 1]
+    return None
+
+class LLMTelemetry:
+    """Hourly per-model, per-outcome aggregates of LLM calls, buffered in memory
+
+    Attempts are aggregated in memory and merged into SQLite at most every
+    flush_interval seconds, so recording never costs a write per call.
+    """
+
+    def __init__(self, db_path="cravemap.db", flush_interval=10, pricing=None):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.pricing = pricing or MODEL_PRICING_PER_MILLION
+        self._pending = {}  # (bucket_start, model, outcome) -> aggregate dict
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        self.init_tables()
+
+    def init_tables(self):
+        """Initialize LLM telemetry table"""
+        with sqlite_connection(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_telemetry_hourly (
+                    bucket_start INTEGER NOT NULL,
+                    model TEXT NOT NULL,
+                    outcome TEXT NOT NULL,
+                    calls INTEGER DEFAULT 0,
+                    prompt_tokens INTEGER DEFAULT 0,
+                    completion_tokens INTEGER DEFAULT 0,
+                    cost_usd REAL DEFAULT 0,
+                    latency_total REAL DEFAULT 0,
+                    latency_hist TEXT,
+                    PRIMARY KEY (bucket_start, model, outcome)
+                )
+            ''')
+            conn.commit()
+
+    def record(self, model, latency, outcome="success", prompt_tokens=0, completion_tokens=0, at=None):
+        """Record one completion attempt; returns its estimated cost"""
+        cost = estimate_cost(model, prompt_tokens, completion_tokens, self.pricing)
+        bucket_start = int((at or time.time()) // BUCKET_SECONDS * BUCKET_SECONDS)
+        key = (bucket_start, model, outcome)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = self._pending[key] = {
+                    "calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                    "cost_usd": 0.0, "latency_total": 0.0, "latency_hist": [0] * len(LATENCY_BOUNDS),
+                }
+            entry["calls"] += 1
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+            entry["cost_usd"] += cost
+            entry["latency_total"] += latency
+            entry["latency_hist"][latency_bucket(latency)] += 1
+            due = time.time() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+        return cost
+
+    def flush(self):
+        """Merge buffered aggregates into SQLite"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.time()
+        if not pending:
+            return 0
+        try:
+            with sqlite_connection(self.db_path) as conn:
+                # Take the write lock before reading, so a concurrent flush can't
+                # merge into the same old rows and overwrite these aggregates
+                conn.execute("BEGIN IMMEDIATE")
+                for (bucket_start, model, outcome), entry in pending.items():
+                    row = conn.execute('''
+                        SELECT calls, prompt_tokens, completion_tokens, cost_usd, latency_total, latency_hist
+                        FROM llm_telemetry_hourly WHERE bucket_start = ? AND model = ? AND outcome = ?
+                    ''', (bucket_start, model, outcome)).fetchone()
+                    if row:
+                        entry["calls"] += row[0]
+                        entry["prompt_tokens"] += row[1]
+                        entry["completion_tokens"] += row[2]
+                        entry["cost_usd"] += row[3]
+                        entry["latency_total"] += row[4]
+                        entry["latency_hist"] = [a + b for a, b in zip(entry["latency_hist"], json.loads(row[5]))]
+                    conn.execute('''
+                        INSERT OR REPLACE INTO llm_telemetry_hourly
+                        (bucket_start, model, outcome, calls, prompt_tokens, completion_tokens,
+                         cost_usd, latency_total, latency_hist)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (bucket_start, model, outcome, entry["calls"], entry["prompt_tokens"],
+                          entry["completion_tokens"], entry["cost_usd"], entry["latency_total"],
+                          json.dumps(entry["latency_hist"])))
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ LLM telemetry flush failed: {e}")
+        return len(pending)
+
+    def hourly_report(self, hours=24):
+        """Per model per hour: calls, success rate, p50/p95/p99 latency, tokens and cost (newest first)"""
+        self.flush()
+        since = int(time.time() // BUCKET_SECONDS * BUCKET_SECONDS) - (hours - 1) * BUCKET_SECONDS
+        with sqlite_connection(self.db_path) as conn:
+            rows = conn.execute('''
+                SELECT bucket_start, model, outcome, calls, prompt_tokens, completion_tokens,
+                       cost_usd, latency_hist
+                FROM llm_telemetry_hourly WHERE bucket_start >= ?
+            ''', (since,)).fetchall()
+
+        grouped = {}
+        for bucket_start, model, outcome, calls, prompt_tokens, completion_tokens, cost, hist in rows:
+            group = grouped.setdefault((bucket_start, model), {
+                "calls": 0, "successes": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "cost_usd": 0.0, "hist": [0] * len(LATENCY_BOUNDS), "errors": {},
+            })
+            group["calls"] += calls
+            group["prompt_tokens"] += prompt_tokens
+            group["completion_tokens"] += completion_tokens
+            group["cost_usd"] += cost
+            if outcome == "success":
+                group["successes"] += calls
+                # Percentiles describe answered calls; fast failures would flatter them
+                group["hist"] = [a + b for a, b in zip(group["hist"], json.loads(hist))]
+            else:
+                group["errors"][outcome] = group["errors"].get(outcome, 0) + calls
+
+        report = []
+        for (bucket_start, model), group in sorted(grouped.items(), key=lambda item: (-item[0][0], item[0][1])):
+            report.append({
+                "hour": datetime.fromtimestamp(bucket_start).strftime("%Y-%m-%d %H:00"),
+                "model": model,
+                "calls": group["calls"],
+                "success_rate": round(group["successes"] / group["calls"], 2),
+                "p50_s": histogram_percentile(group["hist"], 50),
+                "p95_s": histogram_percentile(group["hist"], 95),
+                "p99_s": histogram_percentile(group["hist"], 99),
+                "prompt_tokens": group["prompt_tokens"],
+                "completion_tokens": group["completion_tokens"],
+                "cost_usd": round(group["cost_usd"], 6),
+                "errors": ", ".join(f"{k}: {v}" for k, v in sorted(group["errors"].items())),
+            })
+        return report
+
+# Global instance
+llm_telemetry = None
+_instance_lock = threading.Lock()
+
+def get_llm_telemetry():
+    """Get the process-wide LLM telemetry recorder"""
+    global llm_telemetry
+    with _instance_lock:
+        if llm_telemetry is None:
+            llm_telemetry = LLMTelemetry()
+            # Don't lose the last few seconds of buffered attempts on shutdown
+            atexit.register(llm_telemetry.flush)
+    return llm_telemetry
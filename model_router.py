@@ -0,0 +1,279 @@
+"""
+Adaptive model routing for CraveMap
+Keeps a health scoreboard per LLM model (success rate, latency percentiles,
+recent error classes), opens a circuit breaker on failing models and orders
+the candidates by expected latency. State is shared process-wide and persisted
+in SQLite so a restart doesn't re-learn that a model is rate-limited.
+"""
+
+import sqlite3
+import json
+import time
+import threading
+from collections import deque
+from datetime import datetime
+from sqlite_connections import sqlite_connection
+
+# How long a model is skipped after each kind of failure (seconds)
+BREAKER_COOLDOWNS = {
+    "rate_limit": 10 * 60,
+    "credits": 60 * 60,
+    "auth": 60 * 60,
+    "timeout": 2 * 60,
+    "other": 2 * 60,
+}
+# Generic errors only open the breaker after this many in a row
+FAILURES_TO_OPEN = 3
+MAX_COOLDOWN_SECONDS = 6 * 60 * 60
+# A half-open probe that hasn't reported back by then (e.g. a hedge that was
+# never launched) frees the model for the next probe
+PROBE_TIMEOUT_SECONDS = 60
+
+def classify_error(error):
+    """Map an LLM exception to an error class: limiter, rate_limit, credits, auth, timeout or other"""
+    message = str(error).lower()
+    if "limiter saturated" in message:
+        return "limiter"  # Our own backpressure, not the model's fault
+    if "rate limit" in message or "429" in message:
+        return "rate_limit"
+    if "insufficient credits" in message or "payment" in message or "402" in message:
+        return "credits"
+    if "authentication" in message or "api key" in message or "401" in message:
+        return "auth"
+    if "timeout" in message or "timed out" in message:
+        return "timeout"
+    return "other"
+
+class ModelHealth:
+    """Scoreboard entry for one model"""
+
+    def __init__(self, model, window=50):
+        self.model = model
+        self.latencies = deque(maxlen=window)
+        self.successes = 0
+        self.failures = 0
+        self.success_rate = 1.0  # Exponentially weighted, so recent outcomes dominate
+        self.consecutive_failures = 0
+        self.last_error_class = None
+        self.last_error_at = None
+        self.open_until = 0.0
+        self.cooldown = 0
+        self.probe_until = 0.0  # Set while a half-open probe is out (not persisted)
+
+    def is_open(self, now=None):
+        return self.open_until > (now or time.time())
+
+    def is_half_open(self, now=None):
+        """Breaker tripped and its cooldown over - the next call is a probe"""
+        return self.cooldown > 0 and not self.is_open(now)
+
+    def state(self, now=None):
+        if self.is_open(now):
+            return "open"
+        return "half-open" if self.is_half_open(now) else "closed"
+
+    def latency_percentile(self, pct):
+        samples = sorted(self.latencies)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+class ModelRouter:
+    """Health scoreboard + circuit breakers + latency-aware ordering for LLM models
+
+    Breakers: rate-limit, credit and auth errors open a model's breaker at
+    once; other errors open it after FAILURES_TO_OPEN in a row. Once the
+    cooldown passes a single probe call is let through (half-open) - a
+    success closes the breaker, a failure re-opens it with double the
+    cooldown. Failures reported while the breaker is already open (calls
+    that started before it opened) don't extend it.
+    """
+
+    def __init__(self, db_path="cravemap.db", window=50, min_samples=5, success_decay=0.8):
+        self.db_path = db_path
+        self.window = window
+        self.min_samples = min_samples
+        self.success_decay = success_decay
+        self._health = {}
+        self._lock = threading.Lock()
+        self.init_tables()
+        self._load()
+
+    def init_tables(self):
+        """Initialize model health table"""
+        with sqlite_connection(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS model_health (
+                    model TEXT PRIMARY KEY,
+                    successes INTEGER DEFAULT 0,
+                    failures INTEGER DEFAULT 0,
+                    success_rate REAL DEFAULT 1.0,
+                    consecutive_failures INTEGER DEFAULT 0,
+                    latencies TEXT,
+                    last_error_class TEXT,
+                    last_error_at REAL,
+                    open_until REAL DEFAULT 0,
+                    cooldown REAL DEFAULT 0,
+                    updated_at TEXT
+                )
+            ''')
+            conn.commit()
+
+    def _load(self):
+        """Restore the scoreboard saved by a previous process"""
+        try:
+            with sqlite_connection(self.db_path) as conn:
+                rows = conn.execute('''
+                    SELECT model, successes, failures, success_rate, consecutive_failures,
+                           latencies, last_error_class, last_error_at, open_until, cooldown
+                    FROM model_health
+                ''').fetchall()
+        except sqlite3.Error as e:
+            print(f"⚠️ Model health load failed: {e}")
+            return
+        for row in rows:
+            health = ModelHealth(row[0], self.window)
+            (health.successes, health.failures, health.success_rate, health.consecutive_failures) = row[1:5]
+            health.latencies.extend(json.loads(row[5] or "[]"))
+            health.last_error_class, health.last_error_at, health.open_until, health.cooldown = row[6:10]
+            self._health[row[0]] = health
+
+    @staticmethod
+    def _snapshot(health):
+        """model_health row for health (taken under the lock, written after it's released)"""
+        return (health.model, health.successes, health.failures, health.success_rate,
+                health.consecutive_failures, json.dumps(list(health.latencies)),
+                health.last_error_class, health.last_error_at, health.open_until,
+                health.cooldown, datetime.now().isoformat())
+
+    def _save(self, row):
+        try:
+            with sqlite_connection(self.db_path) as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO model_health
+                    (model, successes, failures, success_rate, consecutive_failures, latencies,
+                     last_error_class, last_error_at, open_until, cooldown, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', row)
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Model health save failed: {e}")
+
+    def _get(self, model):
+        health = self._health.get(model)
+        if health is None:
+            health = self._health[model] = ModelHealth(model, self.window)
+        return health
+
+    def record(self, model, seconds):
+        """Record a successful call and its latency (closes the breaker)"""
+        with self._lock:
+            health = self._get(model)
+            health.latencies.append(seconds)
+            health.successes += 1
+            health.success_rate = self.success_decay * health.success_rate + (1 - self.success_decay)
+            health.consecutive_failures = 0
+            health.open_until = 0.0
+            health.cooldown = 0
+            health.probe_until = 0.0
+            row = self._snapshot(health)
+        self._save(row)
+
+    def record_failure(self, model, error):
+        """Record a failed call, opening the breaker when the failure warrants it"""
+        error_class = classify_error(error)
+        if error_class == "limiter":
+            return error_class
+        now = time.time()
+        with self._lock:
+            health = self._get(model)
+            health.failures += 1
+            health.success_rate = self.success_decay * health.success_rate
+            health.consecutive_failures += 1
+            health.last_error_class = error_class
+            health.last_error_at = now
+
+            if health.is_half_open(now):
+                # The probe failed - back off twice as long
+                health.cooldown = min(MAX_COOLDOWN_SECONDS, health.cooldown * 2)
+                health.open_until = now + health.cooldown
+                health.probe_until = 0.0
+                print(f"🔌 Probe failed - circuit re-opened for {model} ({error_class}) for {health.cooldown:.0f}s")
+            elif not health.is_open(now) and (
+                    error_class in ("rate_limit", "credits", "auth") or health.consecutive_failures >= FAILURES_TO_OPEN):
+                health.cooldown = BREAKER_COOLDOWNS[error_class]
+                health.open_until = now + health.cooldown
+                print(f"🔌 Circuit opened for {model} ({error_class}) for {health.cooldown:.0f}s")
+            row = self._snapshot(health)
+        self._save(row)
+        return error_class
+
+    def percentile(self, model, pct):
+        """Latency percentile for model, or None until min_samples have been seen"""
+        with self._lock:
+            health = self._health.get(model)
+            if health is None or len(health.latencies) < self.min_samples:
+                return None
+            return health.latency_percentile(pct)
+
+    def expected_latency(self, model, default=4.0):
+        """Median latency inflated by the failure rate (a model that fails half the time costs ~2x)"""
+        median = self.percentile(model, 50)
+        with self._lock:
+            health = self._health.get(model)
+            success_rate = health.success_rate if health else 1.0
+        return (median if median is not None else default) / max(success_rate, 0.05)
+
+    def order(self, models, claim_probes=True):
+        """Return models to try: closed breakers by expected latency, then half-open probes
+
+        Models without enough data keep their configured position relative to
+        the default latency. A half-open model is handed to one caller at a
+        time (claim_probes=False only looks, for the admin panel). Open
+        breakers are skipped - if none is left the route is empty and callers
+        fall back to offline summaries without paying for a failed call.
+        """
+        now = time.time()
+        with self._lock:
+            closed = [m for m in models if self._get(m).state(now) == "closed"]
+            probes = []
+            for model in models:
+                health = self._health[model]
+                if health.is_half_open(now) and health.probe_until <= now:
+                    if claim_probes:
+                        health.probe_until = now + PROBE_TIMEOUT_SECONDS
+                    probes.append(model)
+        positions = {model: i for i, model in enumerate(models)}
+        return sorted(closed, key=lambda m: (self.expected_latency(m), positions[m])) + probes
+
+    def scoreboard(self):
+        """Snapshot of every model's health for the admin panel"""
+        now = time.time()
+        with self._lock:
+            models = list(self._health.values())
+        rows = []
+        for health in models:
+            rows.append({
+                "model": health.model,
+                "state": health.state(now),
+                "success_rate": round(health.success_rate, 2),
+                "calls": health.successes + health.failures,
+                "p50_s": health.latency_percentile(50),
+                "p95_s": health.latency_percentile(95),
+                "last_error": health.last_error_class,
+                "reopens_in_s": max(0, int(health.open_until - now)),
+            })
+        return rows
+
+# Global instance
+model_router = None
+_instance_lock = threading.Lock()
+
+def get_model_router():
+    """Get the process-wide model router"""
+    global model_router
+    with _instance_lock:
+        if model_router is None:
+            model_router = ModelRouter()
+    return model_router
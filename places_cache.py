@@ -0,0 +1,276 @@
+"""
+Places caching for CraveMap
+Keeps Google Places lookups in memory and in SQLite so repeat searches skip the API
+"""
+
+import sqlite3
+import json
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from sqlite_connections import sqlite_connection
+
+def normalize_location(location):
+    """Normalize a location string so 'Orchard Road ' and 'orchard  road' share one cache entry"""
+    return " ".join((location or "").lower().split())
+
+class MemoryLRU:
+    """Small thread-safe LRU used as the in-process tier of the caches below"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def keys(self):
+        with self._lock:
+            return list(self._data.keys())
+
+class GeocodeCache:
+    """Two-tier geocode cache: in-process LRU in front of a SQLite table
+
+    Locations that fail to resolve are cached too (negative caching) with a
+    shorter TTL, so a typo doesn't cost a Google call on every search.
+    """
+
+    def __init__(self, db_path="cravemap.db", ttl_seconds=30 * 86400,
+                 negative_ttl_seconds=3600, max_memory_entries=512):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self._memory = MemoryLRU(max_memory_entries)  # location_key -> (coords or None, expires_at)
+        self.hits = 0
+        self.misses = 0
+        self.init_tables()
+
+    def init_tables(self):
+        """Initialize geocode cache table"""
+        with sqlite_connection(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS geocode_cache (
+                    location_key TEXT PRIMARY KEY,
+                    lat REAL,
+                    lng REAL,
+                    found BOOLEAN DEFAULT 1,
+                    expires_at REAL,
+                    created_at TEXT
+                )
+            ''')
+            conn.commit()
+
+    def lookup(self, location):
+        """Return (hit, coords) - coords is None on a negative hit"""
+        key = normalize_location(location)
+        if not key:
+            return False, None
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry:
+            if entry[1] > now:
+                self.hits += 1
+                return True, entry[0]
+            self._memory.pop(key)
+
+        try:
+            with sqlite_connection(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT lat, lng, found, expires_at FROM geocode_cache WHERE location_key = ?",
+                    (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ Geocode cache read failed: {e}")
+            row = None
+
+        if row and row[3] > now:
+            coords = (row[0], row[1]) if row[2] else None
+            self._memory.put(key, (coords, row[3]))
+            self.hits += 1
+            return True, coords
+
+        self.misses += 1
+        return False, None
+
+    def store(self, location, coords):
+        """Cache a resolved location, or a failed one when coords is None"""
+        key = normalize_location(location)
+        if not key:
+            return
+        ttl = self.ttl_seconds if coords else self.negative_ttl_seconds
+        expires_at = time.time() + ttl
+        self._memory.put(key, (coords, expires_at))
+
+        lat, lng = coords if coords else (None, None)
+        try:
+            with sqlite_connection(self.db_path) as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO geocode_cache
+                    (location_key, lat, lng, found, expires_at, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (key, lat, lng, bool(coords), expires_at, datetime.now().isoformat()))
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Geocode cache write failed: {e}")
+
+    def get_or_fetch(self, location, fetch):
+        """Return cached coords for location, calling fetch(location) on a miss
+
+        fetch should return (lat, lng) or None when the location doesn't resolve.
+        Exceptions from fetch are treated as transient and are not cached.
+        """
+        hit, coords = self.lookup(location)
+        if hit:
+            return coords
+        coords = fetch(location)
+        self.store(location, coords)
+        return coords
+
+    def cleanup_expired(self):
+        """Delete expired rows from the SQLite tier"""
+        with sqlite_connection(self.db_path) as conn:
+            deleted = conn.execute(
+                "DELETE FROM geocode_cache WHERE expires_at < ?", (time.time(),)
+            ).rowcount
+            conn.commit()
+            return deleted
+
+class PlaceDetailsCache:
+    """Place details cache keyed by place_id with stale-while-revalidate
+
+    Entries younger than fresh_seconds are served as-is. Older entries (up to
+    max_stale_seconds) are still served immediately while a background thread
+    refreshes them, so only never-seen places pay for a details call.
+    """
+
+    def __init__(self, db_path="cravemap.db", fresh_seconds=6 * 3600,
+                 max_stale_seconds=7 * 86400, max_memory_entries=256):
+        self.db_path = db_path
+        self.fresh_seconds = fresh_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self._memory = MemoryLRU(max_memory_entries)  # place_id -> (payload, fetched_at)
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self.init_tables()
+
+    def init_tables(self):
+        """Initialize place details cache table"""
+        with sqlite_connection(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS place_details_cache (
+                    place_id TEXT PRIMARY KEY,
+                    payload TEXT,
+                    fetched_at REAL
+                )
+            ''')
+            conn.commit()
+
+    def _load(self, place_id):
+        """Return (payload, fetched_at) from memory or SQLite, or None"""
+        entry = self._memory.get(place_id)
+        if entry:
+            return entry
+        try:
+            with sqlite_connection(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT payload, fetched_at FROM place_details_cache WHERE place_id = ?",
+                    (place_id,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ Place details cache read failed: {e}")
+            return None
+        if not row:
+            return None
+        entry = (json.loads(row[0]), row[1])
+        self._memory.put(place_id, entry)
+        return entry
+
+    def store(self, place_id, payload):
+        """Cache a details payload (only successful responses are kept)"""
+        if not place_id or not isinstance(payload, dict) or payload.get("status", "OK") != "OK":
+            return
+        fetched_at = time.time()
+        self._memory.put(place_id, (payload, fetched_at))
+        try:
+            with sqlite_connection(self.db_path) as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO place_details_cache (place_id, payload, fetched_at)
+                    VALUES (?, ?, ?)
+                ''', (place_id, json.dumps(payload), fetched_at))
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Place details cache write failed: {e}")
+
+    def _refresh(self, place_id, fetch):
+        try:
+            self.store(place_id, fetch(place_id))
+        except Exception as e:
+            print(f"⚠️ Background refresh of {place_id} failed: {e}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(place_id)
+
+    def refresh_in_background(self, place_id, fetch):
+        """Start a background refresh unless one is already running for this place"""
+        with self._refresh_lock:
+            if place_id in self._refreshing:
+                return False
+            self._refreshing.add(place_id)
+        threading.Thread(target=self._refresh, args=(place_id, fetch), daemon=True).start()
+        return True
+
+    def get_or_fetch(self, place_id, fetch):
+        """Return details for place_id, calling fetch(place_id) only on a cold miss"""
+        entry = self._load(place_id)
+        if entry:
+            payload, fetched_at = entry
+            age = time.time() - fetched_at
+            if age < self.fresh_seconds:
+                return payload
+            if age < self.max_stale_seconds:
+                self.refresh_in_background(place_id, fetch)
+                return payload
+
+        payload = fetch(place_id)
+        self.store(place_id, payload)
+        return payload
+
+# Global instances
+geocode_cache = None
+place_details_cache = None
+_instance_lock = threading.Lock()
+
+def get_geocode_cache():
+    """Get the process-wide geocode cache"""
+    global geocode_cache
+    with _instance_lock:
+        if geocode_cache is None:
+            geocode_cache = GeocodeCache()
+    return geocode_cache
+
+def get_place_details_cache(fresh_seconds=6 * 3600):
+    """Get the process-wide place details cache"""
+    global place_details_cache
+    with _instance_lock:
+        if place_details_cache is None:
+            place_details_cache = PlaceDetailsCache(fresh_seconds=fresh_seconds)
+    return place_details_cache
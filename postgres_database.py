@@ -1,12 +1,22 @@
 import psycopg2
 import os
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import streamlit as st
 from datetime import datetime
+from connection_pool import ConnectionPool
 
 # Load environment variables
 load_dotenv()
 
+# Connection pool sizing: POSTGRES_POOL_MIN connections are kept open, at most
+# POSTGRES_POOL_MAX are open at once, and extra ones idle for
+# POSTGRES_POOL_MAX_IDLE_SECONDS are closed again
+POSTGRES_POOL_MIN = int(os.getenv("POSTGRES_POOL_MIN", "1"))
+POSTGRES_POOL_MAX = int(os.getenv("POSTGRES_POOL_MAX", "10"))
+POSTGRES_POOL_MAX_IDLE_SECONDS = int(os.getenv("POSTGRES_POOL_MAX_IDLE_SECONDS", "300"))
+
 class PostgresDatabase:
     def __init__(self):
         self.connection_string = self.get_connection_string()
@@ -40,85 +50,102 @@ class PostgresDatabase:
         print(f"❌ No PostgreSQL connection string found")
         return None
     
+    @contextmanager
     def get_connection(self):
-        """Get database connection"""
+        """Context manager for a pooled database connection (None if unavailable)"""
         if not self.connection_string:
             print(f"❌ No connection string available")
-            return None
+            yield None
+            return
             
+        pool = get_postgres_pool(self.connection_string)
         try:
-            return psycopg2.connect(self.connection_string)
+            entry = pool.checkout()
         except Exception as e:
             print(f"❌ Database connection failed: {e}")
-            return None
+            yield None
+            return
+        
+        try:
+            yield entry.conn
+        except Exception:
+            pool.checkin(entry, broken=bool(entry.conn.closed))
+            raise
+        else:
+            pool.checkin(entry)
     
     def init_tables(self):
         """Initialize database tables"""
         try:
-            conn = self.get_connection()
-            if not conn:
-                return False
+            with self.get_connection() as conn:
+                if not conn:
+                    return False
+                    
+                cursor = conn.cursor()
                 
-            cursor = conn.cursor()
-            
-            # Create users table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id SERIAL PRIMARY KEY,
-                    email VARCHAR(255) UNIQUE NOT NULL,
-                    password_hash VARCHAR(255) NOT NULL,
-                    first_name VARCHAR(100),
-                    last_name VARCHAR(100),
-                    phone VARCHAR(20),
-                    is_premium BOOLEAN DEFAULT FALSE,
-                    premium_expiry TIMESTAMP,
-                    stripe_customer_id VARCHAR(255),
-                    stripe_subscription_id VARCHAR(255),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+                # Create users table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS users (
+                        id SERIAL PRIMARY KEY,
+                        email VARCHAR(255) UNIQUE NOT NULL,
+                        password_hash VARCHAR(255) NOT NULL,
+                        first_name VARCHAR(100),
+                        last_name VARCHAR(100),
+                        phone VARCHAR(20),
+                        is_premium BOOLEAN DEFAULT FALSE,
+                        premium_expiry TIMESTAMP,
+                        stripe_customer_id VARCHAR(255),
+                        stripe_subscription_id VARCHAR(255),
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
 
-            # Add stripe columns if they don't exist (migration for existing tables)
-            try:
+                # Add stripe columns if they don't exist (migration for existing tables)
+                try:
+                    cursor.execute("""
+                        ALTER TABLE users ADD COLUMN IF NOT EXISTS stripe_customer_id VARCHAR(255)
+                    """)
+                    cursor.execute("""
+                        ALTER TABLE users ADD COLUMN IF NOT EXISTS stripe_subscription_id VARCHAR(255)
+                    """)
+                    cursor.execute("""
+                        ALTER TABLE users ADD COLUMN IF NOT EXISTS monthly_searches INTEGER DEFAULT 0
+                    """)
+                    cursor.execute("""
+                        ALTER TABLE users ADD COLUMN IF NOT EXISTS last_search_reset TIMESTAMP
+                    """)
+                except Exception:
+                    pass  # Columns may already exist
+                
+                # Create support_tickets table
                 cursor.execute("""
-                    ALTER TABLE users ADD COLUMN IF NOT EXISTS stripe_customer_id VARCHAR(255)
+                    CREATE TABLE IF NOT EXISTS support_tickets (
+                        id SERIAL PRIMARY KEY,
+                        user_email VARCHAR(255) NOT NULL,
+                        subject VARCHAR(255) NOT NULL,
+                        message TEXT NOT NULL,
+                        status VARCHAR(50) DEFAULT 'open',
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
                 """)
+                
+                # Create sessions table for better session management
                 cursor.execute("""
-                    ALTER TABLE users ADD COLUMN IF NOT EXISTS stripe_subscription_id VARCHAR(255)
+                    CREATE TABLE IF NOT EXISTS user_sessions (
+                        id SERIAL PRIMARY KEY,
+                        session_id VARCHAR(255) UNIQUE NOT NULL,
+                        user_email VARCHAR(255) NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        expires_at TIMESTAMP NOT NULL
+                    )
                 """)
-            except Exception:
-                pass  # Columns may already exist
-            
-            # Create support_tickets table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS support_tickets (
-                    id SERIAL PRIMARY KEY,
-                    user_email VARCHAR(255) NOT NULL,
-                    subject VARCHAR(255) NOT NULL,
-                    message TEXT NOT NULL,
-                    status VARCHAR(50) DEFAULT 'open',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Create sessions table for better session management
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS user_sessions (
-                    id SERIAL PRIMARY KEY,
-                    session_id VARCHAR(255) UNIQUE NOT NULL,
-                    user_email VARCHAR(255) NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    expires_at TIMESTAMP NOT NULL
-                )
-            """)
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            return True
-            
+                
+                conn.commit()
+                cursor.close()
+                return True
+                
         except Exception as e:
             st.error(f"Error initializing database tables: {e}")
             return False
@@ -126,21 +153,20 @@ class PostgresDatabase:
     def create_user(self, email, password_hash, first_name="", last_name="", phone=""):
         """Create a new user"""
         try:
-            conn = self.get_connection()
-            if not conn:
-                return False
+            with self.get_connection() as conn:
+                if not conn:
+                    return False
+                    
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO users (email, password_hash, first_name, last_name, phone, updated_at)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, (email, password_hash, first_name, last_name, phone, datetime.now()))
+                
+                conn.commit()
+                cursor.close()
+                return True
                 
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO users (email, password_hash, first_name, last_name, phone, updated_at)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (email, password_hash, first_name, last_name, phone, datetime.now()))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            return True
-            
         except psycopg2.IntegrityError:
             # User already exists
             return False
@@ -151,32 +177,34 @@ class PostgresDatabase:
     def get_user(self, email):
         """Get user by email"""
         try:
-            conn = self.get_connection()
-            if not conn:
+            with self.get_connection() as conn:
+                if not conn:
+                    return None
+                    
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT email, password_hash, first_name, last_name, phone, is_premium, premium_expiry,
+                           monthly_searches, last_search_reset
+                    FROM users WHERE email = %s
+                """, (email,))
+                
+                result = cursor.fetchone()
+                cursor.close()
+                
+                if result:
+                    return {
+                        'email': result[0],
+                        'password_hash': result[1],
+                        'first_name': result[2] or "",
+                        'last_name': result[3] or "",
+                        'phone': result[4] or "",
+                        'is_premium': result[5],
+                        'premium_expiry': result[6],
+                        'monthly_searches': result[7] or 0,
+                        'last_search_reset': result[8]
+                    }
                 return None
                 
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT email, password_hash, first_name, last_name, phone, is_premium, premium_expiry
-                FROM users WHERE email = %s
-            """, (email,))
-            
-            result = cursor.fetchone()
-            cursor.close()
-            conn.close()
-            
-            if result:
-                return {
-                    'email': result[0],
-                    'password_hash': result[1],
-                    'first_name': result[2] or "",
-                    'last_name': result[3] or "",
-                    'phone': result[4] or "",
-                    'is_premium': result[5],
-                    'premium_expiry': result[6]
-                }
-            return None
-            
         except Exception as e:
             st.error(f"Error getting user: {e}")
             return None
@@ -184,39 +212,85 @@ class PostgresDatabase:
     def update_user(self, email, **kwargs):
         """Update user information"""
         try:
-            conn = self.get_connection()
-            if not conn:
-                return False
+            with self.get_connection() as conn:
+                if not conn:
+                    return False
+                    
+                # Build dynamic update query
+                set_clauses = []
+                values = []
+                
+                for key, value in kwargs.items():
+                    if key in ['first_name', 'last_name', 'phone', 'is_premium', 'premium_expiry',
+                               'monthly_searches', 'last_search_reset']:
+                        set_clauses.append(f"{key} = %s")
+                        values.append(value)
+                
+                if not set_clauses:
+                    return False
+                
+                set_clauses.append("updated_at = %s")
+                values.append(datetime.now())
+                values.append(email)
+                
+                cursor = conn.cursor()
+                query = f"UPDATE users SET {', '.join(set_clauses)} WHERE email = %s"
+                cursor.execute(query, values)
+                
+                conn.commit()
+                cursor.close()
+                return True
                 
-            # Build dynamic update query
-            set_clauses = []
-            values = []
-            
-            for key, value in kwargs.items():
-                if key in ['first_name', 'last_name', 'phone', 'is_premium', 'premium_expiry']:
-                    set_clauses.append(f"{key} = %s")
-                    values.append(value)
-            
-            if not set_clauses:
-                return False
-            
-            set_clauses.append("updated_at = %s")
-            values.append(datetime.now())
-            values.append(email)
-            
-            cursor = conn.cursor()
-            query = f"UPDATE users SET {', '.join(set_clauses)} WHERE email = %s"
-            cursor.execute(query, values)
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            return True
-            
         except Exception as e:
             st.error(f"Error updating user: {e}")
             return False
     
+    def update_search_count(self, email, increment=1, limit=None):
+        """Atomically add to a user's monthly search count and return the new count
+        
+        One UPDATE ... RETURNING statement (the row lock serializes concurrent
+        searches); a count last reset in an earlier month starts over from
+        increment. With a limit, the search is only counted if the new count
+        stays within it. Returns None if the user doesn't exist, the limit is
+        reached or the update failed.
+        """
+        try:
+            with self.get_connection() as conn:
+                if not conn:
+                    return None
+                    
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE users SET
+                        monthly_searches = CASE
+                            WHEN date_trunc('month', last_search_reset) = date_trunc('month', %(now)s::timestamp)
+                            THEN COALESCE(monthly_searches, 0) + %(increment)s
+                            ELSE %(increment)s
+                        END,
+                        last_search_reset = CASE
+                            WHEN date_trunc('month', last_search_reset) = date_trunc('month', %(now)s::timestamp)
+                            THEN last_search_reset
+                            ELSE %(now)s
+                        END,
+                        updated_at = %(now)s
+                    WHERE email = %(email)s AND (%(limit)s::integer IS NULL OR CASE
+                        WHEN date_trunc('month', last_search_reset) = date_trunc('month', %(now)s::timestamp)
+                        THEN COALESCE(monthly_searches, 0) + %(increment)s
+                        ELSE %(increment)s
+                    END <= %(limit)s::integer)
+                    RETURNING monthly_searches
+                """, {"email": email, "increment": increment, "now": datetime.now(), "limit": limit})
+                
+                result = cursor.fetchone()
+                conn.commit()
+                cursor.close()
+                
+                return result[0] if result else None
+                
+        except Exception as e:
+            st.error(f"Error updating search count: {e}")
+            return None
+    
     def upgrade_to_premium(self, email, premium_expiry):
         """Upgrade user to premium"""
         return self.update_user(email, is_premium=True, premium_expiry=premium_expiry)
@@ -224,33 +298,32 @@ class PostgresDatabase:
     def get_all_users(self):
         """Get all users (for admin/diagnostic purposes)"""
         try:
-            conn = self.get_connection()
-            if not conn:
-                return []
+            with self.get_connection() as conn:
+                if not conn:
+                    return []
+                    
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT email, first_name, last_name, is_premium, premium_expiry, created_at
+                    FROM users ORDER BY created_at DESC
+                """)
+                
+                results = cursor.fetchall()
+                cursor.close()
+                
+                users = []
+                for result in results:
+                    users.append({
+                        'email': result[0],
+                        'first_name': result[1] or "",
+                        'last_name': result[2] or "",
+                        'is_premium': result[3],
+                        'premium_expiry': result[4],
+                        'created_at': result[5]
+                    })
+                
+                return users
                 
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT email, first_name, last_name, is_premium, premium_expiry, created_at
-                FROM users ORDER BY created_at DESC
-            """)
-            
-            results = cursor.fetchall()
-            cursor.close()
-            conn.close()
-            
-            users = []
-            for result in results:
-                users.append({
-                    'email': result[0],
-                    'first_name': result[1] or "",
-                    'last_name': result[2] or "",
-                    'is_premium': result[3],
-                    'premium_expiry': result[4],
-                    'created_at': result[5]
-                })
-            
-            return users
-            
         except Exception as e:
             st.error(f"Error getting all users: {e}")
             return []
@@ -258,21 +331,20 @@ class PostgresDatabase:
     def create_support_ticket(self, user_email, subject, message):
         """Create a support ticket"""
         try:
-            conn = self.get_connection()
-            if not conn:
-                return False
+            with self.get_connection() as conn:
+                if not conn:
+                    return False
+                    
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO support_tickets (user_email, subject, message)
+                    VALUES (%s, %s, %s)
+                """, (user_email, subject, message))
+                
+                conn.commit()
+                cursor.close()
+                return True
                 
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO support_tickets (user_email, subject, message)
-                VALUES (%s, %s, %s)
-            """, (user_email, subject, message))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            return True
-            
         except Exception as e:
             st.error(f"Error creating support ticket: {e}")
             return False
@@ -280,42 +352,57 @@ class PostgresDatabase:
     def test_connection(self):
         """Test database connection"""
         try:
-            conn = self.get_connection()
-            if not conn:
-                return False, "Connection failed"
+            with self.get_connection() as conn:
+                if not conn:
+                    return False, "Connection failed"
+                    
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                result = cursor.fetchone()
+                
+                cursor.close()
+                
+                return True, "Connection successful"
                 
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1")
-            result = cursor.fetchone()
-            
-            cursor.close()
-            conn.close()
-            
-            return True, "Connection successful"
-            
         except Exception as e:
             return False, f"Connection error: {e}"
     
     def get_user_count(self):
         """Get total user count"""
         try:
-            conn = self.get_connection()
-            if not conn:
-                return 0
+            with self.get_connection() as conn:
+                if not conn:
+                    return 0
+                    
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*) FROM users")
+                count = cursor.fetchone()[0]
+                
+                cursor.close()
+                
+                return count
                 
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM users")
-            count = cursor.fetchone()[0]
-            
-            cursor.close()
-            conn.close()
-            
-            return count
-            
         except Exception as e:
             st.error(f"Error getting user count: {e}")
             return 0
 
+# Process-wide pools, one per connection string - shared by every Streamlit session
+postgres_pools = {}
+_pools_lock = threading.Lock()
+
+def get_postgres_pool(connection_string):
+    """Get the process-wide connection pool for a connection string"""
+    with _pools_lock:
+        pool = postgres_pools.get(connection_string)
+        if pool is None:
+            pool = postgres_pools[connection_string] = ConnectionPool(
+                lambda: psycopg2.connect(connection_string),
+                min_size=POSTGRES_POOL_MIN,
+                max_size=POSTGRES_POOL_MAX,
+                max_idle_seconds=POSTGRES_POOL_MAX_IDLE_SECONDS
+            )
+    return pool
+
 # Global instance
 postgres_db = None
 
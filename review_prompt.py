@@ -0,0 +1,103 @@
+"""
+Review prompt compaction for CraveMap
+Cuts review text down before it goes into an LLM prompt: drops empty,
+low-information and near-duplicate reviews, trims long reviews to their
+dish-bearing sentences and keeps each place within a token budget
+"""
+
+import math
+import re
+from food_lexicon import food_score
+
+# Rough chars-per-token for English text with the OpenRouter models we use
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD = re.compile(r"[a-z0-9']+")
+
+def estimate_tokens(text):
+    """Cheap token estimate (no tokenizer dependency)"""
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+def split_sentences(text):
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text or "") if s.strip()]
+
+def _word_set(text):
+    return set(_WORD.findall(text.lower()))
+
+def is_near_duplicate(words, kept_word_sets, threshold=0.8):
+    """True if words overlap an already kept review by at least threshold (Jaccard)"""
+    for kept in kept_word_sets:
+        union = words | kept
+        if union and len(words & kept) / len(union) >= threshold:
+            return True
+    return False
+
+def truncate_review(text, max_tokens):
+    """Shorten a review to max_tokens, keeping its most food-focused sentences in order"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    sentences = split_sentences(text)
+    # Best sentences first (dish mentions, then food words), earlier ones win ties
+    ranked = sorted(range(len(sentences)), key=lambda i: (-food_score(sentences[i]), i))
+
+    chosen = []
+    used = 0
+    for i in ranked:
+        cost = estimate_tokens(sentences[i]) + 1
+        if used + cost > max_tokens:
+            continue
+        chosen.append(i)
+        used += cost
+    if not chosen:
+        # A single huge sentence - hard cut it
+        return text[:max_tokens * CHARS_PER_TOKEN].rsplit(" ", 1)[0] + "…"
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+def compact_reviews(review_texts, budget_tokens=400, max_review_tokens=120, min_words=4):
+    """Compact review texts for one place's prompt
+
+    Returns (texts, stats) where stats has original_tokens, compacted_tokens,
+    saved_tokens and dropped (reviews removed entirely).
+    """
+    original_tokens = sum(estimate_tokens(t) for t in review_texts)
+    kept = []
+    kept_word_sets = []
+    short = []
+    used = 0
+
+    for text in review_texts:
+        text = " ".join((text or "").split())
+        words = _word_set(text)
+        # "Great!" and "Nice place" say nothing about the food
+        if len(words) < min_words:
+            if words:
+                short.append(text)
+            continue
+        if is_near_duplicate(words, kept_word_sets):
+            continue
+
+        remaining = budget_tokens - used
+        if remaining <= 0:
+            break
+        text = truncate_review(text, min(max_review_tokens, remaining))
+        kept.append(text)
+        kept_word_sets.append(words)
+        used += estimate_tokens(text)
+
+    if not kept:
+        # Only short reviews - still better than sending nothing
+        for text in short:
+            if kept and used + estimate_tokens(text) > budget_tokens:
+                break
+            kept.append(text)
+            used += estimate_tokens(text)
+
+    compacted_tokens = sum(estimate_tokens(t) for t in kept)
+    stats = {
+        "original_tokens": original_tokens,
+        "compacted_tokens": compacted_tokens,
+        "saved_tokens": max(0, original_tokens - compacted_tokens),
+        "dropped": len(review_texts) - len(kept),
+    }
+    return kept, stats
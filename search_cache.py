@@ -0,0 +1,108 @@
+"""
+Search result caching for CraveMap
+Shares results of identical searches across Streamlit sessions in this process, and
+coalesces concurrent identical searches into a single upstream pipeline run
+"""
+
+import threading
+import time
+from places_cache import MemoryLRU, normalize_location
+
+def normalize_keyword(keyword):
+    """Lowercase a search keyword and collapse its whitespace"""
+    return " ".join((keyword or "").lower().split())
+
+def make_search_key(keywords, location):
+    """Build a cache key from the normalized keywords and location
+
+    keywords is the list of keywords searched together (a string is one
+    keyword). They stay separate in the key: "ramen, noodles" (two merged
+    searches) and "ramen noodles" (one search) must not share results.
+    Filters are not part of the key - they run in memory over the cached set.
+    """
+    if isinstance(keywords, str):
+        keywords = [keywords]
+    return (
+        tuple(sorted({normalize_keyword(k) for k in keywords if normalize_keyword(k)})),
+        normalize_location(location),
+    )
+
+class _Flight:
+    """One in-progress computation that other callers can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.failed = False
+
+class SearchResultCache:
+    """TTL cache with singleflight: N concurrent misses on one key run compute() once"""
+
+    def __init__(self, ttl_seconds=900, max_entries=256):
+        self.ttl_seconds = ttl_seconds
+        self._entries = MemoryLRU(max_entries)  # key -> (value, expires_at)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key):
+        """Return a fresh cached value or None"""
+        entry = self._entries.get(key)
+        if entry and entry[1] > time.time():
+            return entry[0]
+        return None
+
+    def get_or_compute(self, key, compute, cache_if=None):
+        """Return the cached value for key, or run compute() once for all concurrent callers
+
+        cache_if(value) can veto caching (e.g. empty results); the value is still
+        handed to everyone who waited on this run.
+        """
+        with self._lock:
+            value = self.get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            flight = self._inflight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            flight.event.wait()
+            if flight.failed:
+                # Leader errored or its script run was stopped - compute independently
+                return compute()
+            return flight.value
+
+        try:
+            value = compute()
+            flight.value = value
+            if cache_if is None or cache_if(value):
+                self._entries.put(key, (value, time.time() + self.ttl_seconds))
+            return value
+        except BaseException:
+            flight.failed = True
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+# Global instance
+search_cache = None
+_instance_lock = threading.Lock()
+
+def get_search_cache(ttl_seconds=900):
+    """Get the process-wide search result cache"""
+    global search_cache
+    with _instance_lock:
+        if search_cache is None:
+            search_cache = SearchResultCache(ttl_seconds=ttl_seconds)
+    return search_cache
@@ -0,0 +1,277 @@
+"""
+Search pipeline helpers for CraveMap
+Each keyword is a lazily paged stream of ranked candidates. A search is a lazy
+generator pipeline over those streams: merge (rank order, de-duplicated) ->
+filter -> top-N. Nothing past the settled top-N is ever pulled, so no further
+pages are fetched and no details are requested for dropped candidates.
+"""
+
+import heapq
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+
+# Number of result cards shown per search
+TOP_N_RESULTS = 3
+
+def keyword_rank_score(position):
+    """Relevance score for a result at `position` in one keyword's result list (1.0 = top hit)"""
+    return 1.0 / (1 + position)
+
+def build_candidate(place, distance_km=None, score=0.0):
+    """Convert a textsearch result into a candidate dict (coordinates, rating, price, distance)"""
+    geometry = place.get("geometry", {}).get("location", {})
+    name = place.get("name") or ""
+    candidate = {
+        "name": name,
+        "place_id": place.get("place_id"),
+        "rating": place.get("rating"),
+        "price_level": place.get("price_level", 0),
+        "address": place.get("formatted_address"),
+        "url": f"https://www.google.com/maps/search/?api=1&query={name.replace(' ', '+')}",
+        "lat": geometry.get("lat"),
+        "lng": geometry.get("lng"),
+        "distance_km": distance_km,
+        "score": score,
+    }
+    if distance_km is not None:
+        candidate["distance"] = f"{distance_km:.1f} km"
+    return candidate
+
+def merge_candidates(merged, candidates):
+    """Merge candidates into merged (place_id -> candidate), keeping the best score per place"""
+    for candidate in candidates:
+        place_id = candidate.get("place_id")
+        if not place_id:
+            continue
+        existing = merged.get(place_id)
+        if existing is None or candidate["score"] > existing["score"]:
+            merged[place_id] = candidate
+    return merged
+
+def rank_key(candidate):
+    """Sort key for ranking: best keyword score first, then nearest"""
+    distance = candidate.get("distance_km")
+    return (-candidate.get("score", 0.0), distance if distance is not None else float("inf"))
+
+def rank_candidates(merged):
+    """Order merged candidates by best keyword score, then by distance"""
+    return sorted(merged.values(), key=rank_key)
+
+def passes_filters(candidate, min_rating=0, max_distance=None, max_price_level=None):
+    """Check one candidate against the rating, distance and price-level filters"""
+    rating = candidate.get("rating")
+    if min_rating and (rating is None or rating < min_rating):
+        return False
+    distance = candidate.get("distance_km")
+    if max_distance and distance is not None and distance > max_distance:
+        return False
+    if max_price_level is not None and (candidate.get("price_level") or 0) > max_price_level:
+        return False
+    return True
+
+def filter_candidates(candidates, min_rating=0, max_distance=None, max_price_level=None):
+    """Filter stage: lazily yield candidates that pass the filters"""
+    for candidate in candidates:
+        if passes_filters(candidate, min_rating, max_distance, max_price_level):
+            yield candidate
+
+def apply_filters(candidates, min_rating=0, max_distance=None, max_price_level=None, limit=TOP_N_RESULTS):
+    """Filter the candidate superset and return the top `limit` places in ranking order"""
+    return list(islice(filter_candidates(candidates, min_rating, max_distance, max_price_level), limit))
+
+def merge_streams(streams, fetch_more=True):
+    """Merge stage: lazily yield candidates from rank-ordered streams in global rank order
+
+    Each stream is already sorted by rank_key, so a k-way merge pulls from a
+    stream only when its head is the next best candidate. The first (best)
+    occurrence of each place_id wins; later duplicates are skipped.
+    """
+    seen = set()
+    ranked = heapq.merge(*(stream.iter_candidates(fetch_more) for stream in streams), key=rank_key)
+    for candidate in ranked:
+        place_id = candidate.get("place_id")
+        if not place_id or place_id in seen:
+            continue
+        seen.add(place_id)
+        yield candidate
+
+class KeywordStream:
+    """Lazily paged, rank-ordered candidates for one keyword
+
+    fetch_page(page_token, offset) returns (candidates, next_page_token). Pages
+    are fetched once and kept, so later filter passes replay them for free and
+    only pull a new page when they run past what is already fetched.
+
+    Page tokens only become valid a little while after they are issued, so a
+    follow-up page waits until page_token_delay seconds after its token arrived.
+    """
+
+    def __init__(self, fetch_page, page_token_delay=0):
+        self._fetch_page = fetch_page
+        self.page_token_delay = page_token_delay
+        self.candidates = []
+        self.pages_fetched = 0
+        self.next_page_token = None
+        self.token_received_at = None
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def fetch_next_page(self, known_count=None):
+        """Fetch one more page; returns False when the stream has nothing more"""
+        with self._lock:
+            if known_count is not None and len(self.candidates) > known_count:
+                return True  # Another reader already fetched past this point
+            if self.exhausted:
+                return False
+            token = self.next_page_token if self.pages_fetched else None
+            if token and self.page_token_delay:
+                wait = self.token_received_at + self.page_token_delay - time.time()
+                if wait > 0:
+                    time.sleep(wait)
+            candidates, next_token = self._fetch_page(token, len(self.candidates))
+            self.pages_fetched += 1
+            self.candidates.extend(candidates)
+            self.next_page_token = next_token
+            self.token_received_at = time.time()
+            self.exhausted = not next_token
+            return True
+
+    def fetch_pages(self, max_pages):
+        """Keep fetching pages until the stream is exhausted or max_pages have been loaded"""
+        while self.pages_fetched < max_pages and self.fetch_next_page(known_count=len(self.candidates)):
+            pass
+        return len(self.candidates)
+
+    def iter_candidates(self, fetch_more=True):
+        """Yield candidates in rank order; with fetch_more=False, stop at what is already loaded"""
+        index = 0
+        while True:
+            while index < len(self.candidates):
+                yield self.candidates[index]
+                index += 1
+            if not fetch_more or not self.fetch_next_page(known_count=index):
+                return
+
+    def __iter__(self):
+        return self.iter_candidates()
+
+class CandidateSet:
+    """Keyword streams for one (craving, location), plus memoized card fetches
+
+    Filters and the top-N cut run as a lazy pass over the streams. Card data
+    (details + summary) is fetched at most once per place for the lifetime of
+    the set, no matter how many filter combinations show it. Card batches run
+    on executor; deep-search page fetches (which sleep on page tokens) run on
+    page_executor so they can't hold up other sessions' cards. origin is the
+    searched location's (lat, lng) the distances were measured from, or None
+    if it couldn't be resolved.
+    """
+
+    def __init__(self, streams, executor, page_executor=None, origin=None):
+        self.streams = streams
+        self.origin = origin
+        self._executor = executor
+        self._page_executor = page_executor or executor
+        self._cards = {}
+        self._page_futures = None
+        self._lock = threading.Lock()
+
+    @property
+    def candidates(self):
+        """Every candidate fetched so far, de-duplicated and in rank order (never fetches)"""
+        merged = {}
+        for stream in self.streams:
+            merge_candidates(merged, list(stream.candidates))
+        return rank_candidates(merged)
+
+    def top_places(self, min_rating=0, max_distance=None, max_price_level=None,
+                   limit=TOP_N_RESULTS, fetch_more=True):
+        """Run the lazy merge -> filter -> top-N pipeline, pulling pages only while needed
+
+        With fetch_more=False the pass only looks at pages that are already loaded.
+        """
+        ranked = merge_streams(self.streams, fetch_more)
+        return apply_filters(ranked, min_rating, max_distance, max_price_level, limit)
+
+    def fetch_more_pages(self, max_pages):
+        """Load further pages of every stream in the background (once per set)
+
+        Returns one future per stream; callers can poll top_places(fetch_more=False)
+        to pick up new candidates as each page lands.
+        """
+        with self._lock:
+            if self._page_futures is None:
+                self._page_futures = [
+                    self._page_executor.submit(stream.fetch_pages, max_pages)
+                    for stream in self.streams if not stream.exhausted
+                ]
+            return self._page_futures
+
+    def card_futures(self, places, fetch_batch, cache_if=None):
+        """Return card futures for places, fetching every not-yet-requested place in one job
+
+        fetch_batch(places) returns {place_id: card}. A place missing from its
+        result, or a failed job, fails just that place's future. Failed places,
+        and cards for which cache_if(card) is false, are not memoized - the
+        next call fetches them again.
+        """
+        with self._lock:
+            new_places = []
+            for place in places:
+                if place["place_id"] not in self._cards:
+                    self._cards[place["place_id"]] = Future()
+                    new_places.append(place)
+            futures = [self._cards[place["place_id"]] for place in places]
+        if new_places:
+            self._executor.submit(self._run_card_batch, new_places, fetch_batch, cache_if)
+        return futures
+
+    def _forget_card(self, place_id, future):
+        with self._lock:
+            if self._cards.get(place_id) is future:
+                del self._cards[place_id]
+
+    def _run_card_batch(self, places, fetch_batch, cache_if=None):
+        try:
+            cards = fetch_batch(places)
+        except Exception as e:
+            cards, error = {}, e
+        else:
+            error = KeyError("place missing from card batch")
+        for place in places:
+            place_id = place["place_id"]
+            future = self._cards[place_id]
+            if place_id in cards and (cache_if is None or cache_if(cards[place_id])):
+                future.set_result(cards[place_id])
+                continue
+            self._forget_card(place_id, future)
+            if place_id in cards:
+                future.set_result(cards[place_id])
+            else:
+                future.set_exception(error)
+
+# Global card fetch pool - bounded across all sessions in the process
+card_executor = None
+_instance_lock = threading.Lock()
+
+def get_card_executor(max_workers=16):
+    """Get the process-wide thread pool used for details + summary fetches"""
+    global card_executor
+    with _instance_lock:
+        if card_executor is None:
+            card_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cravemap-card")
+    return card_executor
+
+# Global pool for long-running background work - streamed AI summaries and
+# deep-search page fetches - kept apart so it never queues card fetches
+background_executor = None
+
+def get_background_executor(max_workers=16):
+    """Get the process-wide thread pool for summary streams and deep-search pages"""
+    global background_executor
+    with _instance_lock:
+        if background_executor is None:
+            background_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cravemap-background")
+    return background_executor
@@ -1,9 +1,17 @@
-import sqlite3
 import time
 from datetime import datetime, timedelta
 import hashlib
 import json
 from collections import defaultdict
+from sqlite_connections import sqlite_connection
+
+def to_epoch(dt):
+    """Unix epoch seconds for a naive local datetime (the ISO TEXT columns hold local time)
+
+    Same value as int(time.time()) at that moment, and as the backfill's
+    strftime('%s', iso_text, 'utc').
+    """
+    return int(dt.timestamp())
 
 class SpamProtection:
     """Advanced spam protection and monitoring system"""
@@ -14,7 +22,7 @@ class SpamProtection:
         
     def init_tables(self):
         """Initialize spam protection tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite_connection(self.db_path) as conn:
             # Rate limiting table (enhanced)
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS rate_limits_advanced (
@@ -25,7 +33,8 @@ class SpamProtection:
                     first_request_today TEXT,
                     is_flagged BOOLEAN DEFAULT 0,
                     flag_reason TEXT,
-                    created_at TEXT
+                    created_at TEXT,
+                    last_request_epoch INTEGER
                 )
             ''')
             
@@ -39,7 +48,8 @@ class SpamProtection:
                     severity TEXT,
                     timestamp TEXT,
                     ip_address TEXT,
-                    user_agent TEXT
+                    user_agent TEXT,
+                    ts_epoch INTEGER
                 )
             ''')
             
@@ -56,6 +66,51 @@ class SpamProtection:
             ''')
             
             conn.commit()
+        
+        self.migrate_epoch_columns()
+    
+    def migrate_epoch_columns(self):
+        """Add integer epoch columns next to the ISO timestamps, backfill them and index them
+
+        Range filters on the epoch columns are index seeks; on the ISO TEXT
+        columns every query scanned the table. Safe to run on every start.
+        """
+        with sqlite_connection(self.db_path) as conn:
+            activity_columns = [col[1] for col in conn.execute("PRAGMA table_info(suspicious_activity)")]
+            if 'ts_epoch' not in activity_columns:
+                conn.execute('ALTER TABLE suspicious_activity ADD COLUMN ts_epoch INTEGER')
+                conn.execute('''
+                    UPDATE suspicious_activity SET ts_epoch = CAST(strftime('%s', timestamp, 'utc') AS INTEGER)
+                ''')
+                print("✅ Added suspicious_activity.ts_epoch")
+            
+            rate_columns = [col[1] for col in conn.execute("PRAGMA table_info(rate_limits_advanced)")]
+            if 'last_request_epoch' not in rate_columns:
+                conn.execute('ALTER TABLE rate_limits_advanced ADD COLUMN last_request_epoch INTEGER')
+                conn.execute('''
+                    UPDATE rate_limits_advanced SET last_request_epoch = CAST(strftime('%s', last_request, 'utc') AS INTEGER)
+                ''')
+                print("✅ Added rate_limits_advanced.last_request_epoch")
+            
+            # Bot detection: one fingerprint's recent activity, newest first
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_suspicious_activity_fingerprint_ts
+                ON suspicious_activity (fingerprint, ts_epoch)
+            ''')
+            # Admin stats: 24h counts by type and severity straight from the index
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_suspicious_activity_ts
+                ON suspicious_activity (ts_epoch, activity_type, severity)
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_rate_limits_last_request
+                ON rate_limits_advanced (last_request_epoch)
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_rate_limits_flagged
+                ON rate_limits_advanced (is_flagged) WHERE is_flagged = 1
+            ''')
+            conn.commit()
     
     def generate_fingerprint(self, ip, user_agent, additional_data=None):
         """Generate unique fingerprint for rate limiting"""
@@ -70,8 +125,7 @@ class SpamProtection:
         hour_ago = now - timedelta(hours=1)
         day_ago = now - timedelta(days=1)
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with sqlite_connection(self.db_path) as conn:
             
             # Get current limits
             row = conn.execute(
@@ -104,17 +158,18 @@ class SpamProtection:
                 # Update counters
                 conn.execute('''
                     UPDATE rate_limits_advanced 
-                    SET search_count_1h = ?, search_count_24h = ?, last_request = ?
+                    SET search_count_1h = ?, search_count_24h = ?, last_request = ?, last_request_epoch = ?
                     WHERE fingerprint = ?
-                ''', (search_1h + 1, search_24h + 1, now.isoformat(), fingerprint))
+                ''', (search_1h + 1, search_24h + 1, now.isoformat(), to_epoch(now), fingerprint))
                 
             else:
                 # First request
                 conn.execute('''
                     INSERT INTO rate_limits_advanced 
-                    (fingerprint, search_count_1h, search_count_24h, last_request, first_request_today, created_at)
-                    VALUES (?, 1, 1, ?, ?, ?)
-                ''', (fingerprint, now.isoformat(), now.isoformat(), now.isoformat()))
+                    (fingerprint, search_count_1h, search_count_24h, last_request, first_request_today,
+                     created_at, last_request_epoch)
+                    VALUES (?, 1, 1, ?, ?, ?, ?)
+                ''', (fingerprint, now.isoformat(), now.isoformat(), now.isoformat(), to_epoch(now)))
             
             conn.commit()
             return True, None
@@ -152,16 +207,15 @@ class SpamProtection:
     
     def detect_bot_behavior(self, fingerprint, ip, user_agent):
         """Detect automated/bot behavior"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with sqlite_connection(self.db_path) as conn:
             
             # Check request patterns in last hour
-            hour_ago = (datetime.now() - timedelta(hours=1)).isoformat()
+            hour_ago = to_epoch(datetime.now() - timedelta(hours=1))
             
             activities = conn.execute('''
                 SELECT COUNT(*) as count, MIN(timestamp) as first, MAX(timestamp) as last
                 FROM suspicious_activity 
-                WHERE fingerprint = ? AND timestamp > ?
+                WHERE fingerprint = ? AND ts_epoch > ?
             ''', (fingerprint, hour_ago)).fetchone()
             
             if activities['count'] > 10:  # More than 10 suspicious activities in an hour
@@ -171,8 +225,8 @@ class SpamProtection:
             # Check for very regular timing (bot-like)
             recent_requests = conn.execute('''
                 SELECT timestamp FROM suspicious_activity 
-                WHERE fingerprint = ? AND timestamp > ?
-                ORDER BY timestamp DESC LIMIT 5
+                WHERE fingerprint = ? AND ts_epoch > ?
+                ORDER BY ts_epoch DESC LIMIT 5
             ''', (fingerprint, hour_ago)).fetchall()
             
             if len(recent_requests) >= 5:
@@ -191,18 +245,19 @@ class SpamProtection:
     
     def log_suspicious_activity(self, fingerprint, activity_type, details, severity, ip, user_agent):
         """Log suspicious activity for monitoring"""
-        with sqlite3.connect(self.db_path) as conn:
+        now = datetime.now()
+        with sqlite_connection(self.db_path) as conn:
             conn.execute('''
                 INSERT INTO suspicious_activity 
-                (fingerprint, activity_type, details, severity, timestamp, ip_address, user_agent)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                (fingerprint, activity_type, details, severity, timestamp, ip_address, user_agent, ts_epoch)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             ''', (fingerprint, activity_type, details, severity, 
-                  datetime.now().isoformat(), ip, user_agent))
+                  now.isoformat(), ip, user_agent, to_epoch(now)))
             conn.commit()
     
     def flag_user(self, fingerprint, reason, ip, user_agent):
         """Flag a user for review"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite_connection(self.db_path) as conn:
             conn.execute('''
                 UPDATE rate_limits_advanced 
                 SET is_flagged = 1, flag_reason = ?
@@ -216,7 +271,7 @@ class SpamProtection:
     
     def is_flagged(self, fingerprint):
         """Check if user is flagged"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite_connection(self.db_path) as conn:
             row = conn.execute(
                 "SELECT is_flagged, flag_reason FROM rate_limits_advanced WHERE fingerprint = ?",
                 (fingerprint,)
@@ -228,15 +283,14 @@ class SpamProtection:
     
     def get_admin_stats(self):
         """Get spam protection statistics for admin dashboard"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with sqlite_connection(self.db_path) as conn:
             
             # Last 24 hours stats
-            day_ago = (datetime.now() - timedelta(days=1)).isoformat()
+            day_ago = to_epoch(datetime.now() - timedelta(days=1))
             
             stats = {
                 'total_requests_24h': conn.execute(
-                    "SELECT COUNT(*) FROM rate_limits_advanced WHERE last_request > ?", 
+                    "SELECT COUNT(*) FROM rate_limits_advanced WHERE last_request_epoch > ?", 
                     (day_ago,)
                 ).fetchone()[0],
                 
@@ -245,12 +299,12 @@ class SpamProtection:
                 ).fetchone()[0],
                 
                 'suspicious_activities_24h': conn.execute(
-                    "SELECT COUNT(*) FROM suspicious_activity WHERE timestamp > ?", 
+                    "SELECT COUNT(*) FROM suspicious_activity WHERE ts_epoch > ?", 
                     (day_ago,)
                 ).fetchone()[0],
                 
                 'high_severity_24h': conn.execute(
-                    "SELECT COUNT(*) FROM suspicious_activity WHERE timestamp > ? AND severity = 'high'", 
+                    "SELECT COUNT(*) FROM suspicious_activity WHERE ts_epoch > ? AND severity = 'high'", 
                     (day_ago,)
                 ).fetchone()[0]
             }
@@ -259,7 +313,7 @@ class SpamProtection:
             recent_activities = conn.execute('''
                 SELECT activity_type, COUNT(*) as count 
                 FROM suspicious_activity 
-                WHERE timestamp > ? 
+                WHERE ts_epoch > ? 
                 GROUP BY activity_type 
                 ORDER BY count DESC
             ''', (day_ago,)).fetchall()
@@ -270,12 +324,12 @@ class SpamProtection:
     
     def cleanup_old_data(self, days=30):
         """Clean up old spam protection data"""
-        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        cutoff = to_epoch(datetime.now() - timedelta(days=days))
         
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite_connection(self.db_path) as conn:
             # Clean old suspicious activities
             deleted = conn.execute(
-                "DELETE FROM suspicious_activity WHERE timestamp < ?", 
+                "DELETE FROM suspicious_activity WHERE ts_epoch < ?", 
                 (cutoff,)
             ).rowcount
             
@@ -283,7 +337,7 @@ class SpamProtection:
             conn.execute('''
                 UPDATE rate_limits_advanced 
                 SET search_count_1h = 0, search_count_24h = 0 
-                WHERE last_request < ?
+                WHERE last_request_epoch < ?
             ''', (cutoff,))
             
             conn.commit()
@@ -0,0 +1,114 @@
+"""
+Shared SQLite connection layer for CraveMap
+One persistent connection per thread and database file, in WAL mode with
+tuned pragmas and a busy timeout, so concurrent Streamlit sessions don't
+serialize on (or fail with) "database is locked". Every module that opens
+cravemap.db goes through here: CraveMapDB, SpamProtection, BackupManager and
+the places, summary, model health and LLM usage tables.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# How long a writer waits for another session's write lock before failing
+BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+PRAGMAS = (
+    # Readers no longer block the writer (and vice versa); persistent per file
+    "PRAGMA journal_mode=WAL",
+    # Safe with WAL: a power loss may drop the last commits but never corrupts
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-8000",  # ~8 MB page cache per connection
+    "PRAGMA mmap_size=67108864",  # Map up to 64 MB of the file
+    "PRAGMA temp_store=MEMORY",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+)
+
+_local = threading.local()
+# Bumped whenever a database file is deliberately replaced (backup restore)
+_generations = {}
+_generations_lock = threading.Lock()
+
+def _thread_connections():
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    return connections
+
+def open_connection(db_path):
+    """Open a tuned connection (writes take the lock up front with BEGIN IMMEDIATE)"""
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level="IMMEDIATE")
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def _file_id(db_path):
+    try:
+        stat = os.stat(db_path)
+    except OSError:
+        return None
+    return (stat.st_dev, stat.st_ino)
+
+def _generation(key):
+    with _generations_lock:
+        return _generations.get(key, 0)
+
+def invalidate_connections(db_path):
+    """Make every thread reopen db_path on its next use (call after replacing the file)
+
+    The inode check alone can miss a replacement - a new file may get the
+    freed inode number of the one it replaced.
+    """
+    key = os.path.abspath(db_path)
+    with _generations_lock:
+        _generations[key] = _generations.get(key, 0) + 1
+    close_thread_connections(db_path)
+
+def get_thread_connection(db_path="cravemap.db"):
+    """This thread's persistent connection to db_path (opened on first use)
+
+    If the file was deleted or replaced since (e.g. a backup restore), the
+    old connection is closed and a new one opened on the current file.
+    """
+    key = os.path.abspath(db_path)
+    generation = _generation(key)
+    connections = _thread_connections()
+    entry = connections.get(key)
+    if entry is not None:
+        conn, file_id, opened_generation = entry
+        if file_id is not None and file_id == _file_id(db_path) and opened_generation == generation:
+            return conn
+        conn.close()
+    conn = open_connection(db_path)
+    connections[key] = (conn, _file_id(db_path), generation)
+    return conn
+
+@contextmanager
+def sqlite_connection(db_path="cravemap.db"):
+    """Context manager for this thread's connection to db_path
+
+    The connection stays open afterwards. An exception rolls back the open
+    transaction; a transaction left open on success is committed so the
+    write lock is never held between calls.
+    """
+    conn = get_thread_connection(db_path)
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        if conn.in_transaction:
+            conn.commit()
+
+def close_thread_connections(db_path=None):
+    """Close this thread's connections (all of them, or just db_path's)"""
+    connections = _thread_connections()
+    keys = [os.path.abspath(db_path)] if db_path else list(connections)
+    for key in keys:
+        entry = connections.pop(key, None)
+        if entry is not None:
+            entry[0].close()
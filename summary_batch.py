@@ -0,0 +1,126 @@
+"""
+Batched review summarization for CraveMap
+Builds one prompt covering every shortlisted place and parses the per-place
+JSON answer back (also while it is still streaming in), so a search costs one
+LLM round trip instead of one per place
+"""
+
+import json
+import re
+
+BATCH_SYSTEM_PROMPT = (
+    "You are an expert at summarizing restaurant reviews and identifying popular dishes. "
+    "Be concise but informative. Always answer with a single JSON object and nothing else."
+)
+
+def build_batch_prompt(entries):
+    """Build one prompt for [(place_name, review_texts), ...]; places are numbered from 1"""
+    sections = []
+    for number, (name, review_texts) in enumerate(entries, 1):
+        joined = "\n".join(f"- {text}" for text in review_texts)
+        sections.append(f"### Place {number}: {name}\n{joined}")
+
+    keys = ", ".join(f'"{number}": "..."' for number in range(1, len(entries) + 1))
+    return f"""
+    For each restaurant below, summarize what people like about it in 2 sentences, and list the top 1-2 most frequently mentioned dishes, based only on its own Google reviews.
+
+    Answer with a JSON object mapping each place number to its summary, like {{{keys}}}.
+
+    {chr(10).join(sections)}
+    """
+
+def parse_batch_response(text, count):
+    """Parse a batched answer into a list of `count` summaries (None where a place is missing)
+
+    Tolerates code fences and chatter around the JSON object. Any place the
+    model skipped, or answered with a non-string, comes back as None.
+    """
+    summaries = [None] * count
+    if not text:
+        return summaries
+
+    # Pull out the outermost {...} - models like to wrap JSON in ```json fences or prose
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        return summaries
+    try:
+        data = json.loads(match.group(0))
+    except ValueError:
+        return summaries
+    if not isinstance(data, dict):
+        return summaries
+
+    for key, value in data.items():
+        digits = re.sub(r"\D", "", str(key))  # Accept "1", "place 1", "Place 1"...
+        if not digits:
+            continue
+        index = int(digits) - 1
+        if 0 <= index < count and isinstance(value, str) and value.strip():
+            summaries[index] = value.strip()
+    return summaries
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+def _scan_string(text, start):
+    """Decode a JSON string starting after its opening quote; returns (value, end, closed)
+
+    Stops cleanly at the end of partial input, dropping a half-received escape.
+    """
+    chars = []
+    i = start
+    while i < len(text):
+        char = text[i]
+        if char == '"':
+            return "".join(chars), i + 1, True
+        if char == "\\":
+            if i + 1 >= len(text):
+                break
+            code = text[i + 1]
+            if code == "u":
+                if i + 6 > len(text):
+                    break
+                try:
+                    chars.append(chr(int(text[i + 2:i + 6], 16)))
+                except ValueError:
+                    pass
+                i += 6
+                continue
+            chars.append(_ESCAPES.get(code, code))
+            i += 2
+            continue
+        chars.append(char)
+        i += 1
+    return "".join(chars), len(text), False
+
+def parse_partial_batch(text, count):
+    """Best-effort parse of a batched answer that is still streaming in
+
+    Returns a list of `count` summaries so far (None for places not started),
+    including the partial text of the value currently being received.
+    """
+    summaries = [None] * count
+    start = (text or "").find("{")
+    if start < 0:
+        return summaries
+
+    i = start + 1
+    key = None
+    while i < len(text):
+        char = text[i]
+        if char != '"':
+            i += 1
+            continue
+        value, i, closed = _scan_string(text, i + 1)
+        if key is None:
+            if not closed:
+                break
+            key = value
+            continue
+        digits = re.sub(r"\D", "", key)
+        index = int(digits) - 1 if digits else -1
+        if 0 <= index < count and value.strip():
+            summaries[index] = value.strip()
+        key = None
+        if not closed:
+            break
+    return summaries
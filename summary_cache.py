@@ -0,0 +1,104 @@
+"""
+Review summary caching for CraveMap
+Persists AI summaries keyed by place_id plus a hash of the review texts, so a
+place is only re-summarized when its reviews actually change
+"""
+
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from places_cache import MemoryLRU
+from sqlite_connections import sqlite_connection
+
+def hash_reviews(reviews):
+    """Stable hash of the review texts (order-independent - Google reorders reviews)"""
+    texts = sorted(" ".join(r.get("text", "").split()) for r in reviews if r.get("text"))
+    return hashlib.sha256("\n".join(texts).encode("utf-8")).hexdigest()
+
+class ReviewSummaryCache:
+    """Two-tier summary cache: in-process LRU in front of a SQLite table
+
+    One row per place holds the latest summary and the hash of the reviews it
+    was generated from. A lookup only hits when the hash still matches.
+    """
+
+    def __init__(self, db_path="cravemap.db", max_memory_entries=1024):
+        self.db_path = db_path
+        self._memory = MemoryLRU(max_memory_entries)  # place_id -> (reviews_hash, summary)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.init_tables()
+
+    def init_tables(self):
+        """Initialize review summary cache table"""
+        with sqlite_connection(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS review_summary_cache (
+                    place_id TEXT PRIMARY KEY,
+                    reviews_hash TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    created_at TEXT
+                )
+            ''')
+            conn.commit()
+
+    def lookup(self, place_id, reviews):
+        """Return the cached summary for these reviews, or None"""
+        reviews_hash = hash_reviews(reviews)
+        summary = None
+        entry = self._memory.get(place_id)
+        if entry:
+            if entry[0] == reviews_hash:
+                summary = entry[1]
+        else:
+            try:
+                with sqlite_connection(self.db_path) as conn:
+                    row = conn.execute(
+                        "SELECT reviews_hash, summary FROM review_summary_cache WHERE place_id = ?",
+                        (place_id,)
+                    ).fetchone()
+            except sqlite3.Error as e:
+                print(f"⚠️ Review summary cache read failed: {e}")
+                row = None
+            if row:
+                self._memory.put(place_id, (row[0], row[1]))
+                if row[0] == reviews_hash:
+                    summary = row[1]
+
+        with self._lock:
+            if summary is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return summary
+
+    def store(self, place_id, reviews, summary):
+        """Cache a summary, replacing any older one for this place"""
+        if not place_id or not summary:
+            return
+        reviews_hash = hash_reviews(reviews)
+        self._memory.put(place_id, (reviews_hash, summary))
+        try:
+            with sqlite_connection(self.db_path) as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO review_summary_cache
+                    (place_id, reviews_hash, summary, created_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (place_id, reviews_hash, summary, datetime.now().isoformat()))
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Review summary cache write failed: {e}")
+
+# Global instance
+review_summary_cache = None
+_instance_lock = threading.Lock()
+
+def get_review_summary_cache():
+    """Get the process-wide review summary cache"""
+    global review_summary_cache
+    with _instance_lock:
+        if review_summary_cache is None:
+            review_summary_cache = ReviewSummaryCache()
+    return review_summary_cache
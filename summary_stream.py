@@ -0,0 +1,48 @@
+"""
+Streaming summary hand-off for CraveMap
+A worker thread writes the summary text as tokens arrive; the Streamlit script
+thread polls every card's stream for new snapshots and redraws the cards that
+changed, so no st.* call ever runs off the script thread
+"""
+
+import threading
+
+class SummaryStream:
+    """Latest text of one streaming summary, with restart and completion signals"""
+
+    def __init__(self):
+        self._text = ""
+        self._version = 0
+        self._done = False
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        with self._lock:
+            return self._done
+
+    @property
+    def text(self):
+        with self._lock:
+            return self._text
+
+    def update(self, text):
+        """Replace the text so far (called by the producer as tokens arrive)"""
+        with self._lock:
+            if self._done or text == self._text:
+                return
+            self._text = text
+            self._version += 1
+
+    def finish(self, text=None):
+        """Mark the stream complete, optionally replacing the text with the final summary"""
+        with self._lock:
+            if text is not None:
+                self._text = text
+            self._done = True
+            self._version += 1
+
+    def snapshot(self):
+        """Return (version, text, done) without waiting; version changes on every update"""
+        with self._lock:
+            return self._version, self._text, self._done
@@ -0,0 +1,117 @@
+import threading
+import time
+import pytest
+from connection_pool import ConnectionPool, PoolTimeout
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query):
+        if self.conn.dead:
+            self.conn.closed = 1
+            raise Exception("server closed the connection unexpectedly")
+        self.conn.pings += 1
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    """DB-API-shaped connection that can be killed server-side"""
+
+    def __init__(self):
+        self.closed = 0
+        self.dead = False
+        self.pings = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+def make_pool(**kwargs):
+    opened = []
+
+    def connect():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+    return ConnectionPool(connect, **kwargs), opened
+
+def test_connections_are_reused():
+    """Test that sequential checkouts share one connection"""
+    pool, opened = make_pool(max_size=3)
+    for _ in range(5):
+        with pool.connection() as conn:
+            assert not conn.closed
+    assert len(opened) == 1
+    assert pool.stats()["reused"] == 4
+    assert pool.stats()["idle"] == 1
+    print("✅ Pooled connections are reused")
+
+def test_max_size_blocks_then_times_out():
+    """Test that checkouts beyond max_size wait for a returned connection"""
+    pool, opened = make_pool(max_size=2, checkout_timeout=0.2)
+    first, second = pool.checkout(), pool.checkout()
+    with pytest.raises(PoolTimeout):
+        pool.checkout()
+
+    threading.Timer(0.05, pool.checkin, args=(first,)).start()
+    third = pool.checkout()
+    assert third.conn is first.conn, "Waiter should get the returned connection"
+    assert len(opened) == 2
+    print("✅ Pool caps open connections")
+
+def test_health_check_replaces_dead_connection():
+    """Test that a connection killed while idle is replaced on checkout"""
+    pool, opened = make_pool(health_check_after=0)
+    with pool.connection() as conn:
+        pass
+    opened[0].dead = True
+    with pool.connection() as conn:
+        assert conn is opened[1]
+    assert opened[0].closed
+    assert pool.stats()["open"] == 1
+    print("✅ Dead connections are replaced on checkout")
+
+def test_idle_recycling_keeps_min_size():
+    """Test that idle connections beyond min_size are closed"""
+    pool, opened = make_pool(min_size=1, max_size=5, max_idle_seconds=0.05)
+    entries = [pool.checkout() for _ in range(3)]
+    for entry in entries:
+        pool.checkin(entry)
+    assert pool.stats()["idle"] == 3
+
+    time.sleep(0.1)
+    with pool.connection():
+        pass
+    assert pool.stats()["open"] == 1, "Idle extras should be closed down to min_size"
+    assert sum(1 for conn in opened if conn.closed) == 2
+    print("✅ Idle connections are recycled")
+
+def test_broken_connection_is_discarded():
+    """Test that a connection that dies mid-query is not returned to the pool"""
+    pool, opened = make_pool()
+    with pytest.raises(Exception):
+        with pool.connection() as conn:
+            conn.dead = True
+            conn.cursor().execute("SELECT * FROM users")
+    assert pool.stats()["open"] == 0
+    with pool.connection() as conn:
+        assert conn is opened[1]
+    print("✅ Broken connections are discarded")
+
+if __name__ == "__main__":
+    test_connections_are_reused()
+    test_max_size_blocks_then_times_out()
+    test_health_check_replaces_dead_connection()
+    test_idle_recycling_keeps_min_size()
+    test_broken_connection_is_discarded()
@@ -0,0 +1,39 @@
+from extractive_summary import extractive_summary, representative_sentences, top_dishes
+
+REVIEWS = [
+    "The chicken rice here is fragrant and the chicken is silky smooth. Parking is tough.",
+    "Came for the chicken rice, stayed for the chilli sauce. The rice is cooked in rich stock.",
+    "Queue was long. Their chicken rice and roast pork are worth the wait though!",
+    "Tried the laksa this time, broth was a bit thin compared to the chicken rice.",
+    "Great!",
+]
+
+def test_top_dishes():
+    """Test dish counting against the food lexicon (once per review)"""
+    assert top_dishes(REVIEWS) == ["chicken rice", "roast pork"]
+    assert top_dishes(["The Hainanese chicken rice was great"]) == ["hainanese chicken rice"]
+    assert top_dishes(["Nice staff and clean tables"]) == []
+    print("✅ Dishes counted from the lexicon")
+
+def test_representative_sentences():
+    """Test that central, food-focused sentences are picked and repeats skipped"""
+    sentences = representative_sentences(REVIEWS, limit=2)
+    assert len(sentences) == 2
+    assert all("chicken rice" in s.lower() or "rice" in s.lower() for s in sentences)
+    assert "Parking is tough." not in sentences and "Queue was long." not in sentences
+    print("✅ Representative sentences favour the food")
+
+def test_extractive_summary():
+    """Test the combined offline summary and empty input"""
+    summary = extractive_summary(REVIEWS)
+    assert "Most mentioned: chicken rice" in summary
+    assert summary.count("“") == 2
+    assert extractive_summary([]) == ""
+    assert extractive_summary(["Great!", ""]) == ""
+    print("✅ Offline summary works without any network")
+
+if __name__ == "__main__":
+    test_top_dishes()
+    test_representative_sentences()
+    test_extractive_summary()
+    print("\n🎉 All extractive summary tests passed!")
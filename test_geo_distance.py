@@ -0,0 +1,58 @@
+import math
+import numpy as np
+from geo_distance import batch_distances_km, bounding_box_mask, haversine_km
+
+ORCHARD_ROAD = (1.3048, 103.8318)
+
+def test_haversine_known_distances():
+    """Test scalar haversine against known Singapore distances"""
+    assert abs(haversine_km(*ORCHARD_ROAD, 1.2807, 103.8559) - 3.79) < 0.05   # Marina Bay
+    assert abs(haversine_km(*ORCHARD_ROAD, 1.3644, 103.9915) - 18.96) < 0.1   # Changi Airport
+    assert haversine_km(*ORCHARD_ROAD, *ORCHARD_ROAD) == 0
+    print("✅ Scalar haversine matches known distances")
+
+def test_batch_matches_scalar():
+    """Test vectorized distances against the scalar formula"""
+    rng = np.random.default_rng(42)
+    lats = ORCHARD_ROAD[0] + rng.uniform(-0.5, 0.5, 500)
+    lngs = ORCHARD_ROAD[1] + rng.uniform(-0.5, 0.5, 500)
+
+    distances = batch_distances_km(ORCHARD_ROAD, lats, lngs)
+    expected = [haversine_km(*ORCHARD_ROAD, lat, lng) for lat, lng in zip(lats, lngs)]
+    assert np.allclose(distances, expected, atol=1e-6)
+    print("✅ Batch distances match scalar haversine for 500 points")
+
+def test_prefilter_and_missing_coordinates():
+    """Test max_km cut-off, bounding box prefilter and missing coordinates"""
+    lats = [1.2807, 1.3644, None, 35.6762]
+    lngs = [103.8559, 103.9915, 103.8, 139.6503]  # Marina Bay, Changi, no lat, Tokyo
+
+    distances = batch_distances_km(ORCHARD_ROAD, lats, lngs, max_km=10)
+    assert abs(distances[0] - 3.79) < 0.05
+    assert math.isinf(distances[1]), "Changi is beyond 10 km"
+    assert math.isnan(distances[2]), "Missing coordinates should be NaN"
+    assert math.isinf(distances[3]), "Tokyo should be dropped by the bounding box"
+
+    mask = bounding_box_mask(ORCHARD_ROAD, np.array([1.2807, 35.6762]), np.array([103.8559, 139.6503]), 10)
+    assert mask.tolist() == [True, False]
+    print("✅ Bounding box prefilter and max_km cut-off work")
+
+def test_bounding_box_never_drops_in_range_points():
+    """Test that the box is conservative, including near the poles and antimeridian"""
+    for origin in [ORCHARD_ROAD, (64.1466, -21.9426), (-16.5, 179.99)]:
+        bearings = np.radians(np.arange(0, 360, 5))
+        # Points ~9.9 km away in every direction
+        dlat = 9.9 / 111.2 * np.cos(bearings)
+        dlng = 9.9 / (111.2 * math.cos(math.radians(origin[0]))) * np.sin(bearings)
+        lats = origin[0] + dlat
+        lngs = (origin[1] + dlng + 180) % 360 - 180
+        distances = batch_distances_km(origin, lats, lngs, max_km=10)
+        assert np.all(np.isfinite(distances)), f"In-range points dropped near {origin}"
+    print("✅ Bounding box is conservative near poles and the antimeridian")
+
+if __name__ == "__main__":
+    test_haversine_known_distances()
+    test_batch_matches_scalar()
+    test_prefilter_and_missing_coordinates()
+    test_bounding_box_never_drops_in_range_points()
+    print("\n🎉 All distance engine tests passed!")
@@ -0,0 +1,80 @@
+import requests
+from google_maps_client import GoogleMapsClient, GoogleMapsError, RetryBudget
+
+class FakeResponse:
+    def __init__(self, status_code=200, data=None):
+        self.status_code = status_code
+        self._data = data or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self._data
+
+class FakeSession:
+    """Replays a scripted list of responses/exceptions and records each call"""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append((url, params, timeout))
+        outcome = self.script.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+def make_client(script, budget=None):
+    client = GoogleMapsClient("test-key", backoff_base=0, retry_budget=budget)
+    client.session = FakeSession(script)
+    return client
+
+def test_google_maps_client():
+    """Test endpoint URLs, timeouts, retries and the retry budget"""
+    # Test 1: Successful call adds key and per-endpoint timeout
+    client = make_client([FakeResponse(data={"status": "OK", "result": {}})])
+    data = client.get("details", {"place_id": "abc"})
+    url, params, timeout = client.session.calls[0]
+    assert data["status"] == "OK"
+    assert url.endswith("/place/details/json")
+    assert params == {"place_id": "abc", "key": "test-key"}
+    assert timeout == (3.05, 6)
+    print("✅ Test 1 passed: Requests carry key and endpoint timeout")
+
+    # Test 2: Transient failures are retried
+    client = make_client([
+        requests.Timeout("slow"),
+        FakeResponse(503),
+        FakeResponse(data={"status": "OK", "results": []}),
+    ])
+    assert client.get("textsearch", {"query": "sushi"})["status"] == "OK"
+    assert len(client.session.calls) == 3
+    print("✅ Test 2 passed: Timeouts and 5xx are retried")
+
+    # Test 3: Non-retryable errors fail immediately
+    client = make_client([FakeResponse(403)])
+    try:
+        client.get("details", {"place_id": "abc"})
+        assert False, "403 should raise"
+    except GoogleMapsError:
+        pass
+    assert len(client.session.calls) == 1
+    print("✅ Test 3 passed: 4xx errors are not retried")
+
+    # Test 4: An empty retry budget stops retries
+    empty_budget = RetryBudget(min_tokens=0, retry_ratio=0)
+    client = make_client([requests.ConnectionError("down")] * 3, budget=empty_budget)
+    try:
+        client.get("findplacefromtext", {"input": "Orchard Road"})
+        assert False, "Exhausted budget should raise"
+    except GoogleMapsError:
+        pass
+    assert len(client.session.calls) == 1
+    print("✅ Test 4 passed: Retry budget limits retries")
+
+if __name__ == "__main__":
+    test_google_maps_client()
+    print("\n🎉 All Google Maps client tests passed!")
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import CancelledError
+from types import SimpleNamespace
+from llm_gateway import AsyncLLMGateway, LimiterSaturated, TokenBucket
+from llm_hedge import CancelToken
+from model_router import classify_error
+
+class FakeAsyncCompletions:
+    """AsyncOpenAI-shaped fake: answers after `delay`, streams word by word"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def create(self, model, messages, temperature, max_tokens, stream=False, stream_options=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        words = f"{model} says hello".split()
+        if stream:
+            async def chunks():
+                for word in words:
+                    yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "))])
+                if stream_options and stream_options.get("include_usage"):
+                    yield SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=12, completion_tokens=3))
+            return chunks()
+        message = SimpleNamespace(content=" ".join(words))
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=3)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+def make_gateway(delay=0.0, **kwargs):
+    completions = FakeAsyncCompletions(delay)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return AsyncLLMGateway(lambda: client, **kwargs), completions
+
+def test_token_bucket():
+    """Test burst capacity and refill"""
+    bucket = TokenBucket(rate_per_minute=600, burst=2)  # 10 tokens/second
+    assert bucket.try_take() and bucket.try_take()
+    assert not bucket.try_take(), "Burst should be used up"
+    time.sleep(0.15)
+    assert bucket.try_take(), "Bucket should refill over time"
+    print("✅ Token bucket limits bursts and refills")
+
+def test_gateway_complete_and_stream():
+    """Test blocking completion and streaming through the event loop"""
+    gateway, _ = make_gateway()
+    usage = {}
+    assert gateway.complete("m1", [{"role": "user", "content": "hi"}], usage=usage) == "m1 says hello"
+    assert usage == {"prompt_tokens": 10, "completion_tokens": 3}
+
+    seen = []
+    usage = {}
+    text = gateway.stream("m2", [{"role": "user", "content": "hi"}], seen.append, usage=usage)
+    assert text.strip() == "m2 says hello"
+    assert seen[0] == "m2 " and seen[-1] == text
+    assert usage == {"prompt_tokens": 12, "completion_tokens": 3}
+    assert gateway.in_flight == 0
+    print("✅ Async completions and streams work from sync callers")
+
+def test_gateway_fails_fast_when_saturated():
+    """Test that calls beyond the concurrency cap or rate budget fail fast"""
+    gateway, completions = make_gateway(delay=0.5, max_concurrency=2, requests_per_minute=600, burst=10)
+    results = []
+
+    def session():
+        started = time.time()
+        try:
+            gateway.complete("m", [], timeout=5)
+            results.append(("ok", time.time() - started))
+        except LimiterSaturated as e:
+            results.append(("saturated", time.time() - started))
+            assert classify_error(e) == "limiter"
+
+    threads = [threading.Thread(target=session) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(r[0] for r in results).count("ok") == 2
+    assert all(elapsed < 0.45 for outcome, elapsed in results if outcome == "saturated"), "Should not queue"
+    assert completions.calls == 2
+
+    # Rate budget: a tiny bucket rejects the third call immediately
+    gateway, _ = make_gateway(requests_per_minute=1, burst=2)
+    gateway.complete("m", [])
+    gateway.complete("m", [])
+    try:
+        gateway.complete("m", [])
+        assert False, "Rate budget should be exhausted"
+    except LimiterSaturated:
+        pass
+    print("✅ Saturated limiter fails fast instead of queueing")
+
+def test_cancel_releases_slot():
+    """Test that cancelling a running call frees its concurrency slot at once"""
+    gateway, completions = make_gateway(delay=5, max_concurrency=1, requests_per_minute=600, burst=10)
+    cancel = CancelToken()
+    errors = []
+
+    def session():
+        try:
+            gateway.complete("slow", [], timeout=10, cancel=cancel)
+        except CancelledError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=session)
+    thread.start()
+    while gateway.in_flight == 0:
+        time.sleep(0.01)
+    started = time.time()
+    cancel.cancel()
+    thread.join(2)
+    assert errors and time.time() - started < 1, "The caller should be released right away"
+    time.sleep(0.05)
+    assert gateway.in_flight == 0, "The cancelled call should give back its slot"
+    print("✅ Cancelled calls release their slot")
+
+if __name__ == "__main__":
+    test_token_bucket()
+    test_gateway_complete_and_stream()
+    test_gateway_fails_fast_when_saturated()
+    test_cancel_releases_slot()
+    print("\n🎉 All LLM gateway tests passed!")
@@ -0,0 +1,145 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from llm_hedge import CancelToken, HedgedCaller, HedgeLimiter, LatencyTracker, ModelsExhausted
+
+class RecordingTracker(LatencyTracker):
+    """LatencyTracker that also remembers which models were reported as failed"""
+
+    def __init__(self):
+        super().__init__()
+        self.failures = []
+
+    def record_failure(self, model, error):
+        self.failures.append(model)
+
+def make_call(behaviour, calls):
+    """Fake model call: behaviour maps model -> (delay, answer or exception)"""
+    def call(model, cancel):
+        calls.append(model)
+        delay, outcome = behaviour[model]
+        time.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return call
+
+def test_latency_tracker_percentile():
+    """Test p95 needs enough samples and tracks the slow tail"""
+    tracker = LatencyTracker(min_samples=5)
+    for seconds in [1, 1, 1, 1]:
+        tracker.record("m", seconds)
+    assert tracker.percentile("m", 95) is None
+    for seconds in [1] * 15 + [9]:
+        tracker.record("m", seconds)
+    assert tracker.percentile("m", 50) == 1
+    assert tracker.percentile("m", 100) == 9
+    print("✅ Latency percentiles need min_samples")
+
+def test_hedge_beats_slow_primary():
+    """Test that a slow primary is raced and the fast hedge wins"""
+    calls = []
+    call = make_call({"slow": (1.0, "late answer"), "fast": (0.05, "fast answer")}, calls)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        caller = HedgedCaller(executor, default_hedge_after=0.1)
+        started = time.time()
+        model, answer = caller.call(["slow", "fast"], call)
+        elapsed = time.time() - started
+
+    assert (model, answer) == ("fast", "fast answer")
+    assert elapsed < 0.5, f"Hedge should answer well before the primary ({elapsed:.2f}s)"
+    assert caller.limiter.hedges_started == 1
+    print("✅ Hedged request beat the slow primary")
+
+def test_failover_and_invalid_answers():
+    """Test immediate failover on errors and invalid answers, then ModelsExhausted"""
+    calls = []
+    call = make_call({
+        "limited": (0.0, RuntimeError("429 rate limit")),
+        "empty": (0.0, ""),
+        "good": (0.0, "summary"),
+    }, calls)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        caller = HedgedCaller(executor, tracker=RecordingTracker(), default_hedge_after=5)
+        assert caller.call(["limited", "empty", "good"], call) == ("good", "summary")
+        assert calls == ["limited", "empty", "good"]
+        assert caller.limiter.hedges_started == 0, "Fast failures should not use hedge slots"
+        assert caller.tracker.failures == ["limited", "empty"], "Invalid answers count as failures"
+
+        try:
+            caller.call(["limited"], call)
+            assert False, "Should raise when every model fails"
+        except ModelsExhausted as e:
+            assert "429" in str(e)
+
+        try:
+            caller.call([], call)
+            assert False, "An empty route should raise at once"
+        except ModelsExhausted:
+            pass
+    print("✅ Failover and exhaustion work")
+
+def test_global_hedge_cap():
+    """Test that concurrent requests never run more hedges than the cap"""
+    in_flight = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    def call(model, cancel):
+        if model == "slow":
+            time.sleep(0.4)
+            return "a"
+        with lock:
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        time.sleep(0.3)
+        with lock:
+            in_flight["now"] -= 1
+        return "b"
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        caller = HedgedCaller(executor, limiter=HedgeLimiter(max_hedges=2), default_hedge_after=0.05)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(caller.call(["slow", "backup"], call)))
+                   for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert len(results) == 5
+    assert in_flight["max"] <= 2, f"At most 2 hedges should run at once, saw {in_flight['max']}"
+    assert caller.limiter.hedges_denied > 0, "Requests beyond the cap should be denied a hedge"
+    print("✅ Global hedge cap is enforced")
+
+def test_running_losers_are_cancelled():
+    """Test that the losing call's cancel token fires and its failure isn't recorded"""
+    aborted = threading.Event()
+
+    def call(model, cancel):
+        if model == "fast":
+            time.sleep(0.05)
+            return "fast answer"
+        cancel.add_callback(aborted.set)
+        aborted.wait(2)
+        raise RuntimeError("request cancelled")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        caller = HedgedCaller(executor, tracker=RecordingTracker(), default_hedge_after=0.01)
+        assert caller.call(["slow", "fast"], call) == ("fast", "fast answer")
+        assert aborted.wait(1), "The running loser should be cancelled"
+    assert caller.tracker.failures == [], "A cancelled loser is not a model failure"
+
+    token = CancelToken()
+    token.cancel()
+    late = []
+    token.add_callback(lambda: late.append(True))
+    assert late == [True], "Callbacks added after cancel run at once"
+    print("✅ Running losers are cancelled")
+
+if __name__ == "__main__":
+    test_latency_tracker_percentile()
+    test_hedge_beats_slow_primary()
+    test_failover_and_invalid_answers()
+    test_global_hedge_cap()
+    test_running_losers_are_cancelled()
+    print("\n🎉 All hedging tests passed!")
@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from llm_telemetry import LLMTelemetry, estimate_cost, histogram_percentile, latency_bucket, LATENCY_BOUNDS
+from sqlite_connections import close_thread_connections
+
+def make_telemetry(flush_interval=3600):
+    db_path = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    return LLMTelemetry(db_path=db_path, flush_interval=flush_interval), db_path
+
+def test_cost_estimate():
+    """Test per-model pricing and free models"""
+    assert estimate_cost("openai/gpt-4o-mini", 1_000_000, 1_000_000) == 0.75
+    assert estimate_cost("meta-llama/llama-3.1-8b-instruct:free", 5000, 5000) == 0.0
+    assert estimate_cost("unknown/model", 5000, 5000) == 0.0
+    print("✅ Cost estimates use the price table")
+
+def test_histogram_percentiles():
+    """Test latency buckets and percentiles from a histogram"""
+    histogram = [0] * len(LATENCY_BOUNDS)
+    for seconds in [0.4] * 90 + [5.0] * 9 + [100.0]:
+        histogram[latency_bucket(seconds)] += 1
+    assert histogram_percentile(histogram, 50) == 0.5
+    assert histogram_percentile(histogram, 95) == 6
+    assert histogram_percentile(histogram, 100) == 64, "Open-ended bucket reports its lower bound"
+    assert histogram_percentile([0] * len(LATENCY_BOUNDS), 50) is None
+    print("✅ Histogram percentiles work")
+
+def test_buffered_hourly_report():
+    """Test that attempts are buffered, merged across flushes and reported per model per hour"""
+    telemetry, db_path = make_telemetry()
+    try:
+        for _ in range(3):
+            telemetry.record("openai/gpt-4o-mini", 1.2, "success", 1000, 100)
+        telemetry.record("openai/gpt-4o-mini", 0.1, "rate_limit")
+
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute("SELECT COUNT(*) FROM llm_telemetry_hourly").fetchone()[0]
+        assert rows == 0, "Records should stay buffered until a flush"
+
+        assert telemetry.flush() == 2
+        telemetry.record("openai/gpt-4o-mini", 3.5, "success", 1000, 100)
+        telemetry.record("mistralai/mixtral-8x7b-instruct", 2.0, "success", 500, 50)
+        # Last hour's bucket is reported as a separate row
+        telemetry.record("openai/gpt-4o-mini", 1.0, "success", 10, 10, at=time.time() - 3600)
+
+        report = telemetry.hourly_report(hours=24)
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute("SELECT COUNT(*) FROM llm_telemetry_hourly").fetchone()[0]
+        assert rows == 4, "One row per hour, model and outcome"
+
+        assert len(report) == 3
+        current = [r for r in report if r["model"] == "openai/gpt-4o-mini"][0]
+        assert report[-1]["hour"] < current["hour"], "Newest hour first"
+        assert current["calls"] == 5
+        assert current["success_rate"] == 0.8
+        assert current["p50_s"] == 1.5 and current["p99_s"] == 4
+        assert current["prompt_tokens"] == 4000
+        assert abs(current["cost_usd"] - estimate_cost("openai/gpt-4o-mini", 4000, 400)) < 1e-9
+        assert current["errors"] == "rate_limit: 1"
+        print("✅ Telemetry buffers, merges and reports per model per hour")
+    finally:
+        close_thread_connections(db_path)
+        for path in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(path):
+                os.unlink(path)
+
+def test_concurrent_flushes_keep_every_call():
+    """Test that flushes from several threads merging into one row don't lose calls"""
+    telemetry, db_path = make_telemetry()
+    try:
+        writers = [LLMTelemetry(db_path=db_path, flush_interval=3600) for _ in range(6)]
+        at = time.time()
+
+        def flush_often(writer):
+            for _ in range(20):
+                writer.record("openai/gpt-4o-mini", 1.0, "success", 10, 10, at=at)
+                writer.flush()
+            close_thread_connections()
+
+        threads = [threading.Thread(target=flush_often, args=(writer,)) for writer in writers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert telemetry.hourly_report(hours=1)[0]["calls"] == 120
+        print("✅ Concurrent flushes keep every call")
+    finally:
+        close_thread_connections(db_path)
+        for path in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(path):
+                os.unlink(path)
+
+if __name__ == "__main__":
+    test_cost_estimate()
+    test_histogram_percentiles()
+    test_buffered_hourly_report()
+    test_concurrent_flushes_keep_every_call()
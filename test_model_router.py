@@ -0,0 +1,106 @@
+import os
+import tempfile
+from model_router import ModelRouter, classify_error
+from sqlite_connections import close_thread_connections
+
+MODELS = ["llama", "mistral", "mixtral", "gpt"]
+
+def _temp_db():
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
+        return tmp.name
+
+def test_classify_error():
+    """Test error classes used by the circuit breakers"""
+    assert classify_error(Exception("Error code: 429 - Rate limit exceeded")) == "rate_limit"
+    assert classify_error(Exception("Insufficient credits")) == "credits"
+    assert classify_error(Exception("401 Authentication failed")) == "auth"
+    assert classify_error(Exception("Request timed out")) == "timeout"
+    assert classify_error(Exception("Bad gateway")) == "other"
+    assert classify_error(Exception("LLM limiter saturated: 8 calls already in flight")) == "limiter"
+    print("✅ LLM errors are classified")
+
+def test_router_breakers_and_ordering():
+    """Test breaker opening, latency ordering and persistence across restarts"""
+    db_path = _temp_db()
+
+    try:
+        router = ModelRouter(db_path, min_samples=3)
+
+        # Test 1: Unknown models keep their configured order
+        assert router.order(MODELS) == MODELS
+        print("✅ Test 1 passed: Config order without data")
+
+        # Test 2: A rate-limited model is skipped at once
+        router.record_failure("llama", Exception("429 rate limit"))
+        assert "llama" not in router.order(MODELS)
+        print("✅ Test 2 passed: Rate limit opens the breaker")
+
+        # Our own limiter rejecting a call says nothing about the model
+        for _ in range(5):
+            router.record_failure("gpt", Exception("LLM limiter saturated"))
+        assert router._health["gpt"].failures == 0 and "gpt" in router.order(MODELS)
+
+        # Test 3: Generic errors need several in a row
+        router.record_failure("mistral", Exception("Bad gateway"))
+        router.record_failure("mistral", Exception("Bad gateway"))
+        assert "mistral" in router.order(MODELS)
+        router.record_failure("mistral", Exception("Bad gateway"))
+        assert "mistral" not in router.order(MODELS)
+        print("✅ Test 3 passed: Repeated errors open the breaker")
+
+        # Test 4: Faster models move ahead of slow ones
+        for _ in range(3):
+            router.record("gpt", 0.8)
+            router.record("mixtral", 6.0)
+        assert router.order(MODELS) == ["gpt", "mixtral"]
+        assert router.percentile("gpt", 95) == 0.8
+        print("✅ Test 4 passed: Ordered by expected latency")
+
+        # Test 5: Scoreboard and breakers survive a restart
+        restarted = ModelRouter(db_path, min_samples=3)
+        assert restarted.order(MODELS) == ["gpt", "mixtral"]
+        board = {row["model"]: row for row in restarted.scoreboard()}
+        assert board["llama"]["state"] == "open" and board["llama"]["last_error"] == "rate_limit"
+        print("✅ Test 5 passed: State persists across restarts")
+
+        # Test 6: Failures while the breaker is already open don't extend it
+        first_cooldown = restarted._health["llama"].cooldown
+        restarted.record_failure("llama", Exception("429"))
+        assert restarted._health["llama"].cooldown == first_cooldown
+        print("✅ Test 6 passed: Open breakers aren't extended by stragglers")
+
+        # Test 7: Half-open - one probe at a time; a failed probe doubles the cooldown
+        restarted._health["llama"].open_until = 0
+        assert restarted.order(MODELS, claim_probes=False)[-1] == "llama"
+        assert restarted.order(MODELS)[-1] == "llama", "Probes go after the healthy models"
+        assert "llama" not in restarted.order(MODELS), "Only one caller gets the probe"
+        restarted.record_failure("llama", Exception("429"))
+        assert restarted._health["llama"].cooldown == first_cooldown * 2
+        assert "llama" not in restarted.order(MODELS)
+        restarted._health["llama"].open_until = 0
+        assert "llama" in restarted.order(MODELS)
+        restarted.record("llama", 1.0)
+        assert restarted._health["llama"].state() == "closed"
+        assert "llama" in restarted.order(MODELS) and "llama" in restarted.order(MODELS)
+        print("✅ Test 7 passed: Half-open probes close or back off")
+
+        # Test 8: With every breaker open nothing is tried, and cooldowns stay put
+        for model in MODELS:
+            restarted.record_failure(model, Exception("Insufficient credits"))
+        cooldowns = [restarted._health[m].cooldown for m in MODELS]
+        assert restarted.order(MODELS) == []
+        for model in MODELS:
+            restarted.record_failure(model, Exception("Insufficient credits"))
+        assert [restarted._health[m].cooldown for m in MODELS] == cooldowns
+        print("✅ Test 8 passed: Empty route while every breaker is open")
+
+    finally:
+        close_thread_connections(db_path)
+        for path in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(path):
+                os.unlink(path)
+
+if __name__ == "__main__":
+    test_classify_error()
+    test_router_breakers_and_ordering()
+    print("\n🎉 All model router tests passed!")
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import time
+from places_cache import GeocodeCache, PlaceDetailsCache, normalize_location
+from sqlite_connections import close_thread_connections
+
+def _temp_db():
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
+        return tmp.name
+
+def test_geocode_cache():
+    """Test geocode cache memory/SQLite tiers, TTL and negative caching"""
+    db_path = _temp_db()
+
+    try:
+        cache = GeocodeCache(db_path)
+        calls = []
+
+        def fetch(location):
+            calls.append(location)
+            return None if "nowhere" in location.lower() else (1.3048, 103.8318)
+
+        # Test 1: Normalized keys share one entry
+        assert normalize_location("  Orchard   ROAD ") == "orchard road"
+        assert cache.get_or_fetch("Orchard Road", fetch) == (1.3048, 103.8318)
+        assert cache.get_or_fetch("orchard  road ", fetch) == (1.3048, 103.8318)
+        assert len(calls) == 1, "Second lookup should be served from cache"
+        print("✅ Test 1 passed: Normalized location cache hits")
+
+        # Test 2: Negative caching
+        assert cache.get_or_fetch("Nowhere Land", fetch) is None
+        assert cache.get_or_fetch("nowhere land", fetch) is None
+        assert len(calls) == 2, "Failed locations should be cached too"
+        print("✅ Test 2 passed: Negative caching works")
+
+        # Test 3: SQLite tier survives a new instance (simulated restart)
+        restarted = GeocodeCache(db_path)
+        hit, coords = restarted.lookup("ORCHARD ROAD")
+        assert hit and coords == (1.3048, 103.8318)
+        print("✅ Test 3 passed: SQLite tier persists")
+
+        # Test 4: Expired entries are refetched
+        expiring = GeocodeCache(db_path, ttl_seconds=0, negative_ttl_seconds=0)
+        expiring.store("Marina Bay", (1.2807, 103.8559))
+        time.sleep(0.01)
+        hit, _ = expiring.lookup("Marina Bay")
+        assert not hit, "Expired entries should miss"
+        assert expiring.cleanup_expired() >= 1
+        print("✅ Test 4 passed: TTL expiry works")
+
+        # Test 5: Memory tier is bounded (LRU)
+        small = GeocodeCache(db_path, max_memory_entries=2)
+        for name in ["a", "b", "c"]:
+            small.store(name, (1.0, 1.0))
+        assert list(small._memory.keys()) == ["b", "c"]
+        print("✅ Test 5 passed: LRU eviction works")
+
+    finally:
+        close_thread_connections(db_path)
+        for path in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(path):
+                os.unlink(path)
+
+def test_place_details_cache():
+    """Test place details cache freshness window and stale-while-revalidate"""
+    db_path = _temp_db()
+
+    try:
+        cache = PlaceDetailsCache(db_path, fresh_seconds=60)
+        calls = []
+
+        def fetch(place_id):
+            calls.append(place_id)
+            return {"status": "OK", "result": {"name": f"Place {len(calls)}", "reviews": []}}
+
+        # Test 1: Fresh entries are served without fetching
+        first = cache.get_or_fetch("abc", fetch)
+        second = cache.get_or_fetch("abc", fetch)
+        assert first == second and len(calls) == 1
+        print("✅ Test 1 passed: Fresh details served from cache")
+
+        # Test 2: Stale entries are served immediately and refreshed in the background
+        stale = PlaceDetailsCache(db_path, fresh_seconds=0)
+        result = stale.get_or_fetch("abc", fetch)
+        assert result["result"]["name"] == "Place 1", "Stale copy should be served"
+        for _ in range(100):
+            if len(calls) == 2 and not stale._refreshing:
+                break
+            time.sleep(0.01)
+        assert len(calls) == 2, "Background refresh should have fetched once"
+        assert PlaceDetailsCache(db_path)._load("abc")[0]["result"]["name"] == "Place 2"
+        print("✅ Test 2 passed: Stale-while-revalidate works")
+
+        # Test 3: Error responses are not cached
+        cache.get_or_fetch("bad", lambda place_id: {"status": "OVER_QUERY_LIMIT"})
+        assert cache._load("bad") is None
+        print("✅ Test 3 passed: Error responses are not cached")
+
+    finally:
+        close_thread_connections(db_path)
+        for path in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(path):
+                os.unlink(path)
+
+if __name__ == "__main__":
+    test_geocode_cache()
+    test_place_details_cache()
+    print("\n🎉 All places cache tests passed!")
@@ -0,0 +1,57 @@
+from food_lexicon import find_dishes, food_score
+from review_prompt import compact_reviews, estimate_tokens, truncate_review
+
+RAMBLING = (
+    "We came here on a rainy Tuesday after a long day of shopping along the street. "
+    "Parking was a nightmare and we circled the block three times before finding a spot. "
+    "The tonkotsu ramen had a rich, creamy broth and the chashu was melt-in-your-mouth tender. "
+    "My friend's mother used to live nearby so we talked about the old neighbourhood for a while. "
+    "Service was a bit slow because it was packed. "
+    "The gyoza were crispy and the fried chicken was juicy. "
+) * 3
+
+def test_food_lexicon():
+    """Test dish phrase matching and food scoring"""
+    assert find_dishes("The Hainanese chicken rice and laksa were great") == ["hainanese chicken rice", "laksa"]
+    assert food_score("Parking was a nightmare.") == 0
+    assert food_score("The tonkotsu ramen broth was rich.") > food_score("The broth was rich.")
+    print("✅ Food lexicon finds dishes")
+
+def test_truncate_keeps_dish_sentences():
+    """Test that truncation keeps dish-bearing sentences in their original order"""
+    short = truncate_review(RAMBLING, 60)
+    assert estimate_tokens(short) <= 60
+    assert "tonkotsu ramen" in short
+    assert "Parking" not in short and "mother" not in short
+    assert short.index("tonkotsu") < short.index("gyoza") if "gyoza" in short else True
+    print("✅ Long reviews are cut down to their dish sentences")
+
+def test_compact_reviews_budget_and_dedupe():
+    """Test empty/short/duplicate removal, the per-place budget and the savings report"""
+    reviews = [
+        "Great!",
+        "",
+        "The chicken rice was fragrant and the chilli sauce had a real kick to it.",
+        "The chicken rice was fragrant and the chilli sauce had a real kick to it!",
+        RAMBLING,
+        "Long queue at lunch but the laksa is worth it, broth rich and spicy.",
+    ] + [f"Review number {i} says the roast duck was tender and well seasoned." for i in range(20)]
+
+    texts, stats = compact_reviews(reviews, budget_tokens=150, max_review_tokens=60)
+    assert "Great!" not in texts and "" not in texts
+    assert sum("chilli sauce" in t for t in texts) == 1, "Near-duplicates should be dropped"
+    assert sum(estimate_tokens(t) for t in texts) <= 150
+    assert stats["saved_tokens"] == stats["original_tokens"] - stats["compacted_tokens"] > 0
+    assert stats["dropped"] >= 3
+    print(f"✅ Compaction saved {stats['saved_tokens']} of {stats['original_tokens']} tokens")
+
+    # Only short reviews: keep them rather than sending an empty prompt
+    texts, _ = compact_reviews(["Great!", "Yummy"], budget_tokens=150)
+    assert texts == ["Great!", "Yummy"]
+    print("✅ Short-only reviews are kept")
+
+if __name__ == "__main__":
+    test_food_lexicon()
+    test_truncate_keeps_dish_sentences()
+    test_compact_reviews_budget_and_dedupe()
+    print("\n🎉 All review prompt tests passed!")
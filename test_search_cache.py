@@ -0,0 +1,83 @@
+import threading
+import time
+from search_cache import SearchResultCache, make_search_key
+
+def test_search_key_normalization():
+    """Test that equivalent searches share one cache key"""
+    a = make_search_key("Sushi ", "Orchard  Road")
+    b = make_search_key(["sushi"], "orchard road")
+    c = make_search_key("sushi", "bugis")
+    assert a == b
+    assert a != c
+    print("✅ Search keys normalize craving and location")
+
+def test_search_key_keeps_keywords_apart():
+    """Test that merged keyword searches don't share a key with one multi-word search"""
+    merged = make_search_key(["ramen", "noodles"], "Bugis")  # "ramen, noodles"
+    single = make_search_key(["ramen noodles"], "Bugis")  # "ramen noodles"
+    assert merged != single
+    assert merged == make_search_key(["Noodles ", "ramen"], "bugis"), "Keyword order and case don't matter"
+    print("✅ Search keys keep keywords separate")
+
+def test_search_cache_coalescing():
+    """Test that concurrent identical searches run the pipeline once"""
+    cache = SearchResultCache(ttl_seconds=60)
+    runs = []
+    start = threading.Barrier(20)
+    results = []
+
+    def pipeline():
+        runs.append(1)
+        time.sleep(0.1)
+        return {"places": ["Sushi Place"]}
+
+    def session():
+        start.wait()
+        results.append(cache.get_or_compute(("sushi", "orchard road", 0.0, None), pipeline))
+
+    threads = [threading.Thread(target=session) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(runs) == 1, f"Pipeline should run once, ran {len(runs)} times"
+    assert len(results) == 20 and all(r == {"places": ["Sushi Place"]} for r in results)
+    assert cache.coalesced + cache.hits == 19
+    print("✅ 20 concurrent sessions triggered one pipeline run")
+
+    # Later identical searches are plain cache hits
+    cache.get_or_compute(("sushi", "orchard road", 0.0, None), pipeline)
+    assert len(runs) == 1
+    print("✅ Repeat search served from cache")
+
+def test_search_cache_skips_uncacheable_and_failed():
+    """Test cache_if veto and that failures are not cached"""
+    cache = SearchResultCache(ttl_seconds=60)
+    calls = []
+
+    def empty():
+        calls.append(1)
+        return {"places": []}
+
+    cache.get_or_compute("k", empty, cache_if=lambda r: bool(r["places"]))
+    cache.get_or_compute("k", empty, cache_if=lambda r: bool(r["places"]))
+    assert len(calls) == 2, "Empty results should not be cached"
+
+    def broken():
+        raise RuntimeError("upstream down")
+
+    try:
+        cache.get_or_compute("x", broken)
+        assert False, "Errors should propagate"
+    except RuntimeError:
+        pass
+    assert cache.get("x") is None
+    print("✅ Empty and failed results are not cached")
+
+if __name__ == "__main__":
+    test_search_key_normalization()
+    test_search_key_keeps_keywords_apart()
+    test_search_cache_coalescing()
+    test_search_cache_skips_uncacheable_and_failed()
+    print("\n🎉 All search cache tests passed!")
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import threading
+from datetime import datetime
+from database import CraveMapDB
+from sqlite_connections import close_thread_connections
+
+def make_db():
+    db_path = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    return CraveMapDB(db_path), db_path
+
+def cleanup(db_path):
+    close_thread_connections(db_path)
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.unlink(path)
+
+def test_increment_creates_and_keeps_user_fields():
+    """Test the UPSERT creates missing users and leaves other columns alone"""
+    db, db_path = make_db()
+    try:
+        assert db.update_search_count("new_user") == 1
+        assert db.update_search_count("new_user", 2) == 3
+
+        db.save_user("premium_user", email="p@example.com", is_premium=True,
+                     monthly_searches=4, promo_activation="Admin code: test")
+        assert db.update_search_count("premium_user") == 5
+        user = db.get_user("premium_user")
+        assert user["monthly_searches"] == 5
+        assert user["email"] == "p@example.com" and user["is_premium"]
+        assert user["promo_activation"] == "Admin code: test", "Increment must not rewrite other columns"
+        print("✅ Search count UPSERT works")
+    finally:
+        cleanup(db_path)
+
+def test_monthly_reset_in_sql():
+    """Test that a count from an earlier month starts over"""
+    db, db_path = make_db()
+    try:
+        db.save_user("old_user", monthly_searches=5, last_search_reset="2020-01-15T10:00:00")
+        assert db.update_search_count("old_user") == 1
+        reset = db.get_user("old_user")["last_search_reset"]
+        assert reset.startswith(datetime.now().strftime("%Y-%m"))
+        assert db.update_search_count("old_user") == 2, "Reset only happens once per month"
+        print("✅ Monthly reset happens inside the UPSERT")
+    finally:
+        cleanup(db_path)
+
+def test_concurrent_increments_are_not_lost():
+    """Test that searches from several tabs at once all count"""
+    db, db_path = make_db()
+    try:
+        db.save_user("busy_user", monthly_searches=0)
+
+        def tab():
+            for _ in range(20):
+                db.update_search_count("busy_user")
+            close_thread_connections()
+
+        threads = [threading.Thread(target=tab) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert db.get_user("busy_user")["monthly_searches"] == 100
+        print("✅ Concurrent increments are not lost")
+    finally:
+        cleanup(db_path)
+
+def test_limit_is_checked_in_the_increment():
+    """Test that two tabs at 4/5 can't both get a search through, and refused searches don't count"""
+    db, db_path = make_db()
+    try:
+        db.save_user("limit_user", monthly_searches=4, last_search_reset=datetime.now().isoformat())
+        counts = []
+
+        def tab():
+            counts.append(db.update_search_count("limit_user", limit=5))
+            close_thread_connections()
+
+        threads = [threading.Thread(target=tab) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert counts.count(5) == 1 and counts.count(None) == 1, "Only one tab may use the last search"
+        assert db.update_search_count("limit_user", limit=5) is None
+        assert db.get_user("limit_user")["monthly_searches"] == 5, "Refused searches must not be counted"
+
+        # A new month starts over even for a user at the limit
+        db.save_user("last_month_user", monthly_searches=5, last_search_reset="2020-01-15T10:00:00")
+        assert db.update_search_count("last_month_user", limit=5) == 1
+        print("✅ The limit is enforced inside the increment")
+    finally:
+        cleanup(db_path)
+
+if __name__ == "__main__":
+    test_increment_creates_and_keeps_user_fields()
+    test_monthly_reset_in_sql()
+    test_concurrent_increments_are_not_lost()
+    test_limit_is_checked_in_the_increment()
@@ -0,0 +1,235 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from search_pipeline import (
+    CandidateSet, KeywordStream, apply_filters, build_candidate, keyword_rank_score,
+    merge_candidates, rank_candidates
+)
+
+def make_candidates():
+    """Candidates in ranking order with a mix of ratings, prices and distances"""
+    raw = [
+        ("Near Budget", 3.8, 1, 0.4),
+        ("Near Great", 4.6, 2, 0.8),
+        ("Unrated", None, 0, 1.0),
+        ("Mid Great", 4.5, 3, 2.5),
+        ("Far Great", 4.8, 4, 8.0),
+        ("No Coords", 4.9, 2, None),
+    ]
+    candidates = []
+    for name, rating, price, distance in raw:
+        place = {"name": name, "place_id": name.lower().replace(" ", "_"), "rating": rating,
+                 "price_level": price, "formatted_address": f"{name} St",
+                 "geometry": {"location": {"lat": 1.30, "lng": 103.83}}}
+        candidates.append(build_candidate(place, distance))
+    return candidates
+
+def paged_stream(pages, fetched_pages, page_token_delay=0):
+    """KeywordStream over a fixed list of pages, recording each page fetch"""
+    def fetch_page(token, offset):
+        index = token or 0
+        fetched_pages.append(index)
+        next_token = index + 1 if index + 1 < len(pages) else None
+        return pages[index], next_token
+    return KeywordStream(fetch_page, page_token_delay)
+
+def test_build_candidate():
+    """Test candidate fields used by filters and the result cards"""
+    candidate = make_candidates()[1]
+    assert candidate["place_id"] == "near_great"
+    assert candidate["distance"] == "0.8 km"
+    assert candidate["distance_km"] == 0.8
+    assert candidate["url"].endswith("query=Near+Great")
+    assert candidate["lat"] == 1.30
+    print("✅ Candidates carry coordinates, distance and display fields")
+
+def test_apply_filters():
+    """Test rating, distance and price filters plus the top-N cut"""
+    candidates = make_candidates()
+
+    # No filters: top 3 in ranking order, unrated places included
+    names = [c["name"] for c in apply_filters(candidates)]
+    assert names == ["Near Budget", "Near Great", "Unrated"]
+
+    # Rating filter drops low and unrated places
+    names = [c["name"] for c in apply_filters(candidates, min_rating=4.5)]
+    assert names == ["Near Great", "Mid Great", "Far Great"]
+
+    # Distance filter drops far places but keeps ones without coordinates
+    names = [c["name"] for c in apply_filters(candidates, min_rating=4.5, max_distance=3)]
+    assert names == ["Near Great", "Mid Great", "No Coords"]
+
+    # Price-level cap
+    names = [c["name"] for c in apply_filters(candidates, max_price_level=1)]
+    assert names == ["Near Budget", "Unrated"]
+
+    # Filtering never mutates the superset
+    assert len(candidates) == 6
+    print("✅ In-memory filters and top-N cut work")
+
+def test_candidate_set_memoizes_cards():
+    """Test that each place's card data is fetched once per candidate set"""
+    calls = []
+
+    def fetch_batch(places):
+        calls.extend(place["place_id"] for place in places)
+        return {place["place_id"]: {"result": {"name": place["name"]}} for place in places}
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        candidate_set = CandidateSet([paged_stream([make_candidates()], [])], executor)
+        first = candidate_set.card_futures(candidate_set.top_places(), fetch_batch)
+        second = candidate_set.card_futures(candidate_set.top_places(min_rating=4.5), fetch_batch)
+        third = candidate_set.card_futures(candidate_set.top_places(), fetch_batch)
+        assert first == third, "Repeating a filter should reuse every future"
+        for future in first + second:
+            future.result()
+
+    assert sorted(calls) == sorted(set(calls)), "No place should be fetched twice"
+    assert len(calls) == 5
+    print("✅ Card fetches are memoized per place")
+
+def test_card_futures_share_one_batch():
+    """Test that new places are fetched in one batch job and missing places fail alone"""
+    batches = []
+
+    def fetch_batch(places):
+        batches.append([p["place_id"] for p in places])
+        return {p["place_id"]: {"result": {"name": p["name"]}} for p in places if p["place_id"] != "unrated"}
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        candidate_set = CandidateSet([paged_stream([make_candidates()], [])], executor)
+        first = candidate_set.card_futures(candidate_set.top_places(), fetch_batch)
+        second = candidate_set.card_futures(candidate_set.top_places(min_rating=4.5), fetch_batch)
+        assert first[1] is second[0], "Shared places should reuse the same future"
+        assert first[0].result()["result"]["name"] == "Near Budget"
+        assert second[2].result()["result"]["name"] == "Far Great"
+        try:
+            first[2].result()
+            assert False, "A place missing from the batch should fail its future"
+        except KeyError:
+            pass
+
+    assert batches == [["near_budget", "near_great", "unrated"], ["mid_great", "far_great"]]
+    print("✅ Card fetches are batched once per new shortlist")
+
+def test_failed_cards_are_not_memoized():
+    """Test that failed places and cards vetoed by cache_if are fetched again next time"""
+    batches = []
+
+    def fetch_batch(places):
+        batches.append([p["place_id"] for p in places])
+        if len(batches) == 1:
+            return {p["place_id"]: {"details_failed": p["place_id"] == "near_great"}
+                    for p in places if p["place_id"] != "unrated"}
+        return {p["place_id"]: {"details_failed": False} for p in places}
+
+    def succeeded(card):
+        return not card["details_failed"]
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        candidate_set = CandidateSet([paged_stream([make_candidates()], [])], executor)
+        first = candidate_set.card_futures(candidate_set.top_places(), fetch_batch, cache_if=succeeded)
+        assert first[1].result()["details_failed"], "The vetoed card is still handed to this caller"
+        wait(first)
+        second = candidate_set.card_futures(candidate_set.top_places(), fetch_batch, cache_if=succeeded)
+        assert second[0] is first[0], "A good card stays memoized"
+        assert not second[1].result()["details_failed"]
+        assert not second[2].result()["details_failed"]
+
+    assert batches == [["near_budget", "near_great", "unrated"], ["near_great", "unrated"]]
+    print("✅ Failed card fetches are retried, not memoized")
+
+def test_merge_keyword_results():
+    """Test place_id de-duplication across keywords keeping the best score"""
+    def results(names, distance_step):
+        return [build_candidate({"name": n, "place_id": n}, i * distance_step, keyword_rank_score(i))
+                for i, n in enumerate(names)]
+
+    merged = {}
+    merge_candidates(merged, results(["ippudo", "ramen_ya", "menya"], 0.5))
+    merge_candidates(merged, results(["noodle_bar", "ippudo", "ramen_ya"], 0.3))
+
+    ranked = rank_candidates(merged)
+    assert len(ranked) == 4, "Duplicates across keywords should be merged"
+    assert [c["place_id"] for c in ranked] == ["ippudo", "noodle_bar", "ramen_ya", "menya"]
+    assert merged["ippudo"]["score"] == 1.0, "Best score per place should be kept"
+    print("✅ Keyword results merge with place_id de-duplication")
+
+def test_lazy_pipeline_stops_pulling_pages():
+    """Test that the merge -> filter -> top-N pass only fetches pages it needs"""
+    def page(names, start):
+        return [build_candidate({"name": n, "place_id": n, "rating": r}, 1.0, keyword_rank_score(start + i))
+                for i, (n, r) in enumerate(names)]
+
+    ramen_pages = [
+        page([("r1", 4.6), ("r2", 3.9), ("r3", 4.1)], 0),
+        page([("r4", 4.7), ("r5", 4.8)], 3),
+    ]
+    noodle_pages = [
+        page([("n1", 4.0), ("r1", 4.6), ("n2", 4.5)], 0),
+        page([("n3", 4.9)], 3),
+    ]
+    ramen_fetches, noodle_fetches = [], []
+    candidate_set = CandidateSet(
+        [paged_stream(ramen_pages, ramen_fetches), paged_stream(noodle_pages, noodle_fetches)], None
+    )
+
+    # Loose filters are satisfied by the first pages alone
+    top = candidate_set.top_places()
+    assert [c["place_id"] for c in top] == ["r1", "n1", "r2"]
+    assert ramen_fetches == [0] and noodle_fetches == [0], "No second pages should be fetched"
+
+    # Stricter filters pull further pages only as needed, de-duplicating r1
+    top = candidate_set.top_places(min_rating=4.5)
+    assert [c["place_id"] for c in top] == ["r1", "n2", "r4"]
+    assert ramen_fetches == [0, 1], "Ramen page 2 was needed"
+    assert noodle_fetches == [0, 1] or noodle_fetches == [0], "Noodle page 2 fetched at most once"
+
+    # Replaying the same filters fetches nothing new
+    before = (len(ramen_fetches), len(noodle_fetches))
+    candidate_set.top_places(min_rating=4.5)
+    assert (len(ramen_fetches), len(noodle_fetches)) == before
+    assert len(candidate_set.candidates) == len({c["place_id"] for c in candidate_set.candidates})
+    print("✅ Lazy pipeline pulls pages only while the top-N is unsettled")
+
+def test_deep_search_fetches_pages_in_background():
+    """Test that deep search loads later pages off the request path and respects the token delay"""
+    def page(names, start):
+        return [build_candidate({"name": n, "place_id": n, "rating": 4.6}, 1.0, keyword_rank_score(start + i))
+                for i, n in enumerate(names)]
+
+    pages = [page(["a", "b"], 0), page(["c", "d"], 2), page(["e"], 4)]
+    fetches = []
+    stream = paged_stream(pages, fetches, page_token_delay=0.2)
+    stream.fetch_next_page()
+
+    with ThreadPoolExecutor(max_workers=1) as executor, ThreadPoolExecutor(max_workers=1) as page_executor:
+        candidate_set = CandidateSet([stream], executor, page_executor)
+
+        # The interactive pass never waits on a page token
+        top = candidate_set.top_places(limit=5, fetch_more=False)
+        assert [c["place_id"] for c in top] == ["a", "b"]
+        assert fetches == [0]
+
+        started = time.time()
+        futures = candidate_set.fetch_more_pages(max_pages=2)
+        assert candidate_set.fetch_more_pages(max_pages=2) is futures, "Deep fetch should start once"
+        card = candidate_set.card_futures(top, lambda places: {p["place_id"]: {} for p in places})[0]
+        card.result(timeout=0.15)  # Not queued behind the sleeping page fetch
+        wait(futures)
+        assert time.time() - started >= 0.2, "Follow-up pages should wait for the token to activate"
+
+    assert fetches == [0, 1], "Deep fetch should stop at max_pages"
+    top = candidate_set.top_places(limit=5, fetch_more=False)
+    assert [c["place_id"] for c in top] == ["a", "b", "c", "d"]
+    print("✅ Deep search pages load in the background after the token delay")
+
+if __name__ == "__main__":
+    test_build_candidate()
+    test_apply_filters()
+    test_candidate_set_memoizes_cards()
+    test_card_futures_share_one_batch()
+    test_failed_cards_are_not_memoized()
+    test_merge_keyword_results()
+    test_lazy_pipeline_stops_pulling_pages()
+    test_deep_search_fetches_pages_in_background()
+    print("\n🎉 All search pipeline tests passed!")
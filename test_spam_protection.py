@@ -1,5 +1,8 @@
 import time
-from spam_protection import SpamProtection
+import sqlite3
+from datetime import datetime, timedelta
+from spam_protection import SpamProtection, to_epoch
+from sqlite_connections import close_thread_connections, sqlite_connection
 from spam_monitoring import SpamMonitoringSystem
 import os
 import tempfile
@@ -125,6 +128,75 @@ def test_monitoring_system():
         except PermissionError:
             print(f"⚠️ Could not delete temp file {db_path} - it will be cleaned up later")
 
+def test_epoch_is_real_unix_time():
+    """Test that epoch values are real Unix time, not local wall-clock time, outside UTC"""
+    old_tz = os.environ.get('TZ')
+    os.environ['TZ'] = 'SGT-8'  # Singapore, UTC+8 (POSIX form, no tz database needed)
+    time.tzset()
+    try:
+        now = datetime.now()
+        assert abs(to_epoch(now) - time.time()) < 2, "to_epoch must match time.time()"
+        
+        conn = sqlite3.connect(':memory:')
+        backfilled = conn.execute("SELECT CAST(strftime('%s', ?, 'utc') AS INTEGER)", (now.isoformat(),)).fetchone()[0]
+        conn.close()
+        assert backfilled == to_epoch(now), "Backfill should match to_epoch"
+        print("✅ Epoch columns hold real Unix time")
+    finally:
+        if old_tz is None:
+            os.environ.pop('TZ', None)
+        else:
+            os.environ['TZ'] = old_tz
+        time.tzset()
+
+def test_epoch_migration_and_indexes():
+    """Test that a pre-epoch database is migrated and range queries use indexes"""
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
+        db_path = tmp.name
+    
+    try:
+        # Schema and data as written before the epoch columns existed
+        legacy = sqlite3.connect(db_path)
+        legacy.execute('''
+            CREATE TABLE suspicious_activity (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, fingerprint TEXT, activity_type TEXT,
+                details TEXT, severity TEXT, timestamp TEXT, ip_address TEXT, user_agent TEXT
+            )
+        ''')
+        recent = datetime.now() - timedelta(minutes=5)
+        old = datetime.now() - timedelta(days=40)
+        for when in (recent, old):
+            legacy.execute(
+                "INSERT INTO suspicious_activity (fingerprint, activity_type, severity, timestamp) VALUES (?, ?, ?, ?)",
+                ("fp", "spam_pattern", "high", when.isoformat())
+            )
+        legacy.commit()
+        legacy.close()
+        
+        spam_protection = SpamProtection(db_path)
+        with sqlite_connection(db_path) as conn:
+            epochs = [row[0] for row in conn.execute("SELECT ts_epoch FROM suspicious_activity ORDER BY id")]
+            assert epochs == [to_epoch(recent), to_epoch(old)], "Backfill should match to_epoch"
+            
+            plan = " ".join(row[3] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT timestamp FROM suspicious_activity "
+                "WHERE fingerprint = ? AND ts_epoch > ? ORDER BY ts_epoch DESC LIMIT 5", ("fp", 0)))
+            assert "idx_suspicious_activity_fingerprint_ts" in plan and "TEMP B-TREE" not in plan
+            
+            plan = " ".join(row[3] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM suspicious_activity WHERE ts_epoch > ?", (0,)))
+            assert "USING COVERING INDEX idx_suspicious_activity_ts" in plan
+        
+        assert spam_protection.get_admin_stats()['suspicious_activities_24h'] == 1
+        assert spam_protection.cleanup_old_data(days=30) == 1
+        print("✅ Epoch columns are backfilled and indexed")
+        
+    finally:
+        close_thread_connections(db_path)
+        for path in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(path):
+                os.unlink(path)
+
 def manual_test_integration():
     """Manual test to verify integration with main app"""
     print("\n🔧 Manual Integration Test")
@@ -140,6 +212,8 @@ if __name__ == "__main__":
     print("Running automated tests...")
     test_spam_protection()
     test_monitoring_system()
+    test_epoch_is_real_unix_time()
+    test_epoch_migration_and_indexes()
     
     print("\n" + "="*50)
     manual_test_integration()
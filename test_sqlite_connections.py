@@ -0,0 +1,108 @@
+import os
+import tempfile
+import threading
+import pytest
+from database import CraveMapDB
+from sqlite_connections import close_thread_connections, get_thread_connection, invalidate_connections, sqlite_connection
+
+def make_db_path():
+    return tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+
+def cleanup(db_path):
+    close_thread_connections(db_path)
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.unlink(path)
+
+def test_connection_per_thread_with_wal():
+    """Test that each thread reuses its own tuned connection"""
+    db_path = make_db_path()
+    try:
+        conn = get_thread_connection(db_path)
+        assert get_thread_connection(db_path) is conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] > 0
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(get_thread_connection(db_path)))
+        thread.start()
+        thread.join()
+        assert other[0] is not conn
+        print("✅ Per-thread WAL connections are reused")
+    finally:
+        cleanup(db_path)
+
+def test_rollback_and_reconnect():
+    """Test rollback on error and reconnecting after the file is replaced"""
+    db_path = make_db_path()
+    try:
+        with sqlite_connection(db_path) as conn:
+            conn.execute("CREATE TABLE items (name TEXT)")
+        with pytest.raises(RuntimeError):
+            with sqlite_connection(db_path) as conn:
+                conn.execute("INSERT INTO items VALUES ('lost')")
+                raise RuntimeError("boom")
+        with sqlite_connection(db_path) as conn:
+            conn.execute("INSERT INTO items VALUES ('kept')")  # Committed on exit
+            assert [row[0] for row in conn.execute("SELECT name FROM items")] == ["kept"]
+
+        old = get_thread_connection(db_path)
+        for path in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(path):
+                os.unlink(path)
+        with sqlite_connection(db_path) as conn:
+            assert conn is not old, "A replaced file should get a new connection"
+            assert conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0
+        print("✅ Rollback and reconnect work")
+    finally:
+        cleanup(db_path)
+
+def test_invalidate_reopens_other_threads():
+    """Test that invalidating a file makes every thread reopen it, even if the inode is unchanged"""
+    db_path = make_db_path()
+    try:
+        old = get_thread_connection(db_path)
+        thread = threading.Thread(target=invalidate_connections, args=(db_path,))
+        thread.start()
+        thread.join()
+        conn = get_thread_connection(db_path)
+        assert conn is not old, "An invalidated file should get a new connection"
+        assert get_thread_connection(db_path) is conn
+        print("✅ Invalidated connections are reopened")
+    finally:
+        cleanup(db_path)
+
+def test_concurrent_writers():
+    """Test that concurrent sessions writing users don't hit 'database is locked'"""
+    db_path = make_db_path()
+    try:
+        db = CraveMapDB(db_path)
+        errors = []
+
+        def session(n):
+            try:
+                for i in range(25):
+                    db.save_user(user_id=f"user_{n}_{i}", email=f"{n}_{i}@example.com")
+                    db.get_user(f"user_{n}_{i}")
+            except Exception as e:
+                errors.append(e)
+            finally:
+                close_thread_connections()
+
+        threads = [threading.Thread(target=session, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, errors
+        assert db.get_stats()["total_users"] == 200
+        print("✅ Concurrent writers succeed")
+    finally:
+        cleanup(db_path)
+
+if __name__ == "__main__":
+    test_connection_per_thread_with_wal()
+    test_rollback_and_reconnect()
+    test_invalidate_reopens_other_threads()
+    test_concurrent_writers()
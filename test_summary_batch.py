@@ -0,0 +1,47 @@
+from summary_batch import build_batch_prompt, parse_batch_response, parse_partial_batch
+
+def test_build_batch_prompt():
+    """Test that every place and review lands in the single prompt"""
+    prompt = build_batch_prompt([
+        ("Tian Tian", ["Best chicken rice.", "Long queue."]),
+        ("328 Katong", ["Rich laksa broth."]),
+    ])
+    assert "### Place 1: Tian Tian" in prompt
+    assert "### Place 2: 328 Katong" in prompt
+    assert "- Rich laksa broth." in prompt
+    assert '"1": "...", "2": "..."' in prompt
+    print("✅ Batch prompt covers every place")
+
+def test_parse_batch_response():
+    """Test parsing of fenced, partial and malformed batch answers"""
+    fenced = 'Sure!\n```json\n{"1": "Loved the chicken rice.", "Place 3": "Great laksa."}\n```'
+    assert parse_batch_response(fenced, 3) == ["Loved the chicken rice.", None, "Great laksa."]
+
+    # Out-of-range keys and non-string values are ignored
+    assert parse_batch_response('{"1": "Ok", "7": "Extra", "2": {"summary": "x"}}', 2) == ["Ok", None]
+
+    # Unparseable answers leave every place to the per-place fallback
+    assert parse_batch_response("Sorry, I can't help with that.", 2) == [None, None]
+    assert parse_batch_response('{"1": "unterminated', 2) == [None, None]
+    assert parse_batch_response(None, 1) == [None]
+    print("✅ Batch responses parse per place with gaps as None")
+
+def test_parse_partial_batch():
+    """Test that a streaming batch answer yields per-place text as it arrives"""
+    answer = '```json\n{"1": "Loved the \\"chicken\\" rice.", "2": "Rich laksa broth, long queue."}\n```'
+    seen = [parse_partial_batch(answer[:end], 2) for end in range(len(answer) + 1)]
+
+    assert seen[0] == [None, None]
+    assert ["Loved the", None] in seen, "Place 1 should appear before its value is complete"
+    assert ['Loved the "chicken" rice.', "Rich"] in seen
+    assert seen[-1] == parse_batch_response(answer, 2)
+    # Text for a place only ever grows while its value streams in
+    firsts = [s[0] for s in seen if s[0]]
+    assert all(b.startswith(a.rstrip("\\")) for a, b in zip(firsts, firsts[1:]))
+    print("✅ Partial batch answers stream per place")
+
+if __name__ == "__main__":
+    test_build_batch_prompt()
+    test_parse_batch_response()
+    test_parse_partial_batch()
+    print("\n🎉 All batch summary tests passed!")
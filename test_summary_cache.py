@@ -0,0 +1,63 @@
+import os
+import tempfile
+from summary_cache import ReviewSummaryCache, hash_reviews
+from sqlite_connections import close_thread_connections
+
+REVIEWS = [
+    {"text": "Amazing chicken rice, tender and fragrant.", "rating": 5},
+    {"text": "Laksa was rich and spicy. Long queue though.", "rating": 4},
+]
+
+def _temp_db():
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
+        return tmp.name
+
+def test_review_hash():
+    """Test that the review hash ignores order and whitespace but not content"""
+    reordered = [dict(REVIEWS[1], text="Laksa was rich and  spicy.\nLong queue though."), REVIEWS[0]]
+    assert hash_reviews(REVIEWS) == hash_reviews(reordered)
+    assert hash_reviews(REVIEWS) != hash_reviews(REVIEWS + [{"text": "Closed early."}])
+    print("✅ Review hash is stable across reordering")
+
+def test_review_summary_cache():
+    """Test summary reuse, invalidation on review changes and skipping empty summaries"""
+    db_path = _temp_db()
+
+    try:
+        cache = ReviewSummaryCache(db_path)
+
+        # Test 1: Unchanged reviews hit the stored summary
+        assert cache.lookup("place-1", REVIEWS) is None
+        cache.store("place-1", REVIEWS, "Summary of 2 reviews")
+        assert cache.lookup("place-1", list(reversed(REVIEWS))) == "Summary of 2 reviews"
+        assert (cache.hits, cache.misses) == (1, 1)
+        print("✅ Test 1 passed: Unchanged reviews reuse the summary")
+
+        # Test 2: SQLite tier survives a restart
+        restarted = ReviewSummaryCache(db_path)
+        assert restarted.lookup("place-1", REVIEWS) == "Summary of 2 reviews"
+        print("✅ Test 2 passed: SQLite tier persists")
+
+        # Test 3: Changed reviews miss, and the new summary replaces the old one
+        updated = REVIEWS + [{"text": "New menu is great.", "rating": 5}]
+        assert restarted.lookup("place-1", updated) is None
+        restarted.store("place-1", updated, "Summary of 3 reviews")
+        assert restarted.lookup("place-1", updated) == "Summary of 3 reviews"
+        assert restarted.lookup("place-1", REVIEWS) is None, "Old summary should be replaced"
+        print("✅ Test 3 passed: Review changes trigger a new summary")
+
+        # Test 4: Empty summaries are not cached
+        cache.store("place-2", REVIEWS, "")
+        assert cache.lookup("place-2", REVIEWS) is None
+        print("✅ Test 4 passed: Empty summaries are not cached")
+
+    finally:
+        close_thread_connections(db_path)
+        for path in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(path):
+                os.unlink(path)
+
+if __name__ == "__main__":
+    test_review_hash()
+    test_review_summary_cache()
+    print("\n🎉 All review summary cache tests passed!")
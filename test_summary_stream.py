@@ -0,0 +1,56 @@
+import threading
+import time
+from summary_stream import SummaryStream
+
+def poll(stream, timeout=5):
+    """Collect the text each time the stream's version changes, like the card render loop"""
+    seen, texts = 0, []
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        version, text, done = stream.snapshot()
+        if version != seen:
+            seen = version
+            texts.append(text)
+        if done:
+            break
+        time.sleep(0.005)
+    return texts
+
+def test_snapshots_follow_producer():
+    """Test that the reader sees growing text, a restart, and the final summary"""
+    stream = SummaryStream()
+
+    def produce():
+        for text in ["People", "People love", ""]:  # "" = model failed midway, restarting
+            time.sleep(0.02)
+            stream.update(text)
+        time.sleep(0.02)
+        stream.update("Great laksa")
+        stream.finish("Great laksa and chicken rice.")
+
+    threading.Thread(target=produce).start()
+    snapshots = poll(stream)
+
+    assert snapshots[-1] == "Great laksa and chicken rice."
+    assert "" in snapshots, "A restart should clear the partial text"
+    assert stream.done
+    print("✅ Stream snapshots follow the producer through a restart")
+
+def test_finished_stream_and_no_change():
+    """Test reading a finished stream and that unchanged text keeps its version"""
+    done = SummaryStream()
+    done.finish("Cached summary")
+    assert done.snapshot()[1:] == ("Cached summary", True)
+    assert poll(done) == ["Cached summary"]
+
+    stalled = SummaryStream()
+    stalled.update("People")
+    version = stalled.snapshot()[0]
+    stalled.update("People")
+    assert stalled.snapshot() == (version, "People", False), "Repeating the text isn't a change"
+    print("✅ Finished streams read back and repeats don't count as changes")
+
+if __name__ == "__main__":
+    test_snapshots_follow_producer()
+    test_finished_stream_and_no_change()
+    print("\n🎉 All summary stream tests passed!")
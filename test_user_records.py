@@ -0,0 +1,113 @@
+import ast
+import json
+import os
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+
+HELPERS = ("user_cache_key", "cache_user_record", "load_user_data", "save_user_data")
+
+class FakeDB:
+    """Stands in for CraveMapDB.save_user, optionally failing every save"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.saved = []
+
+    def save_user(self, **fields):
+        if self.fail:
+            raise RuntimeError("database is locked")
+        self.saved.append(fields)
+
+def run_script(fetch_user_data, db, email="diner@example.com"):
+    """Execute the user record helpers from CraveMap.py, as one script run would
+
+    Importing CraveMap runs the whole Streamlit app, so only these functions
+    (and the per-run cache they share) are compiled, against a fake st and
+    database. Each call is a fresh run - like a Streamlit rerun.
+    """
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "CraveMap.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    nodes = [
+        node for node in tree.body
+        if (isinstance(node, ast.FunctionDef) and node.name in HELPERS)
+        or (isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "user_record_cache" for t in node.targets))
+    ]
+    errors = []
+    script = {
+        "st": SimpleNamespace(session_state={"user_email": email}, error=errors.append),
+        "fetch_user_data": fetch_user_data, "db": db, "postgres_db": None,
+        "os": os, "json": json, "datetime": datetime, "errors": errors,
+    }
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), "CraveMap.py", "exec"), script)
+    return script
+
+def counting_fetch(record):
+    reads = []
+
+    def fetch_user_data(user_id):
+        reads.append(user_id)
+        return dict(record, user_id=user_id)
+    return fetch_user_data, reads
+
+def test_one_read_per_rerun():
+    """Test that a user is read from the database once per script run and login state"""
+    fetch, reads = counting_fetch({"monthly_searches": 2, "is_premium": False})
+    script = run_script(fetch, FakeDB())
+    for _ in range(5):  # has_premium_access, the sidebar, check_search_limits, ...
+        assert script["load_user_data"]("u1")["monthly_searches"] == 2
+    assert reads == ["u1"]
+
+    script["st"].session_state["user_email"] = "other@example.com"
+    script["load_user_data"]("u1")
+    assert reads == ["u1", "u1"], "A different login is a different record"
+
+    rerun = run_script(fetch, FakeDB())
+    rerun["load_user_data"]("u1")
+    assert len(reads) == 3, "Every rerun starts with an empty cache"
+    print("✅ User records are read once per rerun")
+
+def test_save_writes_through_and_callers_get_copies():
+    """Test write-through on save and that callers' edits only stick once saved"""
+    fetch, reads = counting_fetch({"monthly_searches": 2, "is_premium": False})
+    db = FakeDB()
+    script = run_script(fetch, db)
+
+    user_data = script["load_user_data"]("u1")
+    user_data["monthly_searches"] = 99
+    assert script["load_user_data"]("u1")["monthly_searches"] == 2, "Unsaved edits must not leak into the cache"
+
+    user_data["monthly_searches"] = 3
+    script["save_user_data"]("u1", user_data)
+    user_data["monthly_searches"] = 42  # Editing after the save doesn't change what was saved
+    assert script["load_user_data"]("u1")["monthly_searches"] == 3
+    assert db.saved[-1]["monthly_searches"] == 3
+    assert reads == ["u1"], "The saved record is served without another read"
+    print("✅ Saves write through and callers get copies")
+
+def test_failed_production_save_drops_the_record():
+    """Test that after a failed production save the record is read again"""
+    fetch, reads = counting_fetch({"monthly_searches": 2, "is_premium": False})
+    script = run_script(fetch, FakeDB(fail=True))
+    previous = os.environ.get("STREAMLIT_ENVIRONMENT")
+    os.environ["STREAMLIT_ENVIRONMENT"] = "cloud"
+    try:
+        user_data = script["load_user_data"]("u1")
+        user_data["is_premium"] = True
+        with pytest.raises(RuntimeError):
+            script["save_user_data"]("u1", user_data)
+        assert script["errors"], "A failed production save is reported"
+        assert script["load_user_data"]("u1")["is_premium"] is False
+        assert reads == ["u1", "u1"], "The stored record is unknown after a failed save"
+        print("✅ A failed production save drops the cached record")
+    finally:
+        if previous is None:
+            os.environ.pop("STREAMLIT_ENVIRONMENT", None)
+        else:
+            os.environ["STREAMLIT_ENVIRONMENT"] = previous
+
+if __name__ == "__main__":
+    test_one_read_per_rerun()
+    test_save_writes_through_and_callers_get_copies()
+    test_failed_production_save_drops_the_record()
+    print("\n🎉 All user record cache tests passed!")
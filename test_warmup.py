@@ -0,0 +1,96 @@
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+import warmup
+from analytics import SearchPopularity
+from sqlite_connections import close_thread_connections
+from warmup import WarmupJob, get_warmup_job, in_window, parse_hours
+
+def test_off_peak_window():
+    """Test hour windows, including ones that wrap past midnight"""
+    assert parse_hours("3-6") == (3, 6)
+    assert in_window(3, (3, 6)) and in_window(5, (3, 6))
+    assert not in_window(6, (3, 6)) and not in_window(12, (3, 6))
+    assert in_window(23, (22, 2)) and in_window(1, (22, 2))
+    assert not in_window(2, (22, 2))
+    print("✅ Off-peak windows work")
+
+def test_popular_searches_per_location():
+    """Test that the top cravings of the busiest locations are picked and old ones pruned"""
+    db_path = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    try:
+        popularity = SearchPopularity(db_path)
+        assert popularity.popular() == []
+        searches = (
+            [("Orchard Road", "ramen")] * 5 + [("orchard road ", "Ramen")] * 2 +
+            [("Orchard Road", "pizza")] * 3 + [("Orchard Road", "tacos")] +
+            [("Tampines", "laksa")] * 4 + [("Jurong", "sushi")] * 2
+        )
+        for location, craving in searches:
+            popularity.record(location, craving)
+        # Searched often, but not for longer than the age limit
+        for _ in range(9):
+            popularity.record("Bugis", "dim sum", at=time.time() - 31 * 24 * 60 * 60)
+
+        popular = popularity.popular(top_locations=2, top_cravings=2)
+        assert popular == [("orchard road", "ramen"), ("tampines", "laksa"), ("orchard road", "pizza")]
+        assert popularity.prune() == 0, "Stale pairs are pruned when the counts are read"
+        print("✅ Popular searches are ranked per location")
+    finally:
+        close_thread_connections(db_path)
+        for path in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(path):
+                os.unlink(path)
+
+def test_warmup_runs_once_per_day():
+    """Test that the job warms every target once per day and survives failures"""
+    warmed = []
+
+    def warm_search(location, craving):
+        if craving == "broken":
+            raise RuntimeError("upstream down")
+        warmed.append((location, craving))
+
+    targets = [("orchard road", "ramen"), ("orchard road", "broken"), ("tampines", "laksa")]
+    job = WarmupJob(warm_search, lambda: targets, hours=(3, 6), pause_seconds=0)
+
+    assert not job.is_due(datetime(2024, 5, 1, 12, 0)), "Not due outside the window"
+    night = datetime(2024, 5, 1, 4, 0)
+    assert job.is_due(night)
+    assert job.run_once(night) == 2
+    assert warmed == [("orchard road", "ramen"), ("tampines", "laksa")]
+    assert job.failed == 1
+    assert not job.is_due(datetime(2024, 5, 1, 5, 0)), "Only once per day"
+    assert job.is_due(datetime(2024, 5, 2, 3, 30))
+    print("✅ Warm-up runs once per day and skips failures")
+
+def test_warmup_job_starts_once():
+    """Test that sessions starting at the same moment share one warm-up thread"""
+    started = []
+
+    def slow_start(job):
+        time.sleep(0.05)
+        started.append(job)
+        return job
+
+    original_start, original_job = WarmupJob.start, warmup.warmup_job
+    WarmupJob.start = slow_start
+    warmup.warmup_job = None
+    try:
+        threads = [threading.Thread(target=get_warmup_job, args=(None, list)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(started) == 1, f"Expected one warm-up job, got {len(started)}"
+    finally:
+        WarmupJob.start, warmup.warmup_job = original_start, original_job
+    print("✅ Concurrent sessions start one warm-up job")
+
+if __name__ == "__main__":
+    test_off_peak_window()
+    test_popular_searches_per_location()
+    test_warmup_runs_once_per_day()
+    test_warmup_job_starts_once()
@@ -0,0 +1,95 @@
+"""
+Off-peak cache warm-up for CraveMap
+Once a day, during off-peak hours, re-runs the most popular (location, craving)
+searches in a background thread so their place details and AI summaries are
+already cached when the lunch crowd arrives
+"""
+
+import threading
+import time
+from datetime import datetime
+
+def parse_hours(spec):
+    """Parse an 'H-H' window such as '3-6' (end exclusive, may wrap past midnight; '0-24' is all day)"""
+    start, end = (int(part) for part in spec.split("-", 1))
+    return start, end
+
+def in_window(hour, window):
+    start, end = window
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+class WarmupJob:
+    """Background job that warms the caches for popular searches once per day
+
+    get_targets() returns [(location, craving)] most popular first and
+    warm_search(location, craving) runs one search through the normal
+    pipeline. Searches are spaced pause_seconds apart so the job never
+    competes with real users for the rate limits.
+    """
+
+    def __init__(self, warm_search, get_targets, hours=(3, 6), check_interval=600, pause_seconds=5):
+        self.warm_search = warm_search
+        self.get_targets = get_targets
+        self.hours = hours
+        self.check_interval = check_interval
+        self.pause_seconds = pause_seconds
+        self.last_run_day = None
+        self.warmed = 0
+        self.failed = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def is_due(self, now=None):
+        """True during the off-peak window if today's warm-up hasn't run yet"""
+        now = now or datetime.now()
+        return in_window(now.hour, self.hours) and self.last_run_day != now.date()
+
+    def run_once(self, now=None):
+        """Warm every target search; returns how many were warmed"""
+        now = now or datetime.now()
+        self.last_run_day = now.date()
+        warmed = 0
+        targets = self.get_targets()
+        print(f"🔥 Warming caches for {len(targets)} popular searches")
+        for i, (location, craving) in enumerate(targets):
+            if i and self.pause_seconds:
+                time.sleep(self.pause_seconds)
+            try:
+                self.warm_search(location, craving)
+                warmed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠️ Warm-up of '{craving}' in {location} failed: {e}")
+        self.warmed += warmed
+        return warmed
+
+    def _loop(self):
+        while True:
+            try:
+                if self.is_due():
+                    self.run_once()
+            except Exception as e:
+                print(f"⚠️ Warm-up run failed: {e}")
+            time.sleep(self.check_interval)
+
+    def start(self):
+        """Start the background thread (once per process)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="cravemap-warmup", daemon=True)
+                self._thread.start()
+        return self
+
+# Global instance
+warmup_job = None
+_instance_lock = threading.Lock()
+
+def get_warmup_job(warm_search, get_targets, hours=(3, 6)):
+    """Get the process-wide warm-up job, starting its thread on first use"""
+    global warmup_job
+    with _instance_lock:
+        if warmup_job is None:
+            warmup_job = WarmupJob(warm_search, get_targets, hours).start()
+    return warmup_job